@@ -1,9 +1,18 @@
 from fastapi import HTTPException, APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import json
 import pandas as pd
+from typing import AsyncGenerator
 from ml_lib.stock_predictor import getStockData, predict, trainer
 from ml_lib.controllers import get_stock_options, get_stock_history, get_predictions, getPredictedPricesFromDB, \
-    get_model_details
-from classes.prediction import InData, getstockhist, getpredictprice, ModelDetails, trainrequestdata
+    get_model_details, get_predictions_batch, iter_prediction_sections, get_predictions_cached, \
+    getPredictedPricesFromDB_cached
+from classes.prediction import InData, getstockhist, getpredictprice, getbatchpredictprice, ModelDetails, \
+    trainrequestdata
+from ml_lib.model_registry import model_registry
+from ml_lib.response_cache import response_cache
+from ml_lib.forecast_executor import run_forecast, forecast_stats
 
 router = APIRouter(tags=['Prediction'])
 
@@ -60,7 +69,7 @@ async def get_stock_data2(data: getstockhist):
 @router.post("/get-predicted-prices")
 async def getpredictedpricesfromDB(data: InData):
     try:
-        prices = getPredictedPricesFromDB(data.company, data.date)
+        prices = getPredictedPricesFromDB_cached(data.company, data.date)
         if prices is None:
             raise HTTPException(status_code=404, detail="No predicted prices found for this ticker symbol and date.")
         return {"predicted_prices": prices}
@@ -82,7 +91,9 @@ async def get_stock_data1(data: getstockhist):
 @router.post("/V2/get-predicted-prices")
 async def get_predicted_price(data: getpredictprice):
     try:
-        result = get_predictions(data.ticker_symbol, data.starting_date, data.ending_date)
+        # Blocking I/O and inference run on the forecast executor; concurrent cold forecasts are coalesced
+        # and repeated requests for the same model version are served from the response cache
+        result = await run_forecast(get_predictions_cached, data.ticker_symbol, data.starting_date, data.ending_date)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
@@ -90,6 +101,68 @@ async def get_predicted_price(data: getpredictprice):
         raise HTTPException(status_code=500, detail=f"Error fetching predicted prices (V2): {str(e)}")
 
 
+async def prediction_stream(data: getpredictprice) -> AsyncGenerator[str, None]:
+    """Generate one SSE event per section of the V2 prediction response as soon as it is ready"""
+    sections = iter_prediction_sections(data.ticker_symbol, data.starting_date, data.ending_date)
+    while True:
+        try:
+            # Each section does blocking I/O (and possibly inference), so advance the generator on the executor
+            item = await run_forecast(next, sections, None)
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            break
+        if item is None:
+            break
+        section, payload = item
+        if section == "error":
+            yield f"data: {json.dumps({'type': 'error', 'message': payload})}\n\n"
+            break
+        yield f"data: {json.dumps({'type': section, 'data': jsonable_encoder(payload)})}\n\n"
+
+    yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+
+
+@router.post("/V2/get-predicted-prices/stream")
+async def stream_predicted_price(data: getpredictprice):
+    """
+    Stream the V2 prediction response using Server-Sent Events.
+
+    Events are sent in this order, each as soon as it is available:
+    1. stockData - price history, so the chart can render immediately
+    2. predictionData - the 7-day forecast (inference runs here if it is not stored yet)
+    3. modelMetadata - details of the model that produced the forecast
+    An 'error' event ends the stream early; a final 'complete' event is always sent.
+    """
+    return StreamingResponse(prediction_stream(data), media_type="text/event-stream")
+
+
+def batch_prediction_stream(data: getbatchpredictprice):
+    """Generate one SSE event per ticker as its V2 prediction response completes"""
+    try:
+        for ticker, result in get_predictions_batch(data.ticker_symbols, data.starting_date, data.ending_date):
+            if "error" in result:
+                yield f"data: {json.dumps({'type': 'ticker_error', 'ticker': ticker, 'message': result['error']})}\n\n"
+            else:
+                yield f"data: {json.dumps({'type': 'prediction', 'ticker': ticker, 'data': jsonable_encoder(result)})}\n\n"
+    except Exception as e:
+        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+
+
+@router.post("/V2/get-predicted-prices/batch")
+async def get_predicted_prices_batch(data: getbatchpredictprice):
+    """
+    Stream V2 prediction responses for several tickers using Server-Sent Events.
+
+    Each ticker is sent as a 'prediction' (or 'ticker_error') event as soon as it is ready,
+    followed by a final 'complete' event.
+    """
+    if not data.ticker_symbols:
+        raise HTTPException(status_code=400, detail="At least one ticker symbol is required.")
+    return StreamingResponse(batch_prediction_stream(data), media_type="text/event-stream")
+
+
 @router.post("/get_model_details")
 async def get_model_detail(data: ModelDetails):
     try:
@@ -99,3 +172,27 @@ async def get_model_detail(data: ModelDetails):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching model details: {str(e)}")
+
+
+@router.get("/model-cache-stats")
+async def get_model_cache_stats():
+    try:
+        return model_registry.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching model cache stats: {str(e)}")
+
+
+@router.get("/forecast-executor-stats")
+async def get_forecast_executor_stats():
+    try:
+        return forecast_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching forecast executor stats: {str(e)}")
+
+
+@router.get("/response-cache-stats")
+async def get_response_cache_stats():
+    try:
+        return response_cache.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching response cache stats: {str(e)}")
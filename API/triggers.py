@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, BackgroundTasks
 from sqlalchemy.orm import Session
 from db.dbConnect import get_db
 from services.asset_management import update_all_stock_risk_scores
+from ml_lib.forecast_job import run_forecast_job
 
 router = APIRouter(
     prefix="/triggers",
@@ -14,3 +15,10 @@ def trigger_risk_score_updates(background_tasks: BackgroundTasks, db: Session =
     """Trigger risk score updates for all stocks in the database."""
     background_tasks.add_task(update_all_stock_risk_scores, db)
     return {"message": "Risk score update initiated in the background"}
+
+
+@router.post("/precompute-forecasts", status_code=200)
+def trigger_forecast_precompute(background_tasks: BackgroundTasks):
+    """Trigger next-week forecast generation for all ACTIVE stocks."""
+    background_tasks.add_task(run_forecast_job)
+    return {"message": "Forecast precompute initiated in the background"}
@@ -16,6 +16,11 @@ class getpredictprice(BaseModel):
     starting_date: str
     ending_date: str
 
+class getbatchpredictprice(BaseModel):
+    ticker_symbols: list[str]
+    starting_date: str
+    ending_date: str
+
 class StockHistoryItem(BaseModel):
     date: str
     price: float
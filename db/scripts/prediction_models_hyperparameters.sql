@@ -0,0 +1,2 @@
+-- Tuned configuration written by ml_lib.tuning and reused by trainer
+ALTER TABLE prediction_models ADD COLUMN IF NOT EXISTS hyperparameters JSON;
@@ -0,0 +1,2 @@
+-- "ticker" for per-ticker models, "global" for stocks served by the shared ml_lib.global_model
+ALTER TABLE prediction_models ADD COLUMN IF NOT EXISTS model_type VARCHAR(20) DEFAULT 'ticker';
@@ -0,0 +1,17 @@
+-- Keep only one forecast per (model_id, predicted_date) before adding the unique index.
+-- The row made from the closest last_actual_data_date wins, newest generation breaking ties.
+DELETE FROM stock_predictions sp
+USING (
+    SELECT prediction_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY model_id, predicted_date
+               ORDER BY last_actual_data_date DESC, prediction_generated_at DESC, prediction_id DESC
+           ) AS rn
+    FROM stock_predictions
+) ranked
+WHERE sp.prediction_id = ranked.prediction_id
+AND ranked.rn > 1;
+
+-- Unique key used by the INSERT ... ON CONFLICT upsert in store_predictions
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_predictions_model_date
+ON stock_predictions (model_id, predicted_date);
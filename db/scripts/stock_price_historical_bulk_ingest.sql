@@ -0,0 +1,51 @@
+-- Keep only one bar per (stock_id, price_date) before adding the unique index.
+-- The most recently fetched row wins, highest id breaking ties.
+DELETE FROM stock_price_historical sph
+USING (
+    SELECT id,
+           ROW_NUMBER() OVER (
+               PARTITION BY stock_id, price_date
+               ORDER BY fetched_at DESC NULLS LAST, id DESC
+           ) AS rn
+    FROM stock_price_historical
+) ranked
+WHERE sph.id = ranked.id
+AND ranked.rn > 1;
+
+-- Unique key used by the INSERT ... ON CONFLICT upsert in ingest_price_frame
+CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_price_historical_stock_date
+ON stock_price_historical (stock_id, price_date);
+
+-- Replace the per-row last_data_point_date trigger with statement-level ones, so a bulk
+-- write of N bars updates each stock once instead of firing N times.
+DROP TRIGGER IF EXISTS trig_update_stock_last_data_point ON stock_price_historical;
+
+CREATE OR REPLACE FUNCTION update_stock_last_data_point_bulk()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE stocks s
+    SET last_data_point_date = latest.price_date
+    FROM (
+        SELECT stock_id, MAX(price_date) AS price_date
+        FROM new_rows
+        GROUP BY stock_id
+    ) latest
+    WHERE s.stock_id = latest.stock_id
+    AND (s.last_data_point_date IS NULL OR latest.price_date > s.last_data_point_date);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow a single event per trigger, hence one trigger for inserts and one for updates
+CREATE TRIGGER trig_update_stock_last_data_point_insert
+AFTER INSERT ON stock_price_historical
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_stock_last_data_point_bulk();
+
+CREATE TRIGGER trig_update_stock_last_data_point_update
+AFTER UPDATE ON stock_price_historical
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_stock_last_data_point_bulk();
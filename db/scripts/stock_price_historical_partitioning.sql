@@ -0,0 +1,96 @@
+-- Move stock_price_historical to a table range-partitioned by year of price_date, with a BRIN index on
+-- price_date in every partition. Run after stock_price_historical_bulk_ingest.sql, which creates the unique
+-- key and the statement-level triggers this script carries over. Runs in one transaction; the old table is
+-- kept as stock_price_historical_unpartitioned until the copy has been checked.
+BEGIN;
+
+ALTER TABLE stock_price_historical RENAME TO stock_price_historical_unpartitioned;
+ALTER TABLE stock_price_historical_unpartitioned
+    RENAME CONSTRAINT stock_price_historical_pkey TO stock_price_historical_unpartitioned_pkey;
+ALTER INDEX IF EXISTS uq_stock_price_historical_stock_date
+    RENAME TO uq_stock_price_historical_unpartitioned_stock_date;
+DROP TRIGGER IF EXISTS trig_update_stock_last_data_point_insert ON stock_price_historical_unpartitioned;
+DROP TRIGGER IF EXISTS trig_update_stock_last_data_point_update ON stock_price_historical_unpartitioned;
+
+-- The primary key of a partitioned table must contain the partition key. ids keep coming from the old
+-- sequence, so id alone stays unique and remains the ORM identity of StockPriceHistorical.
+CREATE TABLE stock_price_historical (
+    id BIGINT NOT NULL DEFAULT nextval('stock_price_historical_id_seq'),
+    stock_id INTEGER REFERENCES stocks (stock_id) ON DELETE CASCADE,
+    price_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    open_price NUMERIC(19, 4),
+    high_price NUMERIC(19, 4),
+    low_price NUMERIC(19, 6),
+    close_price NUMERIC(19, 6),
+    volume BIGINT,
+    fetched_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id, price_date)
+) PARTITION BY RANGE (price_date);
+
+ALTER SEQUENCE stock_price_historical_id_seq OWNED BY stock_price_historical.id;
+
+-- One partition per calendar year. There is no DEFAULT partition: a bar without a partition fails its
+-- insert instead of landing in a catch-all that would later block creating that year's partition.
+-- ml_lib.price_sync_job calls this for the current and the next year before every run, so partitions
+-- exist a year ahead; to add one by hand: SELECT create_stock_price_historical_partition(2031);
+CREATE OR REPLACE FUNCTION create_stock_price_historical_partition(partition_year INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF stock_price_historical FOR VALUES FROM (%L) TO (%L)',
+        'stock_price_historical_y' || partition_year,
+        make_date(partition_year, 1, 1),
+        make_date(partition_year + 1, 1, 1)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Decades of pre-2000 bars exist for only a few tickers; they share one partition
+CREATE TABLE stock_price_historical_before_2000 PARTITION OF stock_price_historical
+    FOR VALUES FROM (MINVALUE) TO ('2000-01-01');
+
+DO $$
+BEGIN
+    FOR partition_year IN 2000 .. EXTRACT(YEAR FROM now())::INTEGER + 1 LOOP
+        PERFORM create_stock_price_historical_partition(partition_year);
+    END LOOP;
+END;
+$$;
+
+-- Copy in date order: BRIN only prunes well when price_date follows the physical row order, which the
+-- daily appends of the sync job keep up afterwards. Bars without a date cannot be routed and are left behind.
+INSERT INTO stock_price_historical (
+    id, stock_id, price_date, open_price, high_price, low_price, close_price, volume, fetched_at
+)
+SELECT id, stock_id, price_date, open_price, high_price, low_price, close_price, volume, fetched_at
+FROM stock_price_historical_unpartitioned
+WHERE price_date IS NOT NULL
+ORDER BY price_date, stock_id;
+
+-- Indexes are created on the parent and cascade to every partition, including ones created later.
+-- The unique key serves the per-stock tail/range queries and the ON CONFLICT upserts.
+CREATE UNIQUE INDEX uq_stock_price_historical_stock_date
+ON stock_price_historical (stock_id, price_date);
+
+-- A few pages per date range instead of a B-tree entry per row, for scans across all stocks by date
+CREATE INDEX ix_stock_price_historical_price_date_brin
+ON stock_price_historical USING BRIN (price_date) WITH (pages_per_range = 32, autosummarize = on);
+
+CREATE TRIGGER trig_update_stock_last_data_point_insert
+AFTER INSERT ON stock_price_historical
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_stock_last_data_point_bulk();
+
+CREATE TRIGGER trig_update_stock_last_data_point_update
+AFTER UPDATE ON stock_price_historical
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION update_stock_last_data_point_bulk();
+
+COMMIT;
+
+ANALYZE stock_price_historical;
+
+-- After comparing row counts with stock_price_historical_unpartitioned:
+-- DROP TABLE stock_price_historical_unpartitioned;
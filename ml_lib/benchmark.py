@@ -0,0 +1,227 @@
+"""
+Walk-forward benchmark of the forecasting stack over every model in ml_lib/trainedModels.
+
+For each ticker the serving model is loaded from disk, then a 7-day forecast is made from
+every origin in a fixed historical window using the prices stored in stock_price_historical
+(no yfinance refresh, so runs are repeatable). The report has per-ticker model load time,
+resident memory, inference latency percentiles and MAPE/RMSE, as JSON:
+    python -m ml_lib.benchmark --end-date 2025-03-31 --origins 60 --output bench.json
+    python -m ml_lib.benchmark --tickers AAPL MSFT --n-iter 50
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sklearn.metrics import mean_squared_error
+
+from ml_lib.model_registry import artifact_paths, load_model_artifacts, resident_bytes, scaler_file_path, \
+    model_versions_dir, VERSIONED_NUMPY_FILE, VERSIONED_SCALER_FILE
+from ml_lib.model_store import list_model_versions
+from ml_lib.global_model import GLOBAL_MODEL_KEY
+from ml_lib.price_history import load_stock_prices
+from ml_lib.stock_predictor import predict_with_uncertainty, mean_absolute_percentage_error
+
+INPUT_DIM = 90  # window length for models without a PredictionModel.time_step
+OUTPUT_DIM = 7
+PERCENTILES = (50, 90, 99)
+
+
+def discover_models(tickers=None):
+    """Map each ticker with artifacts in MODELS_FOLDER to its (model_file, scaler_file), preferring the newest version."""
+    models = {}
+    for scaler_file in glob.glob(scaler_file_path("*")):
+        ticker = os.path.basename(scaler_file)[:-len("_scaler.pkl")]
+        models[ticker] = artifact_paths(ticker)
+    for ticker_dir in glob.glob(os.path.join(model_versions_dir("*"), "")):
+        ticker = os.path.basename(os.path.dirname(ticker_dir))
+        if ticker == GLOBAL_MODEL_KEY:
+            # The shared global model has no scaler and its own artifact layout
+            continue
+        versions = list_model_versions(ticker)
+        if versions:
+            version_dir = os.path.join(model_versions_dir(ticker), versions[0])
+            models[ticker] = (os.path.join(version_dir, VERSIONED_NUMPY_FILE),
+                              os.path.join(version_dir, VERSIONED_SCALER_FILE))
+    if tickers:
+        models = {t: paths for t, paths in models.items() if t in tickers}
+    return dict(sorted(models.items()))
+
+
+def active_time_steps(tickers=None):
+    """Map each ticker to the window length (PredictionModel.time_step) of its active model, in one query."""
+    from db.dbConnect import SessionLocal
+    from models.models import Stock, PredictionModel
+
+    try:
+        db = SessionLocal()
+        try:
+            query = (
+                db.query(Stock.ticker_symbol, PredictionModel.time_step)
+                .join(PredictionModel, PredictionModel.target_stock_id == Stock.stock_id)
+                .filter(PredictionModel.is_active == True)
+                .order_by(PredictionModel.latest_modified_time.asc())
+            )
+            if tickers:
+                query = query.filter(Stock.ticker_symbol.in_(tickers))
+            # Ascending, so the newest active model of a ticker wins
+            return {ticker: time_step for ticker, time_step in query.all() if time_step}
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"Could not read model time steps: {e}")
+        return {}
+
+
+def resolve_time_step(ticker_symbol, time_steps):
+    time_step = time_steps.get(ticker_symbol)
+    if time_step is None:
+        print(f"No time_step recorded for {ticker_symbol}; using {INPUT_DIM}-bar windows.")
+        return INPUT_DIM
+    return time_step
+
+
+def load_closes(ticker_symbol, end_date=None):
+    stored = load_stock_prices(ticker_symbol, ending_date=end_date, refresh=False)
+    if stored is None:
+        return None
+    return stored[0]["Close"]
+
+
+def latency_summary(seconds):
+    millis = np.asarray(seconds) * 1000
+    summary = {f"p{p}Ms": float(np.percentile(millis, p)) for p in PERCENTILES}
+    summary["meanMs"] = float(millis.mean())
+    return summary
+
+
+def benchmark_ticker(ticker_symbol, model_file, scaler_file, closes, origins=60, n_iter=50, seed=0,
+                     time_step=INPUT_DIM):
+    """
+    Walk forward over the last `origins` forecast origins of closes, holding out the 7 bars after each.
+    Each forecast reads the `time_step` bars before its origin, the window length the model was trained on.
+    Returns:
+        dict: loadMs, residentBytes, latency percentiles, and MAPE (%) / RMSE (scaled, as trainer reports) / RMSE in price.
+    """
+    started = time.perf_counter()
+    model, scaler = load_model_artifacts(model_file, scaler_file)
+    load_seconds = time.perf_counter() - started
+
+    values = np.asarray(closes, dtype=np.float64)
+    first_origin = max(time_step, len(values) - OUTPUT_DIM - origins + 1)
+    origin_indices = range(first_origin, len(values) - OUTPUT_DIM + 1)
+    if len(origin_indices) == 0:
+        raise ValueError(f"Not enough stored prices for {ticker_symbol} ({len(values)} bars).")
+
+    scaled = scaler.transform(values.reshape(-1, 1)).reshape(-1)
+    latencies, predictions, actuals = [], [], []
+    for origin in origin_indices:
+        window = scaled[origin - time_step:origin].reshape(1, time_step, 1).astype(np.float32)
+        started = time.perf_counter()
+        mean_prediction, _ = predict_with_uncertainty(model, window, scaler, n_iter=n_iter, seed=seed)
+        latencies.append(time.perf_counter() - started)
+        predictions.append(np.asarray(mean_prediction).reshape(-1))
+        actuals.append(values[origin:origin + OUTPUT_DIM])
+
+    predictions = np.array(predictions)
+    actuals = np.array(actuals)
+    scaled_predictions = scaler.transform(predictions.reshape(-1, 1))
+    scaled_actuals = scaler.transform(actuals.reshape(-1, 1))
+    return {
+        "modelFile": model_file,
+        "timeStep": time_step,
+        "origins": len(latencies),
+        "firstOrigin": str(closes.index[first_origin].date()) if hasattr(closes, "index") else None,
+        "loadMs": load_seconds * 1000,
+        "residentBytes": resident_bytes(model, scaler),
+        "latency": latency_summary(latencies),
+        "mape": float(mean_absolute_percentage_error(actuals.flatten(), predictions.flatten())),
+        "rmse": math.sqrt(mean_squared_error(scaled_actuals.flatten(), scaled_predictions.flatten())),
+        "rmsePrice": math.sqrt(mean_squared_error(actuals.flatten(), predictions.flatten())),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(tickers=None, end_date=None, origins=60, n_iter=50, seed=0, price_loader=load_closes,
+                  time_step_loader=active_time_steps):
+    """
+    Benchmark every discovered model and return a JSON-serialisable report.
+    A ticker whose model or prices cannot be loaded is reported with an "error" entry.
+    """
+    started = time.perf_counter()
+    results = {}
+    models = discover_models(tickers)
+    time_steps = time_step_loader(list(models))
+    for ticker_symbol, (model_file, scaler_file) in models.items():
+        try:
+            closes = price_loader(ticker_symbol, end_date)
+            if closes is None:
+                raise ValueError(f"No stored prices for {ticker_symbol}.")
+            results[ticker_symbol] = benchmark_ticker(ticker_symbol, model_file, scaler_file, closes,
+                                                      origins, n_iter, seed,
+                                                      resolve_time_step(ticker_symbol, time_steps))
+        except Exception as e:
+            print(f"Error benchmarking {ticker_symbol}: {e}")
+            results[ticker_symbol] = {"error": str(e)}
+
+    succeeded = [r for r in results.values() if "error" not in r]
+    summary = {
+        "tickers": len(results),
+        "succeeded": len(succeeded),
+        "totalSeconds": time.perf_counter() - started,
+        "maxRssBytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+    if succeeded:
+        summary.update({
+            "meanLoadMs": float(np.mean([r["loadMs"] for r in succeeded])),
+            "meanP50Ms": float(np.mean([r["latency"]["p50Ms"] for r in succeeded])),
+            "meanP99Ms": float(np.mean([r["latency"]["p99Ms"] for r in succeeded])),
+            "meanMape": float(np.mean([r["mape"] for r in succeeded])),
+            "meanRmse": float(np.mean([r["rmse"] for r in succeeded])),
+        })
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "endDate": str(end_date) if end_date else None,
+            "origins": origins,
+            "nIter": n_iter,
+            "seed": seed,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "summary": summary,
+        "tickers": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward latency and accuracy benchmark of the trained models.")
+    parser.add_argument("--tickers", nargs="*", help="Only benchmark these ticker symbols.")
+    parser.add_argument("--end-date", help="Last stored bar used (YYYY-MM-DD); fix it to compare runs.")
+    parser.add_argument("--origins", type=int, default=60, help="Number of walk-forward forecast origins.")
+    parser.add_argument("--n-iter", type=int, default=50, help="Monte Carlo dropout samples per forecast.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the dropout masks.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.tickers, args.end_date, args.origins, args.n_iter, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Benchmark report written to '{args.output}'")
+    else:
+        print(json.dumps(report, indent=2))
@@ -1,12 +1,21 @@
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 from db.dbConnect import get_db,SessionLocal
 from models.models import Stock, AssetStatus, PredictionModel, StockPrediction
-import yfinance as yf
 import requests
 import pandas as pd
 from ml_lib.stock_predictor import getStockData,predict
+from ml_lib.forecast_executor import forecast_flights
+from ml_lib.price_history import refresh_stock_prices, query_price_frame, latest_closes
+from ml_lib.response_cache import response_cache
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+import os
+
+BATCH_FORECAST_WORKERS = int(os.getenv("BATCH_FORECAST_WORKERS", "4"))
+# Stored forecasts are read for origins up to this many days before ending_date in the same query as the model
+PREDICTION_LOOKBACK_DAYS = 14
 
 
 def get_stock_options() -> list[dict]:
@@ -92,25 +101,23 @@ def getPredictedPricesFromDB(ticker_symbol, date):
         return None
 
 
-def getlast_date(symbol):
-    """
-    Get the last available date for the given stock ticker symbol using yfinance.
-    Args:
-        symbol (str): The stock ticker symbol.
-    Returns:
-        str: The last available date in YYYY-MM-DD format, or None if not found.
-    """
-    try:
-        ticker = yf.Ticker(symbol)
-        history = ticker.history(period="1d")
-        if not history.empty:
-            last_date = history.index[-1].date()
-            return str(last_date)
-        else:
-            return None
-    except Exception as e:
-        print(f"Error fetching last date for symbol '{symbol}': {e}")
-        return None
+def history_items(data):
+    """Convert a price frame into the history items sent to the frontend."""
+    # Check if the index is already timezone-aware
+    if data.index.tz is None:
+        data.index = pd.to_datetime(data.index).tz_localize('UTC')
+    else:
+        data.index = data.index.tz_convert('UTC')
+
+    history_list = []
+    for index, row in data.iterrows():
+        history_list.append({
+            "date": str(index.date()),
+            "price": float(row['Close']),
+            "volume": float(row['Volume'])
+        })
+    return history_list
+
 
 def get_stock_history(s_date, e_date, st_id=None, st_sym=None):
     try:
@@ -127,22 +134,8 @@ def get_stock_history(s_date, e_date, st_id=None, st_sym=None):
             return None
 
         data_res = getStockData(company=ticker_symbol, starting_date=s_date, ending_date=e_date)
-        data = data_res[0]
         print("point 4 pass")
-
-        # Check if the index is already timezone-aware
-        if data.index.tz is None:
-            data.index = pd.to_datetime(data.index).tz_localize('UTC')
-        else:
-            data.index = data.index.tz_convert('UTC')
-
-        history_list = []
-        for index, row in data.iterrows():
-            history_list.append({
-                "date": str(index.date()),
-                "price": float(row['Close']),
-                "volume": float(row['Volume'])
-            })
+        history_list = history_items(data_res[0])
         output = {"ticker": ticker_symbol, "currentPrice": data_res[1], "priceChange": data_res[2], "history": history_list}
         print("point 5 pass")
         return output
@@ -161,6 +154,17 @@ def get_db_local():
         db.close()
 
 
+def model_metadata(model: PredictionModel) -> dict:
+    return {
+        "modelType":"LSTM Neural Network",
+        "version": model.model_version,
+        "lastUpdated": str(model.latest_modified_time) if model.latest_modified_time else None,
+        "maeScore": float(model.rmse) if model.rmse is not None else None,
+        "trainedOn": str(model.trained_upto_date) if model.trained_upto_date else None,
+        "trainingDataPoints":int(model.data_points)
+    }
+
+
 def get_model_details(ticker_symbol: str):
     """
     Fetch details of the prediction model for the given ticker symbol.
@@ -187,15 +191,7 @@ def get_model_details(ticker_symbol: str):
             if not model:
                 return {"error": f"No active prediction model found for stock '{ticker_symbol}'."}
 
-            return {
-                # "ticker": ticker_symbol,
-                "modelType":"LSTM Neural Network",
-                "version": model.model_version,
-                "lastUpdated": str(model.latest_modified_time) if model.latest_modified_time else None,
-                "maeScore": float(model.rmse) if model.rmse is not None else None,
-                "trainedOn": str(model.trained_upto_date) if model.trained_upto_date else None,
-                "trainingDataPoints":int(model.data_points)
-            }
+            return model_metadata(model)
         finally:
             session.close()
     except Exception as e:
@@ -203,107 +199,316 @@ def get_model_details(ticker_symbol: str):
         return {"error": f"An error occurred while fetching model details: {str(e)}"}
 
 
-def get_predictions(ticker_symbol,starting_date, ending_date):
+def format_predictions(predictions, last_price):
+    """Format StockPrediction rows into the prediction items sent to the frontend."""
+    prediction_list = []
+    prev_val = float(last_price)
+    for i in predictions:
+        change = ((float(i.predicted_price)-prev_val)/prev_val)*100
+        prev_val = float(i.predicted_price)
+        curr = {
+            "date": i.predicted_date,
+            "predicted": float(i.predicted_price),
+            "confidenceLow": float(i.predicted_price)-float(i.confidence_score),
+            "confidenceHigh": float(i.predicted_price)+float(i.confidence_score),
+            "change":change
+        }
+        prediction_list.append(curr)
+    return prediction_list
+
+
+def build_prediction_response(ticker_symbol, data, predictions, modeldata):
+    history_data = data["history"]
+    prediction_list = format_predictions(predictions, history_data[-1]["price"])
+    return {
+        "stockData":{
+            "ticker":ticker_symbol,
+            "currentPrice": data["currentPrice"],
+            "priceChange": data["priceChange"],
+            "history":history_data
+        },
+        "predictionData":{
+            "ticker": ticker_symbol,
+            "predictions": prediction_list,
+            "nextWeek": prediction_list[-1]
+        },
+        "modelMetadata": modeldata
+
+    }
+
+
+def active_model_version(ticker_symbol):
+    """
+    Return (model_id, model_version, latest_modified_time) of a ticker's active model, the tag
+    cached responses are stored under, or None if it has no active model.
+    """
+    session = SessionLocal()
     try:
-        data = get_stock_history(starting_date,ending_date,st_sym=ticker_symbol)
+        row = (
+            session.query(PredictionModel.model_id, PredictionModel.model_version,
+                          PredictionModel.latest_modified_time)
+            .join(Stock, Stock.stock_id == PredictionModel.target_stock_id)
+            .filter(Stock.ticker_symbol == ticker_symbol, PredictionModel.is_active == True)
+            .order_by(PredictionModel.latest_modified_time.desc())
+            .first()
+        )
+        return (row.model_id, row.model_version, str(row.latest_modified_time)) if row else None
+    finally:
+        session.close()
 
-        history_data = data["history"]
-        last_date = history_data[-1]["date"]
-        available_date = getlast_date(ticker_symbol)
-        print("point 6 pass")
-        
-        #if (available_date<ending_date)
-        with get_db_local() as db:
-            # Query the stock by ticker symbol
-            stock = db.query(Stock).filter(Stock.ticker_symbol == ticker_symbol).first()
-            if not stock:
-                print(f"Stock with ticker symbol '{ticker_symbol}' not found.")
-                return {"error": f"Stock with ticker symbol '{ticker_symbol}' not found."}
 
-            # Query the prediction model for the stock
-            model = db.query(PredictionModel).filter(PredictionModel.target_stock_id == stock.stock_id).first()
-            if not model:
-                print(f"No prediction model found for stock '{ticker_symbol}'.")
-                return {"error": f"No prediction model found for stock '{ticker_symbol}'."}
+def get_predictions_cached(ticker_symbol, starting_date, ending_date):
+    """get_predictions through the response cache, keyed on the dates and the active model version."""
+    try:
+        version = active_model_version(ticker_symbol)
+    except Exception as e:
+        print(f"Error reading the model version of '{ticker_symbol}': {e}")
+        version = None
+    return response_cache.get_or_compute(
+        ("V2/get-predicted-prices", ticker_symbol, starting_date, ending_date), version,
+        lambda: get_predictions(ticker_symbol, starting_date, ending_date),
+    )
 
-            # Query predictions from the StockPrediction table
 
-            predictions = (
-                db.query(StockPrediction)
-                .filter(
-                    StockPrediction.model_id == model.model_id,
-                    StockPrediction.predicted_date > last_date,
-                    StockPrediction.predicted_date <= (datetime.strptime(last_date, "%Y-%m-%d").date() + timedelta(days=7))
+def getPredictedPricesFromDB_cached(ticker_symbol, date):
+    """getPredictedPricesFromDB through the response cache, keyed on the date and the active model version."""
+    try:
+        version = active_model_version(ticker_symbol)
+    except Exception as e:
+        print(f"Error reading the model version of '{ticker_symbol}': {e}")
+        version = None
+    return response_cache.get_or_compute(
+        ("get-predicted-prices", ticker_symbol, str(date)), version,
+        lambda: getPredictedPricesFromDB(ticker_symbol, date),
+    )
+
+
+def _prediction_window(predictions, last_date):
+    """Return up to 7 predictions dated within the week after last_date."""
+    start = datetime.strptime(last_date, "%Y-%m-%d").date()
+    end = start + timedelta(days=7)
+    window = [p for p in predictions if start < p.predicted_date <= end]
+    return sorted(window, key=lambda p: p.predicted_date)[:7]
+
+
+def _stored_predictions_start(starting_date, ending_date):
+    """First day of the stored forecasts both prediction paths preload, PREDICTION_LOOKBACK_DAYS before the end."""
+    return max(
+        datetime.strptime(starting_date, "%Y-%m-%d").date(),
+        datetime.strptime(ending_date, "%Y-%m-%d").date() - timedelta(days=PREDICTION_LOOKBACK_DAYS)
+    )
+
+
+def _week_predictions(db, model, last_date):
+    last = datetime.strptime(last_date, "%Y-%m-%d").date()
+    return (
+        db.query(StockPrediction)
+        .filter(
+            StockPrediction.model_id == model.model_id,
+            StockPrediction.predicted_date > last,
+            StockPrediction.predicted_date <= last + timedelta(days=7)
+        )
+        .order_by(StockPrediction.predicted_date.asc())
+        .limit(7)  # Fetch a maximum of 7 predictions
+        .all()
+    )
+
+
+def iter_prediction_sections(ticker_symbol, starting_date, ending_date):
+    """
+    Produce the V2 prediction response one section at a time, each as soon as it is available:
+    the price history first, then the forecasts (running inference if needed), then the model metadata.
+    Everything is read in one session: the stock, its active model and the stored forecasts come from a
+    single joined query, and the history from the local price store (topped up from yfinance when stale).
+    Yields:
+        tuple: (section, payload) with section "stockData", "predictionData" or "modelMetadata",
+        or ("error", message) after which nothing more is produced.
+    """
+    db = SessionLocal()
+    try:
+        first_day = _stored_predictions_start(starting_date, ending_date)
+        last_day = datetime.strptime(ending_date, "%Y-%m-%d").date() + timedelta(days=7)
+        rows = (
+            db.query(Stock, PredictionModel, StockPrediction)
+            .outerjoin(
+                PredictionModel,
+                and_(PredictionModel.target_stock_id == Stock.stock_id, PredictionModel.is_active == True)
+            )
+            .outerjoin(
+                StockPrediction,
+                and_(
+                    StockPrediction.model_id == PredictionModel.model_id,
+                    StockPrediction.predicted_date > first_day,
+                    StockPrediction.predicted_date <= last_day
                 )
-                .order_by(StockPrediction.predicted_date.asc())
-                .limit(7)  # Fetch a maximum of 7 predictions
-                .all())
-            print("point 7 pass")
-            if len(predictions) < 7:
-                # if available_date >= ending_date:
-                    try:
-                        predict(ticker_symbol, last_date)
-                    except Exception as e:
-                        return {"error": f"An error occurred while predicting: {str(e)}"}
-                    predictions = (
-                        db.query(StockPrediction)
-                        .filter(
-                            StockPrediction.model_id == model.model_id,
-                            StockPrediction.predicted_date > last_date,
-                            StockPrediction.predicted_date <= (datetime.strptime(last_date, "%Y-%m-%d").date() + timedelta(days=7))
-                        )
-                        .order_by(StockPrediction.predicted_date.asc())
-                        .limit(7)  # Fetch a maximum of 7 predictions
-                        .all()
-                    )
-                    print("point 8 pass")
-                # elif(len(predictions)==0):
-                #     print(f"Please provide a date by or earlier than {available_date}.")
-                #     return {"error": f"Please provide a date by or earlier than {available_date}."}
-                    
-
-            # Format the predictions into a list of dictionaries
-        prediction_list = []
-        prev_val = float(history_data[-1]["price"])
-        for i in predictions:
-                change = ((float(i.predicted_price)-prev_val)/prev_val)*100
-                prev_val = float(i.predicted_price)
-                curr = {
-                    "date": i.predicted_date,
-                    "predicted": float(i.predicted_price),
-                    "confidenceLow": float(i.predicted_price)-float(i.confidence_score),
-                    "confidenceHigh": float(i.predicted_price)+float(i.confidence_score),
-                    "change":change
-                }
-                prediction_list.append(curr)
-
-
-        
-        modeldata = get_model_details(ticker_symbol=ticker_symbol)
-        print("point 9 pass")
-        if "error" in modeldata:
-            print("point 10 pass")
-            return modeldata
-        
-
-        return {
-            "stockData":{
-                "ticker":ticker_symbol,
-                "currentPrice": data["currentPrice"],
-                "priceChange": data["priceChange"],
-                "history":history_data
-            },
-            "predictionData":{
-                "ticker": ticker_symbol,
-                "predictions": prediction_list,
-                "nextWeek": prediction_list[-1]
-            },
-            "modelMetadata": modeldata
+            )
+            .filter(Stock.ticker_symbol == ticker_symbol)
+            .order_by(PredictionModel.latest_modified_time.desc(), StockPrediction.predicted_date.asc())
+            .all()
+        )
+        if not rows:
+            print(f"Stock with ticker symbol '{ticker_symbol}' not found.")
+            yield "error", f"Stock with ticker symbol '{ticker_symbol}' not found."
+            return
+        stock, model = rows[0][0], rows[0][1]
+        stored = [prediction for _, row_model, prediction in rows if row_model is model and prediction is not None]
+
+        try:
+            refresh_stock_prices(db, stock)
+        except Exception as e:
+            db.rollback()
+            print(f"Error refreshing prices for {ticker_symbol}: {e}")
+        history_data = history_items(query_price_frame(db, stock.stock_id, starting_date, ending_date))
+        if not history_data:
+            yield "error", f"No price history found for '{ticker_symbol}'."
+            return
+        closes = latest_closes(db, stock.stock_id)
+        yield "stockData", {
+            "ticker": ticker_symbol,
+            "currentPrice": closes[0] if closes else None,
+            "priceChange": ((closes[0] - closes[1]) / closes[1]) * 100 if len(closes) > 1 else None,
+            "history": history_data
+        }
 
+        if model is None:
+            print(f"No prediction model found for stock '{ticker_symbol}'.")
+            yield "error", f"No active prediction model found for stock '{ticker_symbol}'."
+            return
+        last_date = history_data[-1]["date"]
+        predictions = _prediction_window(stored, last_date)
+        if len(predictions) < 7 and datetime.strptime(last_date, "%Y-%m-%d").date() < first_day:
+            # The last bar is older than the forecasts read with the model; read its week before predicting
+            predictions = _week_predictions(db, model, last_date)
+        if len(predictions) < 7:
+            try:
+                forecast_flights.do((ticker_symbol, last_date), predict, ticker_symbol, last_date)
+            except Exception as e:
+                yield "error", f"An error occurred while predicting: {str(e)}"
+                return
+            predictions = _week_predictions(db, model, last_date)
+        if not predictions:
+            yield "error", f"Could not generate predictions for '{ticker_symbol}'."
+            return
+        prediction_list = format_predictions(predictions, history_data[-1]["price"])
+        yield "predictionData", {
+            "ticker": ticker_symbol,
+            "predictions": prediction_list,
+            "nextWeek": prediction_list[-1]
         }
+        yield "modelMetadata", model_metadata(model)
+    finally:
+        db.close()
+
+
+def get_predictions(ticker_symbol,starting_date, ending_date):
+    try:
+        response = {}
+        for section, payload in iter_prediction_sections(ticker_symbol, starting_date, ending_date):
+            if section == "error":
+                return {"error": payload}
+            response[section] = payload
+        return response
     except Exception as e:
         print(f"Error in get_predictions: {e}")
         return {"error": f"An error occurred while fetching predictions: {str(e)}"}
 
 
+def _batch_ticker_prediction(ticker_symbol, model, preloaded, starting_date, ending_date):
+    data = get_stock_history(starting_date, ending_date, st_sym=ticker_symbol)
+    if not data or not data["history"]:
+        return {"error": f"No price history found for '{ticker_symbol}'."}
+    last_date = data["history"][-1]["date"]
+
+    predictions = _prediction_window(preloaded, last_date)
+    if len(predictions) < 7:
+        stale = datetime.strptime(last_date, "%Y-%m-%d").date() < _stored_predictions_start(starting_date, ending_date)
+        session = SessionLocal()
+        try:
+            # A last bar older than the preloaded window may still have its week stored
+            if stale:
+                predictions = _week_predictions(session, model, last_date)
+            if len(predictions) < 7:
+                forecast_flights.do((ticker_symbol, last_date), predict, ticker_symbol, last_date)
+                predictions = _week_predictions(session, model, last_date)
+        finally:
+            session.close()
+        if not predictions:
+            return {"error": f"Could not generate predictions for '{ticker_symbol}'."}
+
+    return build_prediction_response(ticker_symbol, data, predictions, model_metadata(model))
+
 
+def get_predictions_batch(ticker_symbols, starting_date, ending_date, max_workers=BATCH_FORECAST_WORKERS):
+    """
+    Generate V2 prediction responses for several tickers, yielding each one as soon as it is ready.
+    Stocks, active models and stored predictions are loaded with two set-based queries; inference
+    only runs for tickers with missing forecast days, on a bounded thread pool.
+    Args:
+        ticker_symbols (list[str]): Stock ticker symbols.
+        starting_date (str): Start of the history range (YYYY-MM-DD).
+        ending_date (str): End of the history range (YYYY-MM-DD).
+        max_workers (int): Maximum number of tickers processed concurrently.
+    Yields:
+        tuple: (ticker_symbol, result) where result has the same shape as get_predictions.
+    """
+    ticker_symbols = list(dict.fromkeys(ticker_symbols))
+    session = SessionLocal()
+    try:
+        rows = (
+            session.query(Stock, PredictionModel)
+            .outerjoin(
+                PredictionModel,
+                and_(PredictionModel.target_stock_id == Stock.stock_id, PredictionModel.is_active == True)
+            )
+            .filter(Stock.ticker_symbol.in_(ticker_symbols))
+            .order_by(Stock.stock_id, PredictionModel.latest_modified_time.desc())
+            .all()
+        )
+        models = {}
+        found = set()
+        for stock, model in rows:
+            found.add(stock.ticker_symbol)
+            if model is not None and stock.ticker_symbol not in models:
+                models[stock.ticker_symbol] = model
+
+        preloaded = {model.model_id: [] for model in models.values()}
+        if preloaded:
+            # The same rows iter_prediction_sections reads: only the week after the last bar is ever used
+            first_day = _stored_predictions_start(starting_date, ending_date)
+            last_day = datetime.strptime(ending_date, "%Y-%m-%d").date() + timedelta(days=7)
+            predictions = (
+                session.query(StockPrediction)
+                .filter(
+                    StockPrediction.model_id.in_(list(preloaded)),
+                    StockPrediction.predicted_date > first_day,
+                    StockPrediction.predicted_date <= last_day
+                )
+                .all()
+            )
+            for prediction in predictions:
+                preloaded[prediction.model_id].append(prediction)
+    finally:
+        session.close()
+
+    for ticker_symbol in ticker_symbols:
+        if ticker_symbol not in found:
+            yield ticker_symbol, {"error": f"Stock with ticker symbol '{ticker_symbol}' not found."}
+        elif ticker_symbol not in models:
+            yield ticker_symbol, {"error": f"No active prediction model found for stock '{ticker_symbol}'."}
+
+    if not models:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _batch_ticker_prediction, ticker_symbol, model, preloaded[model.model_id], starting_date, ending_date
+            ): ticker_symbol
+            for ticker_symbol, model in models.items()
+        }
+        for future in as_completed(futures):
+            ticker_symbol = futures[future]
+            try:
+                yield ticker_symbol, future.result()
+            except Exception as e:
+                print(f"Error in get_predictions_batch for '{ticker_symbol}': {e}")
+                yield ticker_symbol, {"error": f"An error occurred while fetching predictions: {str(e)}"}
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "4"))
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+
+    The first caller for a key (the leader) runs the function in its own thread; callers arriving
+    while it runs wait for the leader's result instead of repeating the work. Errors propagate to
+    every waiter. Once the call finishes the key is released, so later calls run afresh.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.result()
+
+        try:
+            flight.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            flight.set_exception(e)
+        finally:
+            with self._lock:
+                del self._flights[key]
+        return flight.result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inFlight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+# Bounded pool for blocking forecast work (price I/O, inference, DB writes) so it stays off the event loop
+forecast_executor = ThreadPoolExecutor(max_workers=FORECAST_WORKERS, thread_name_prefix="forecast")
+forecast_flights = SingleFlight()
+
+
+async def run_forecast(fn, *args):
+    """Run a blocking forecast call on the forecast executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(forecast_executor, fn, *args)
+
+
+def forecast_stats():
+    return dict(forecast_flights.stats(), workers=FORECAST_WORKERS)
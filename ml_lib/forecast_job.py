@@ -0,0 +1,211 @@
+"""
+Precompute the next week of forecasts for every ACTIVE stock.
+
+Run after market close so that /V2/get-predicted-prices only has to read stored rows:
+    python -m ml_lib.forecast_job
+    python -m ml_lib.forecast_job --tickers AAPL MSFT --date 2025-04-21
+Tickers served by the global model are forecast together in one batched forward pass.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from sqlalchemy import and_
+
+from db.dbConnect import SessionLocal
+from models.models import Stock, AssetStatus, PredictionModel
+from ml_lib.model_registry import model_registry
+from ml_lib.global_model import uses_global_model, load_global_model
+from ml_lib.stock_predictor import prepare_input_window, predict_with_uncertainty, save_forecast, recent_closes
+
+PHASES = ("load", "data", "inference", "store")
+
+
+def get_active_models(tickers=None):
+    """Return (ticker_symbol, PredictionModel) pairs for ACTIVE stocks with an active model, in one query."""
+    session = SessionLocal()
+    try:
+        query = (
+            session.query(Stock.ticker_symbol, PredictionModel)
+            .join(
+                PredictionModel,
+                and_(PredictionModel.target_stock_id == Stock.stock_id, PredictionModel.is_active == True)
+            )
+            .filter(Stock.status == AssetStatus.ACTIVE)
+            .order_by(Stock.ticker_symbol, PredictionModel.latest_modified_time.desc())
+        )
+        if tickers:
+            query = query.filter(Stock.ticker_symbol.in_(tickers))
+        models = {}
+        for ticker_symbol, model in query.all():
+            models.setdefault(ticker_symbol, model)
+        return list(models.items())
+    finally:
+        session.close()
+
+
+def forecast_ticker(ticker_symbol, model_detail, date=None, n_iter=50):
+    """
+    Forecast and store the next days for one ticker.
+    Returns:
+        dict: Per-phase timings in seconds and the last actual date the forecast starts from.
+    """
+    timings = {}
+    started = time.perf_counter()
+    artifacts = model_registry.get(ticker_symbol, model_detail.latest_modified_time,
+                                   model_detail.model_location, model_detail.scaler_location)
+    if artifacts is None:
+        raise ValueError(f"Model artifacts for {ticker_symbol} not found.")
+    model, scaler = artifacts
+    timings["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    last_date, window = prepare_input_window(ticker_symbol, scaler, date, model_detail.time_step or 90)
+    timings["data"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mean_prediction, std_prediction = predict_with_uncertainty(model, window, scaler, n_iter=n_iter)
+    if mean_prediction is None:
+        raise ValueError(f"Inference failed for {ticker_symbol}.")
+    timings["inference"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    save_forecast(model_detail.model_id, last_date, mean_prediction, std_prediction)
+    timings["store"] = time.perf_counter() - started
+
+    return {"lastActualDate": str(last_date), "timings": timings}
+
+
+def forecast_global_tickers(pairs, date=None, n_iter=50):
+    """
+    Forecast every ticker served by the global model in a single forward pass per model version.
+    Returns:
+        tuple: ({ticker: result or Exception}, per-phase timings of the whole group)
+    """
+    timings = {phase: 0.0 for phase in PHASES}
+    results = {}
+    groups = {}
+    for ticker_symbol, model_detail in pairs:
+        groups.setdefault(model_detail.model_location, []).append((ticker_symbol, model_detail))
+
+    for model_location, group in groups.items():
+        started = time.perf_counter()
+        model = load_global_model(model_location)
+        timings["load"] += time.perf_counter() - started
+        if model is None:
+            for ticker_symbol, _ in group:
+                results[ticker_symbol] = ValueError(f"Global model for {ticker_symbol} not found.")
+            continue
+
+        started = time.perf_counter()
+        ready = []
+        for ticker_symbol, model_detail in group:
+            try:
+                last_date, closes = recent_closes(ticker_symbol, date, model.time_step)
+                if len(closes) != model.time_step:
+                    raise ValueError(f"Only {len(closes)} stored prices for {ticker_symbol}.")
+                ready.append((ticker_symbol, model_detail, last_date, closes))
+            except Exception as e:
+                results[ticker_symbol] = e
+        timings["data"] += time.perf_counter() - started
+        if not ready:
+            continue
+
+        started = time.perf_counter()
+        means, stds = model.forecast(np.stack([r[3] for r in ready]), [r[0] for r in ready], n_iter=n_iter)
+        timings["inference"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        for (ticker_symbol, model_detail, last_date, _), mean_prediction, std_prediction in zip(ready, means, stds):
+            try:
+                save_forecast(model_detail.model_id, last_date, mean_prediction, std_prediction)
+                results[ticker_symbol] = {"lastActualDate": str(last_date)}
+            except Exception as e:
+                results[ticker_symbol] = e
+        timings["store"] += time.perf_counter() - started
+    return results, timings
+
+
+def run_forecast_job(tickers=None, date=None, n_iter=50):
+    """
+    Forecast the next week for every ACTIVE stock (or the given tickers) and bulk-store the results.
+    Args:
+        tickers (list[str]): Optional subset of ticker symbols.
+        date (str): Optional last actual date to forecast from; defaults to the latest stored bar.
+        n_iter (int): Monte Carlo dropout samples per forecast.
+    Returns:
+        dict: Run statistics with per-ticker and per-phase timings.
+    """
+    run_started = time.perf_counter()
+    models = get_active_models(tickers)
+    stats = {
+        "tickers": len(models),
+        "succeeded": 0,
+        "failed": 0,
+        "phaseSeconds": {phase: 0.0 for phase in PHASES},
+        "results": [],
+    }
+
+    def record(ticker_symbol, result, seconds):
+        if isinstance(result, Exception):
+            print(f"Error forecasting {ticker_symbol}: {result}")
+            stats["failed"] += 1
+            stats["results"].append({
+                "ticker": ticker_symbol,
+                "status": "error",
+                "message": str(result),
+                "seconds": seconds,
+            })
+        else:
+            stats["succeeded"] += 1
+            stats["results"].append({
+                "ticker": ticker_symbol,
+                "status": "ok",
+                "lastActualDate": result["lastActualDate"],
+                "seconds": seconds,
+            })
+
+    global_models = [(t, m) for t, m in models if uses_global_model(m)]
+    for ticker_symbol, model_detail in models:
+        if uses_global_model(model_detail):
+            continue
+        started = time.perf_counter()
+        try:
+            result = forecast_ticker(ticker_symbol, model_detail, date=date, n_iter=n_iter)
+            for phase, seconds in result["timings"].items():
+                stats["phaseSeconds"][phase] += seconds
+        except Exception as e:
+            result = e
+        record(ticker_symbol, result, time.perf_counter() - started)
+
+    if global_models:
+        started = time.perf_counter()
+        results, timings = forecast_global_tickers(global_models, date=date, n_iter=n_iter)
+        for phase, seconds in timings.items():
+            stats["phaseSeconds"][phase] += seconds
+        # One batched pass serves the whole group, so each ticker gets an equal share of its time
+        seconds = (time.perf_counter() - started) / len(global_models)
+        for ticker_symbol, _ in global_models:
+            record(ticker_symbol, results[ticker_symbol], seconds)
+
+    stats["totalSeconds"] = time.perf_counter() - run_started
+    stats["modelCache"] = {k: v for k, v in model_registry.stats().items() if k != "models"}
+    print(
+        f"Forecast job finished: {stats['succeeded']}/{stats['tickers']} tickers in {stats['totalSeconds']:.2f}s "
+        + ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in stats["phaseSeconds"].items())
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute next-week forecasts for ACTIVE stocks.")
+    parser.add_argument("--tickers", nargs="*", help="Only forecast these ticker symbols.")
+    parser.add_argument("--date", help="Forecast from this last actual date (YYYY-MM-DD).")
+    parser.add_argument("--n-iter", type=int, default=50, help="Monte Carlo dropout samples per forecast.")
+    parser.add_argument("--json", action="store_true", help="Print the run statistics as JSON.")
+    args = parser.parse_args()
+
+    run_stats = run_forecast_job(tickers=args.tickers, date=args.date, n_iter=args.n_iter)
+    if args.json:
+        print(json.dumps(run_stats, indent=2))
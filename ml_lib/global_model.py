@@ -0,0 +1,208 @@
+"""
+Optional global forecasting model shared by all tickers.
+
+One GlobalLSTMWithDropout is trained on the windows of every ACTIVE stock, each window
+normalized relative to its last price and tagged with a ticker embedding. A stock whose
+PredictionModel.model_type is "global" is forecast with it instead of a per-ticker model;
+stocks it has never seen (e.g. new PENDING stocks) use the shared "unknown ticker" embedding,
+so they can be forecast without waiting for their own training:
+    python -m ml_lib.global_model                      # train, then register PENDING stocks
+    python -m ml_lib.global_model --register all       # switch every trained ticker to it
+"""
+import argparse
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+from sklearn.metrics import mean_squared_error
+
+from db.dbConnect import SessionLocal
+from models.models import Stock, AssetStatus, PredictionModel
+from ml_lib.model_registry import VERSIONED_NUMPY_FILE, model_version_dir
+from ml_lib.model_store import publish_model_version, gc_model_versions, list_model_versions
+from ml_lib.numpy_lstm import NumpyGlobalLSTM, normalize_windows
+from ml_lib.stock_market_handlerV2 import model_regiterer
+from ml_lib.windowing import make_windows, split_index
+
+GLOBAL_MODEL_TYPE = "global"
+GLOBAL_MODEL_KEY = "_global"  # artifact folder: trainedModels/_global/<version>/
+OUTPUT_DIM = 7
+UNKNOWN_TICKER_RATE = 0.1
+
+
+def uses_global_model(model_detail):
+    return model_detail is not None and getattr(model_detail, "model_type", None) == GLOBAL_MODEL_TYPE
+
+
+@lru_cache(maxsize=4)
+def _load_numpy_model(npz_path, mtime):
+    return NumpyGlobalLSTM.load(npz_path)
+
+
+def load_global_model(model_location=None):
+    """
+    Load the global model a PredictionModel row points to, or the newest published one.
+    Versions are immutable, so loaded models are cached by path.
+    Returns:
+        NumpyGlobalLSTM, or None if no global model has been published.
+    """
+    if model_location:
+        npz_path = os.path.join(os.path.dirname(model_location), VERSIONED_NUMPY_FILE)
+    else:
+        versions = list_model_versions(GLOBAL_MODEL_KEY)
+        if not versions:
+            return None
+        npz_path = os.path.join(model_version_dir(GLOBAL_MODEL_KEY, versions[0]), VERSIONED_NUMPY_FILE)
+    if not os.path.exists(npz_path):
+        print(f"Global model file '{npz_path}' not found.")
+        return None
+    return _load_numpy_model(npz_path, os.path.getmtime(npz_path))
+
+
+def _stocks_with_status(status):
+    session = SessionLocal()
+    try:
+        return [row.ticker_symbol for row in
+                session.query(Stock.ticker_symbol).filter(Stock.status == status).order_by(Stock.ticker_symbol).all()]
+    finally:
+        session.close()
+
+
+def _stocks_without_model():
+    session = SessionLocal()
+    try:
+        rows = (
+            session.query(Stock.ticker_symbol)
+            .outerjoin(PredictionModel, PredictionModel.target_stock_id == Stock.stock_id)
+            .filter(PredictionModel.model_id == None)
+            .order_by(Stock.ticker_symbol)
+            .all()
+        )
+        return [row.ticker_symbol for row in rows]
+    finally:
+        session.close()
+
+
+def build_global_windows(series_by_ticker, input_dim=90):
+    """
+    Normalize every ticker's windows and stack them with their ticker ids (1..n in the given order).
+    Returns:
+        dict: train/val arrays (windows, ids, targets), the included tickers and their last dates.
+    """
+    parts = {"train": ([], [], []), "val": ([], [], [])}
+    tickers, last_dates, data_points = [], {}, {}
+    for ticker_symbol, closes in series_by_ticker.items():
+        X, Y = make_windows(closes.values, input_dim, OUTPUT_DIM)
+        if len(X) < 2:
+            print(f"Skipping {ticker_symbol}: not enough history for the global model.")
+            continue
+        tickers.append(ticker_symbol)
+        last_dates[ticker_symbol] = closes.index[-1]
+        windows, reference = normalize_windows(X[..., 0])
+        targets = Y / reference[:, np.newaxis] - 1.0
+        ids = np.full(len(X), len(tickers))
+        split = split_index(len(X), test_size=0.05)
+        data_points[ticker_symbol] = split
+        for name, rows in (("train", slice(0, split)), ("val", slice(split, None))):
+            parts[name][0].append(windows[rows])
+            parts[name][1].append(ids[rows])
+            parts[name][2].append(targets[rows])
+    if not tickers:
+        raise ValueError("No ticker has enough history to train the global model.")
+    arrays = {
+        name: tuple(np.concatenate(chunks).astype(np.float32 if i != 1 else np.int32) for i, chunks in enumerate(part))
+        for name, part in parts.items()
+    }
+    return {"arrays": arrays, "tickers": tickers, "lastDates": last_dates, "dataPoints": data_points}
+
+
+def train_global_model(tickers=None, input_dim=90, units=128, embedding_dim=8, batch=64, epochs=50,
+                       unknown_rate=UNKNOWN_TICKER_RATE):
+    """
+    Train the global model on the given tickers (default: all ACTIVE stocks) and publish it as a new version.
+    A fraction unknown_rate of training windows is shown with the unknown-ticker id so that embedding row 0
+    learns a generic series.
+    Returns:
+        dict: version, model_location, rmse (normalized validation RMSE), tickers, lastDates and dataPoints.
+    """
+    import tensorflow as tf
+    from ml_lib.lstm_model import GlobalLSTMWithDropout
+    from ml_lib.stock_predictor import getStockData
+
+    tickers = tickers or _stocks_with_status(AssetStatus.ACTIVE)
+    series_by_ticker = {}
+    for ticker_symbol in tickers:
+        stdata = getStockData(ticker_symbol)
+        if stdata is None or stdata[0].empty:
+            print(f"Skipping {ticker_symbol}: no price data.")
+            continue
+        series_by_ticker[ticker_symbol] = stdata[0]['Close']
+    data = build_global_windows(series_by_ticker, input_dim)
+    (X_train, ids_train, Y_train), (X_val, ids_val, Y_val) = data["arrays"]["train"], data["arrays"]["val"]
+    print(f"Training the global model on {len(X_train)} windows of {len(data['tickers'])} tickers.")
+
+    def hide_tickers(inputs, targets):
+        windows, ids = inputs
+        unknown = tf.random.uniform(tf.shape(ids)) < unknown_rate
+        return (windows, tf.where(unknown, tf.zeros_like(ids), ids)), targets
+
+    train_data = (
+        tf.data.Dataset.from_tensor_slices(((X_train[..., np.newaxis], ids_train), Y_train))
+        .shuffle(len(X_train), reshuffle_each_iteration=True)
+        .batch(batch)
+        .map(hide_tickers, num_parallel_calls=tf.data.AUTOTUNE)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+    val_data = tf.data.Dataset.from_tensor_slices(((X_val[..., np.newaxis], ids_val), Y_val)).batch(batch)
+
+    model = GlobalLSTMWithDropout(len(data["tickers"]), units, OUTPUT_DIM, embedding_dim)
+    model.compile(optimizer='adam', loss=tf.keras.losses.Huber())
+    early_stop = tf.keras.callbacks.EarlyStopping(monitor='val_loss',patience=5,restore_best_weights=True,verbose=1)
+    model.fit(train_data,epochs=epochs,validation_data=val_data,callbacks=[early_stop],verbose=1)
+
+    prediction = model.predict((X_val[..., np.newaxis], ids_val), verbose=0)
+    rmse = math.sqrt(mean_squared_error(Y_val.flatten(), prediction.flatten()))
+    print(f"Global model validation RMSE: {rmse:.5f}")
+
+    numpy_model = NumpyGlobalLSTM.from_keras(model, data["tickers"], input_dim)
+    published = publish_model_version(GLOBAL_MODEL_KEY, model, None, numpy_model=numpy_model)
+    gc_model_versions(GLOBAL_MODEL_KEY, published["version"])
+    return dict(published, rmse=rmse, tickers=data["tickers"], lastDates=data["lastDates"],
+                dataPoints=data["dataPoints"], timeStep=input_dim)
+
+
+def register_global_model(ticker_symbol, trained):
+    """Point a stock's PredictionModel at the global model (creating the row and the stock if needed)."""
+    return model_regiterer(
+        ticker_symbol,
+        time_step=trained["timeStep"],
+        rmse=trained["rmse"],
+        model_location=trained["model_location"],
+        scaler_location=None,
+        last_date=trained["lastDates"].get(ticker_symbol),
+        data_points=trained["dataPoints"].get(ticker_symbol, 0),
+        model_version=trained["version"],
+        model_type=GLOBAL_MODEL_TYPE,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the global multi-ticker forecasting model.")
+    parser.add_argument("--tickers", nargs="*", help="Train on these tickers instead of all ACTIVE stocks.")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--register", choices=["pending", "all", "none"], default="pending",
+                        help="pending: stocks without a model use the global one; all: every trained ticker does.")
+    args = parser.parse_args()
+
+    trained = train_global_model(args.tickers, batch=args.batch, epochs=args.epochs)
+    if args.register == "all":
+        to_register = trained["tickers"] + _stocks_without_model()
+    elif args.register == "pending":
+        to_register = _stocks_without_model()
+    else:
+        to_register = []
+    for ticker_symbol in to_register:
+        register_global_model(ticker_symbol, trained)
+    print(f"Published global model {trained['version']}; {len(to_register)} tickers now use it.")
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of single-window inference on a trained Keras model, before and after
+LSTMWithDropout.compile_inference:
+    python -m ml_lib.inference_benchmark --tickers AAPL --repeats 200
+    python -m ml_lib.inference_benchmark --xla     # also time the XLA-compiled graphs
+Each path is called once untimed first, then timed `repeats` times on the same window, whose length is
+the model's PredictionModel.time_step.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ml_lib.benchmark import latency_summary, active_time_steps, resolve_time_step, INPUT_DIM
+from ml_lib.model_registry import model_file_path
+from ml_lib.numpy_lstm import NumpyLSTM
+
+
+def time_calls(fn, repeats):
+    fn()
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - started)
+    return latency_summary(seconds)
+
+
+def benchmark_model(keras_file, repeats=200, n_iter=50, xla=False, seed=0, time_step=INPUT_DIM):
+    """
+    Returns:
+        dict: Latency percentiles per inference path, plus the number of graph traces after the timed calls.
+    """
+    import tensorflow as tf
+    import ml_lib.lstm_model  # registers LSTMWithDropout for deserialization
+
+    window = np.random.default_rng(seed).random((1, time_step, 1)).astype(np.float32)
+    model = tf.keras.models.load_model(keras_file)
+    results = {
+        "eagerCall": time_calls(lambda: model(window, training=False).numpy(), repeats),
+        "kerasPredict": time_calls(lambda: model.predict(window, verbose=0), repeats),
+        "eagerMcDropout": time_calls(lambda: model.mc_dropout(window, n_iter=n_iter, seed=seed), repeats),
+    }
+
+    started = time.perf_counter()
+    model.compile_inference(time_step)
+    results["compileMs"] = (time.perf_counter() - started) * 1000
+    results["graphCall"] = time_calls(lambda: model.serve(window).numpy(), repeats)
+    results["graphMcDropout"] = time_calls(lambda: model.mc_dropout(window, n_iter=n_iter, seed=seed), repeats)
+    results["tracingCount"] = model.tracing_count()
+    results["timeStep"] = time_step
+
+    if xla:
+        model.compile_inference(time_step, jit_compile=True)
+        results["xlaCall"] = time_calls(lambda: model.serve(window).numpy(), repeats)
+        results["xlaMcDropout"] = time_calls(lambda: model.mc_dropout(window, n_iter=n_iter, seed=seed), repeats)
+
+    numpy_model = NumpyLSTM.from_keras(model)
+    results["numpyMcDropout"] = time_calls(lambda: numpy_model.mc_dropout(window, n_iter=n_iter, seed=seed), repeats)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eager vs compiled inference latency of trained Keras models.")
+    parser.add_argument("--tickers", nargs="+", default=["AAPL"], help="Ticker symbols of the models to time.")
+    parser.add_argument("--repeats", type=int, default=200, help="Timed calls per inference path.")
+    parser.add_argument("--n-iter", type=int, default=50, help="Monte Carlo dropout samples per forecast.")
+    parser.add_argument("--xla", action="store_true", help="Also time the XLA-compiled graphs.")
+    args = parser.parse_args()
+
+    time_steps = active_time_steps(args.tickers)
+    report = {ticker: benchmark_model(model_file_path(ticker), args.repeats, args.n_iter, args.xla,
+                                      time_step=resolve_time_step(ticker, time_steps))
+              for ticker in args.tickers}
+    print(json.dumps(report, indent=2))
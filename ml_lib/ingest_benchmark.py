@@ -0,0 +1,125 @@
+"""
+Throughput benchmark of the stock_price_historical write paths on a synthetic daily OHLCV frame.
+
+Compares the legacy per-row ORM inserts (one StockPriceHistorical object per bar) with the
+bulk ingest_price_frame path (executemany, and COPY on PostgreSQL), reporting rows/sec. Each
+method writes into a scratch stock that is deleted afterwards; the bulk methods are run twice to
+check that re-ingesting the same bars leaves the row count unchanged:
+    python -m ml_lib.ingest_benchmark --rows 10000                  # the configured database
+    python -m ml_lib.ingest_benchmark --rows 10000 --database-url sqlite://
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from models.models import Stock, AssetStatus, StockPriceHistorical
+from ml_lib.price_history import ingest_price_frame, price_columns
+
+BENCHMARK_TICKER = "_INGEST_BENCH"
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER primary keys (for --database-url sqlite://)
+    return "INTEGER"
+
+
+def synthetic_frame(rows, seed=0):
+    """A yfinance-shaped frame of `rows` business days ending 2025-01-03."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-01-03", periods=rows, tz="America/New_York")
+    closes = 20 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "Open": closes * 0.995, "High": closes * 1.01, "Low": closes * 0.99, "Close": closes,
+        "Volume": rng.integers(1_000, 1_000_000, rows).astype(np.float64),
+    }, index=index)
+
+
+def orm_ingest(db, stock_id, frame):
+    """The per-row path get_data used before ingest_price_frame."""
+    for ts_index, row in frame.iterrows():
+        db.add(StockPriceHistorical(
+            stock_id=stock_id,
+            price_date=ts_index.to_pydatetime().replace(tzinfo=None, hour=0, minute=0),
+            open_price=float(row['Open']),
+            high_price=float(row['High']),
+            low_price=float(row['Low']),
+            close_price=float(row['Close']),
+            volume=int(row['Volume']),
+        ))
+    return len(frame)
+
+
+def _stored_rows(db, stock_id):
+    return db.query(StockPriceHistorical).filter(StockPriceHistorical.stock_id == stock_id).count()
+
+
+def run_ingest_benchmark(session_factory, rows=10000, chunk_size=None, methods=None):
+    """
+    Returns:
+        dict: Per method the rows written, seconds, rows/sec, and for bulk methods the row count after a re-run.
+    """
+    frame = synthetic_frame(rows)
+    db = session_factory()
+    dialect = db.get_bind().dialect
+    methods = methods or ["orm", "executemany"] + (["copy"] if dialect.driver == "psycopg2" else [])
+    results = {}
+    try:
+        stock = Stock(ticker_symbol=BENCHMARK_TICKER, asset_name="Ingest benchmark", status=AssetStatus.PENDING)
+        db.add(stock)
+        db.commit()
+        started = time.perf_counter()
+        price_columns(stock.stock_id, frame)
+        results["columnarConversionMs"] = (time.perf_counter() - started) * 1000
+
+        for method in methods:
+            db.query(StockPriceHistorical).filter(StockPriceHistorical.stock_id == stock.stock_id).delete()
+            db.commit()
+            started = time.perf_counter()
+            if method == "orm":
+                written = orm_ingest(db, stock.stock_id, frame)
+            else:
+                written = ingest_price_frame(db, stock.stock_id, frame, chunk_size, method)
+            db.commit()
+            seconds = time.perf_counter() - started
+            result = {"rows": written, "seconds": seconds, "rowsPerSecond": written / seconds}
+            if method != "orm":
+                ingest_price_frame(db, stock.stock_id, frame, chunk_size, method)
+                db.commit()
+                result["rowsAfterRerun"] = _stored_rows(db, stock.stock_id)
+            results[method] = result
+            print(f"{method}: {written} rows in {seconds:.2f}s ({written / seconds:,.0f} rows/s)")
+    finally:
+        db.rollback()
+        db.query(StockPriceHistorical).filter(
+            StockPriceHistorical.stock_id.in_(db.query(Stock.stock_id).filter(Stock.ticker_symbol == BENCHMARK_TICKER))
+        ).delete(synchronize_session=False)
+        db.query(Stock).filter(Stock.ticker_symbol == BENCHMARK_TICKER).delete()
+        db.commit()
+        db.close()
+    return {"dialect": f"{dialect.name}+{dialect.driver}", "rows": rows, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rows/sec of the stock_price_historical write paths.")
+    parser.add_argument("--rows", type=int, default=10000, help="Synthetic daily bars to write (~40 years = 10k).")
+    parser.add_argument("--chunk-size", type=int, help="Rows per statement of the bulk path.")
+    parser.add_argument("--methods", nargs="+", choices=["orm", "executemany", "copy"])
+    parser.add_argument("--database-url", help="Benchmark against this database instead of the configured one; "
+                                               "tables are created if missing.")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+        Stock.__table__.create(engine, checkfirst=True)
+        StockPriceHistorical.__table__.create(engine, checkfirst=True)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    else:
+        from db.dbConnect import SessionLocal as session_factory
+    print(json.dumps(run_ingest_benchmark(session_factory, args.rows, args.chunk_size, args.methods), indent=2))
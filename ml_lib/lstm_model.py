@@ -0,0 +1,136 @@
+import numpy as np
+import tensorflow as tf
+
+
+@tf.keras.utils.register_keras_serializable()
+class LSTMWithDropout(tf.keras.Model):
+    def __init__(self, units=128, output_dim=7, **kwargs):
+        super().__init__(**kwargs)
+        self.units = units
+        self.output_dim = output_dim
+        self.lstm = tf.keras.layers.LSTM(units)
+        self.dropout = tf.keras.layers.Dropout(0.2)
+        self.dense = tf.keras.layers.Dense(output_dim)
+        self._serve_fn = None
+        self._features_fn = None
+        self._head_fn = None
+
+    def call(self, inputs, training=False):
+        x = self.lstm(inputs)
+        x = self.dropout(x, training=training)
+        return self.dense(x)
+
+    def compile_inference(self, time_step=None, jit_compile=False):
+        """
+        Wrap the inference paths in tf.functions with a fixed input signature and trace them once.
+        The batch dimension is left open, so later calls with any batch size reuse the same graph
+        instead of retracing; time_step=None also accepts any window length.
+        Args:
+            time_step (int): Input window length, or None.
+            jit_compile (bool): Compile the graphs with XLA.
+        """
+        window = tf.TensorSpec([None, time_step, 1], tf.float32)
+        features = tf.TensorSpec([None, self.units], tf.float32)
+        self._serve_fn = tf.function(lambda x: self(x, training=False), input_signature=[window],
+                                     jit_compile=jit_compile)
+        self._features_fn = tf.function(lambda x: self.lstm(x), input_signature=[window], jit_compile=jit_compile)
+        self._head_fn = tf.function(lambda x: self.dense(x), input_signature=[features], jit_compile=jit_compile)
+
+        warm_up = tf.zeros([1, time_step or 90, 1], tf.float32)
+        self._serve_fn(warm_up)
+        self._head_fn(self._features_fn(warm_up))
+        return self
+
+    def tracing_count(self):
+        """Number of graphs traced by the compiled inference functions (3 after warm-up, unless retraced)."""
+        functions = (self._serve_fn, self._features_fn, self._head_fn)
+        return sum(fn.experimental_get_tracing_count() for fn in functions if fn is not None)
+
+    def serve(self, inputs):
+        """Deterministic forecast; a single graph call once compile_inference has run."""
+        inputs = tf.convert_to_tensor(inputs, tf.float32)
+        if self._serve_fn is None:
+            return self(inputs, training=False)
+        return self._serve_fn(inputs)
+
+    def mc_dropout(self, inputs, n_iter=50, seed=None):
+        """
+        Draw n_iter Monte Carlo dropout forecasts for a single input window.
+        Dropout only sits between the LSTM and the Dense head and the LSTM itself is
+        deterministic, so the LSTM runs once and the n_iter masks are sampled on its output.
+        """
+        inputs = tf.convert_to_tensor(inputs, tf.float32)
+        features = (self._features_fn or self.lstm)(inputs).numpy()
+        rate = self.dropout.rate
+        rng = np.random.default_rng(seed)
+        keep = rng.random((n_iter, features.shape[-1])) >= rate
+        dropped = np.repeat(features, n_iter, axis=0) * keep / (1.0 - rate)
+        return (self._head_fn or self.dense)(dropped.astype(np.float32)).numpy()
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({
+            "units": self.units,
+            "output_dim": self.output_dim
+        })
+        return config
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**config)
+
+
+@tf.keras.utils.register_keras_serializable()
+class GlobalLSTMWithDropout(tf.keras.Model):
+    """
+    LSTMWithDropout shared by many tickers: a learned ticker embedding is appended to every
+    time step of the (per-window normalized) input. Embedding row 0 stands for an unseen ticker.
+    Inputs are (windows, ticker_ids) with shapes (batch, time_step, 1) and (batch,).
+    """
+
+    def __init__(self, num_tickers, units=128, output_dim=7, embedding_dim=8, **kwargs):
+        super().__init__(**kwargs)
+        self.num_tickers = num_tickers
+        self.units = units
+        self.output_dim = output_dim
+        self.embedding_dim = embedding_dim
+        self.embedding = tf.keras.layers.Embedding(num_tickers + 1, embedding_dim)
+        self.lstm = tf.keras.layers.LSTM(units)
+        self.dropout = tf.keras.layers.Dropout(0.2)
+        self.dense = tf.keras.layers.Dense(output_dim)
+
+    def call(self, inputs, training=False):
+        windows, ticker_ids = inputs
+        embedded = self.embedding(ticker_ids)
+        embedded = tf.repeat(embedded[:, tf.newaxis, :], tf.shape(windows)[1], axis=1)
+        x = self.lstm(tf.concat([tf.cast(windows, embedded.dtype), embedded], axis=-1))
+        x = self.dropout(x, training=training)
+        return self.dense(x)
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({
+            "num_tickers": self.num_tickers,
+            "units": self.units,
+            "output_dim": self.output_dim,
+            "embedding_dim": self.embedding_dim
+        })
+        return config
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**config)
+
+
+def inference_function(model, time_step=None, jit_compile=False):
+    """
+    Return a warmed, fixed-signature tf.function of a Keras forecasting model's deterministic forward pass.
+    LSTMWithDropout models use compile_inference; other models (e.g. the Sequential ones trainerV2 saves)
+    are wrapped the same way.
+    """
+    if hasattr(model, "compile_inference"):
+        return model.compile_inference(time_step, jit_compile).serve
+    fn = tf.function(lambda x: model(x, training=False),
+                     input_signature=[tf.TensorSpec([None, time_step, 1], tf.float32)], jit_compile=jit_compile)
+    fn(tf.zeros([1, time_step or 90, 1], tf.float32))
+    return fn
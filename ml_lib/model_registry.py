@@ -0,0 +1,232 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ml_lib.numpy_lstm import load_numpy_model
+
+MODELS_FOLDER = os.path.join("ml_lib", "trainedModels")
+VERSIONED_MODEL_FILE = "model.keras"
+VERSIONED_NUMPY_FILE = "model.npz"
+VERSIONED_SCALER_FILE = "scaler.pkl"
+# Weight precision served from .npz exports: float32, float16 or int8 (see ml_lib.quantization)
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "float32")
+# XLA-compile the inference graphs of Keras models (see LSTMWithDropout.compile_inference)
+INFERENCE_XLA = os.getenv("INFERENCE_XLA", "0") == "1"
+
+
+def model_file_path(ticker_symbol):
+    return os.path.join(MODELS_FOLDER, f"{ticker_symbol}_trained_model.keras")
+
+
+def numpy_model_file_path(ticker_symbol):
+    return os.path.join(MODELS_FOLDER, f"{ticker_symbol}_lstm.npz")
+
+
+def scaler_file_path(ticker_symbol):
+    return os.path.join(MODELS_FOLDER, f"{ticker_symbol}_scaler.pkl")
+
+
+def quantized_model_file_path(numpy_file, precision):
+    """e.g. model.npz -> model.int8.npz, next to the full-precision export."""
+    return f"{os.path.splitext(numpy_file)[0]}.{precision}.npz"
+
+
+def serving_precision():
+    return MODEL_PRECISION
+
+
+def model_versions_dir(ticker_symbol):
+    return os.path.join(MODELS_FOLDER, ticker_symbol)
+
+
+def model_version_dir(ticker_symbol, version):
+    return os.path.join(model_versions_dir(ticker_symbol), version)
+
+
+def is_versioned_location(model_location):
+    return bool(model_location) and os.path.basename(model_location) == VERSIONED_MODEL_FILE
+
+
+def serving_model_file_path(ticker_symbol, model_location=None):
+    """
+    Prefer the exported NumPy artifact so serving does not need TensorFlow, unless the Keras file is newer.
+    With MODEL_PRECISION set to float16 or int8 the matching quantized export is served when present.
+    A versioned model_location (a content-hashed directory written by ml_lib.model_store) is used as is;
+    otherwise the legacy per-ticker files in MODELS_FOLDER are served.
+    """
+    if is_versioned_location(model_location):
+        keras_file = model_location
+        numpy_file = os.path.join(os.path.dirname(model_location), VERSIONED_NUMPY_FILE)
+    else:
+        keras_file = model_file_path(ticker_symbol)
+        numpy_file = numpy_model_file_path(ticker_symbol)
+    if serving_precision() != "float32":
+        quantized_file = quantized_model_file_path(numpy_file, serving_precision())
+        if os.path.exists(quantized_file):
+            numpy_file = quantized_file
+    if os.path.exists(numpy_file) and (
+            not os.path.exists(keras_file) or os.path.getmtime(numpy_file) >= os.path.getmtime(keras_file)):
+        return numpy_file
+    return keras_file
+
+
+def artifact_paths(ticker_symbol, model_location=None, scaler_location=None):
+    """Return the (model_file, scaler_file) pair to serve for a ticker's active model."""
+    model_file = serving_model_file_path(ticker_symbol, model_location)
+    if is_versioned_location(model_location) and scaler_location:
+        return model_file, scaler_location
+    return model_file, scaler_file_path(ticker_symbol)
+
+
+def load_model_artifacts(model_file, scaler_file):
+    """
+    Load a trained model and its fitted MinMaxScaler from disk.
+    The NumPy engine is used for .npz exports, full precision or quantized;
+    Keras (and TensorFlow) is only imported otherwise; Keras models come back with their
+    inference graphs compiled and warmed.
+    Args:
+        model_file (str): Path of the .npz or .keras model.
+        scaler_file (str): Path of the pickled scaler.
+    Returns:
+        tuple: (model, scaler)
+    """
+    if model_file.endswith(".npz"):
+        model = load_numpy_model(model_file)
+    else:
+        import tensorflow as tf
+        import ml_lib.lstm_model  # registers LSTMWithDropout for deserialization
+
+        model = tf.keras.models.load_model(model_file)
+        if hasattr(model, "compile_inference"):
+            # Trace the fixed-signature inference graphs once here rather than on the first request
+            model.compile_inference(jit_compile=INFERENCE_XLA)
+    with open(scaler_file, "rb") as f:
+        scaler = pickle.load(f)
+    return model, scaler
+
+
+def resident_bytes(model, scaler):
+    """Approximate memory held by a model's weights and its scaler's arrays."""
+    total = 0
+    for weight in getattr(model, "weights", []):
+        total += int(np.prod(weight.shape)) * np.dtype(weight.dtype).itemsize
+    for value in vars(scaler).values():
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+    return total
+
+
+class ModelRegistry:
+    """
+    In-process LRU cache of loaded prediction models and scalers.
+
+    Each ticker holds at most one entry, tagged with a version made of the
+    PredictionModel.latest_modified_time, the artifact paths and their mtimes.
+    A lookup with a different version (i.e. after a retrain flipped the DB row to
+    a new artifact directory) reloads the entry without a restart.
+    """
+
+    def __init__(self, max_size=16, loader=load_model_artifacts):
+        self.max_size = max_size
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _version(self, ticker_symbol, modified_time, model_location=None, scaler_location=None):
+        model_file, scaler_file = artifact_paths(ticker_symbol, model_location, scaler_location)
+        if not os.path.exists(model_file):
+            print(f"Model file for {ticker_symbol} not found.")
+            return None
+        if not os.path.exists(scaler_file):
+            print(f"Scaler file for {ticker_symbol} not found.")
+            return None
+        return (
+            str(modified_time) if modified_time is not None else None,
+            model_file,
+            scaler_file,
+            os.path.getmtime(model_file),
+            os.path.getmtime(scaler_file),
+        )
+
+    def get(self, ticker_symbol, modified_time=None, model_location=None, scaler_location=None):
+        """
+        Return the cached (model, scaler) pair for a ticker, loading it on a miss.
+        Args:
+            ticker_symbol (str): The stock ticker symbol.
+            modified_time: PredictionModel.latest_modified_time of the active model.
+            model_location (str): PredictionModel.model_location; a new versioned path swaps the entry.
+            scaler_location (str): PredictionModel.scaler_location.
+        Returns:
+            tuple: (model, scaler), or None if the artifacts are missing.
+        """
+        version = self._version(ticker_symbol, modified_time, model_location, scaler_location)
+        if version is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(ticker_symbol)
+            if entry is not None and entry["version"] == version:
+                self._entries.move_to_end(ticker_symbol)
+                self.hits += 1
+                return entry["model"], entry["scaler"]
+            self.misses += 1
+            if entry is not None:
+                del self._entries[ticker_symbol]
+                self.invalidations += 1
+
+        model, scaler = self.loader(version[1], version[2])
+
+        with self._lock:
+            self._entries[ticker_symbol] = {
+                "version": version,
+                "model": model,
+                "scaler": scaler,
+                "resident_bytes": resident_bytes(model, scaler),
+            }
+            self._entries.move_to_end(ticker_symbol)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return model, scaler
+
+    def invalidate(self, ticker_symbol=None):
+        """Drop one ticker's entry, or every entry when no ticker is given."""
+        with self._lock:
+            if ticker_symbol is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(ticker_symbol, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            models = [
+                {
+                    "ticker": ticker,
+                    "version": entry["version"][0],
+                    "residentBytes": entry["resident_bytes"],
+                }
+                for ticker, entry in self._entries.items()
+            ]
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hitRate": self.hits / lookups if lookups else None,
+                "residentBytes": sum(m["residentBytes"] for m in models),
+                "models": models,
+            }
+
+
+model_registry = ModelRegistry(max_size=int(os.getenv("MODEL_CACHE_SIZE", "16")))
@@ -0,0 +1,109 @@
+"""
+Versioned, content-addressed storage for trained model artifacts.
+
+Every training publishes its model, NumPy export and scaler into a new directory
+    ml_lib/trainedModels/<TICKER>/<content hash>/{model.keras, model.npz, scaler.pkl}
+(plus model.<precision>.npz when MODEL_PRECISION selects a reduced-precision export).
+The files are written to a temporary directory first and renamed into place, so
+readers never see a partially written version. Once a version is published the
+PredictionModel row is pointed at it in a single commit; serving workers pick up
+the new model_location on their next lookup. Old versions are removed by
+gc_model_versions, keeping the newest MODEL_VERSIONS_KEPT.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import uuid
+
+from ml_lib.model_registry import (
+    VERSIONED_MODEL_FILE, VERSIONED_NUMPY_FILE, VERSIONED_SCALER_FILE, model_version_dir, model_versions_dir,
+    quantized_model_file_path, serving_precision,
+)
+from ml_lib.numpy_lstm import NumpyLSTM, QuantizedNumpyLSTM
+
+MODEL_VERSIONS_KEPT = int(os.getenv("MODEL_VERSIONS_KEPT", "3"))
+HASH_LENGTH = 16
+
+
+def content_hash(numpy_model, scaler):
+    """Hash of the model weights and the pickled scaler; identical trainings map to the same version."""
+    digest = hashlib.sha256()
+    for weight in numpy_model.weights:
+        digest.update(weight.tobytes())
+    digest.update(pickle.dumps(scaler))
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def publish_model_version(ticker_symbol, model, scaler, numpy_model=None):
+    """
+    Write a trained Keras model, its NumPy export and its scaler as a new immutable version.
+    numpy_model defaults to NumpyLSTM.from_keras(model); models that need no scaler pass scaler=None.
+    Returns:
+        dict: version, model_location and scaler_location to store on the PredictionModel row.
+    """
+    numpy_model = numpy_model or NumpyLSTM.from_keras(model)
+    version = content_hash(numpy_model, scaler)
+    final_dir = model_version_dir(ticker_symbol, version)
+    published = {
+        "version": version,
+        "model_location": os.path.join(final_dir, VERSIONED_MODEL_FILE),
+        "scaler_location": os.path.join(final_dir, VERSIONED_SCALER_FILE) if scaler is not None else None,
+    }
+    if os.path.isdir(final_dir):
+        os.utime(final_dir)  # now the newest version for retention purposes
+        print(f"Model version {version} of {ticker_symbol} already published.")
+        return published
+
+    ticker_dir = model_versions_dir(ticker_symbol)
+    os.makedirs(ticker_dir, exist_ok=True)
+    staging_dir = os.path.join(ticker_dir, f".staging-{uuid.uuid4().hex}")
+    os.makedirs(staging_dir)
+    try:
+        model.save(os.path.join(staging_dir, VERSIONED_MODEL_FILE))
+        numpy_model.save(os.path.join(staging_dir, VERSIONED_NUMPY_FILE))
+        precision = serving_precision()
+        if precision != "float32" and type(numpy_model) is NumpyLSTM:
+            QuantizedNumpyLSTM.from_model(numpy_model, precision).save(
+                os.path.join(staging_dir, quantized_model_file_path(VERSIONED_NUMPY_FILE, precision)))
+        if scaler is not None:
+            with open(os.path.join(staging_dir, VERSIONED_SCALER_FILE), "wb") as f:
+                pickle.dump(scaler, f)
+        os.rename(staging_dir, final_dir)
+    except OSError:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if not os.path.isdir(final_dir):
+            raise
+        # Another process published the same content first
+    print(f"Published model version {version} of {ticker_symbol} to '{final_dir}'")
+    return published
+
+
+def list_model_versions(ticker_symbol):
+    """Published versions of a ticker, newest first."""
+    ticker_dir = model_versions_dir(ticker_symbol)
+    if not os.path.isdir(ticker_dir):
+        return []
+    versions = [
+        name for name in os.listdir(ticker_dir)
+        if not name.startswith(".") and os.path.isdir(os.path.join(ticker_dir, name))
+    ]
+    return sorted(versions, key=lambda name: os.path.getmtime(os.path.join(ticker_dir, name)), reverse=True)
+
+
+def gc_model_versions(ticker_symbol, active_version, keep=MODEL_VERSIONS_KEPT):
+    """
+    Delete all but the newest `keep` versions of a ticker. The active version is never deleted,
+    and the retained older ones let in-flight requests finish on the model they started with.
+    Returns:
+        list: The removed versions.
+    """
+    removed = []
+    for version in list_model_versions(ticker_symbol)[keep:]:
+        if version == active_version:
+            continue
+        shutil.rmtree(model_version_dir(ticker_symbol, version), ignore_errors=True)
+        removed.append(version)
+    if removed:
+        print(f"Removed {len(removed)} old model versions of {ticker_symbol}.")
+    return removed
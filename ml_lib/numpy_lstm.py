@@ -0,0 +1,308 @@
+import argparse
+import os
+import glob
+
+import numpy as np
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class NumpyLSTM:
+    """
+    Pure-NumPy forward pass of LSTMWithDropout: a single LSTM layer followed by dropout and a Dense head.
+    Gate layout and activations follow Keras' LSTM (i, f, c, o; sigmoid / tanh).
+    """
+
+    def __init__(self, kernel, recurrent_kernel, bias, dense_kernel, dense_bias, dropout_rate=0.2):
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.bias = bias
+        self.dense_kernel = dense_kernel
+        self.dense_bias = dense_bias
+        self.dropout_rate = float(dropout_rate)
+        self.units = recurrent_kernel.shape[0]
+        self.output_dim = dense_kernel.shape[1]
+
+    @property
+    def weights(self):
+        return [self.kernel, self.recurrent_kernel, self.bias, self.dense_kernel, self.dense_bias]
+
+    @classmethod
+    def from_keras(cls, model):
+        kernel, recurrent_kernel, bias = model.lstm.get_weights()
+        dense_kernel, dense_bias = model.dense.get_weights()
+        return cls(kernel, recurrent_kernel, bias, dense_kernel, dense_bias, model.dropout.rate)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["kernel"],
+                data["recurrent_kernel"],
+                data["bias"],
+                data["dense_kernel"],
+                data["dense_bias"],
+                data["dropout_rate"],
+            )
+
+    def save(self, path):
+        np.savez(
+            path,
+            kernel=self.kernel,
+            recurrent_kernel=self.recurrent_kernel,
+            bias=self.bias,
+            dense_kernel=self.dense_kernel,
+            dense_bias=self.dense_bias,
+            dropout_rate=np.float32(self.dropout_rate),
+        )
+
+    def features(self, inputs):
+        """Run the LSTM over (batch, time_step, features) inputs and return the last hidden state."""
+        inputs = np.asarray(inputs, dtype=np.float32)
+        batch = inputs.shape[0]
+        # Input projections for every step at once; only the recurrent part stays in the loop
+        projected = inputs @ self.kernel + self.bias
+        recurrent_kernel = self.recurrent_kernel
+        h = np.zeros((batch, self.units), dtype=np.float32)
+        c = np.zeros((batch, self.units), dtype=np.float32)
+        u = self.units
+        for t in range(inputs.shape[1]):
+            z = projected[:, t, :] + h @ recurrent_kernel
+            i = _sigmoid(z[:, :u])
+            f = _sigmoid(z[:, u:2 * u])
+            g = np.tanh(z[:, 2 * u:3 * u])
+            o = _sigmoid(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+        return h
+
+    def head(self, features):
+        return features @ self.dense_kernel + self.dense_bias
+
+    def __call__(self, inputs, training=False, rng=None):
+        features = self.features(inputs)
+        if training:
+            rng = rng or np.random.default_rng()
+            keep = rng.random(features.shape) >= self.dropout_rate
+            features = features * keep / (1.0 - self.dropout_rate)
+        return self.head(features)
+
+    def mc_dropout(self, inputs, n_iter=50, seed=None):
+        """Draw n_iter Monte Carlo dropout forecasts for a single input window."""
+        features = self.features(inputs)
+        rng = np.random.default_rng(seed)
+        keep = rng.random((n_iter, features.shape[-1])) >= self.dropout_rate
+        dropped = np.repeat(features, n_iter, axis=0) * keep / (1.0 - self.dropout_rate)
+        return self.head(dropped.astype(np.float32))
+
+
+PRECISIONS = ("float32", "float16", "int8")
+WEIGHT_NAMES = ("kernel", "recurrent_kernel", "bias", "dense_kernel", "dense_bias")
+
+
+def quantize_weight(weight, precision):
+    """
+    Store a float32 tensor in reduced precision.
+    float16 is a plain cast; int8 is symmetric quantization with one scale per tensor.
+    Returns:
+        tuple: (stored array, scale) such that weight ~= stored * scale.
+    """
+    weight = np.asarray(weight, dtype=np.float32)
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}.")
+    if precision == "int8":
+        peak = float(np.abs(weight).max()) if weight.size else 0.0
+        scale = np.float32(peak / 127.0 if peak > 0 else 1.0)
+        return np.clip(np.rint(weight / scale), -127, 127).astype(np.int8), scale
+    return weight.astype(precision), np.float32(1.0)
+
+
+def dequantize_weight(stored, scale):
+    if stored.dtype == np.int8:
+        return stored.astype(np.float32) * np.float32(scale)
+    return stored.astype(np.float32)
+
+
+class QuantizedNumpyLSTM(NumpyLSTM):
+    """
+    NumpyLSTM whose weights stay resident as float16 or int8 (one scale per tensor) and are
+    dequantized to float32 at the start of every forward pass.
+    """
+
+    def __init__(self, stored, scales, precision, dropout_rate=0.2):
+        self.stored = stored
+        self.scales = scales
+        self.precision = str(precision)
+        self.dropout_rate = float(dropout_rate)
+        self.units = stored["recurrent_kernel"].shape[0]
+        self.output_dim = stored["dense_kernel"].shape[1]
+
+    kernel = property(lambda self: self._dequantized("kernel"))
+    recurrent_kernel = property(lambda self: self._dequantized("recurrent_kernel"))
+    bias = property(lambda self: self._dequantized("bias"))
+    dense_kernel = property(lambda self: self._dequantized("dense_kernel"))
+    dense_bias = property(lambda self: self._dequantized("dense_bias"))
+
+    def _dequantized(self, name):
+        return dequantize_weight(self.stored[name], self.scales[name])
+
+    @property
+    def weights(self):
+        return [self.stored[name] for name in WEIGHT_NAMES]
+
+    @classmethod
+    def from_model(cls, model, precision):
+        """Quantize the weights of a float32 NumpyLSTM."""
+        stored, scales = {}, {}
+        for name in WEIGHT_NAMES:
+            stored[name], scales[name] = quantize_weight(getattr(model, name), precision)
+        return cls(stored, scales, precision, model.dropout_rate)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            stored = {name: data[name] for name in WEIGHT_NAMES}
+            scales = {name: data[f"{name}_scale"] for name in WEIGHT_NAMES}
+            return cls(stored, scales, data["precision"], data["dropout_rate"])
+
+    def save(self, path):
+        arrays = dict(self.stored)
+        arrays.update({f"{name}_scale": np.float32(scale) for name, scale in self.scales.items()})
+        np.savez(path, precision=np.array(self.precision), dropout_rate=np.float32(self.dropout_rate), **arrays)
+
+
+def load_numpy_model(path):
+    """Load a .npz export, full precision or quantized."""
+    with np.load(path) as data:
+        quantized = "precision" in data.files
+    return QuantizedNumpyLSTM.load(path) if quantized else NumpyLSTM.load(path)
+
+
+def normalize_windows(windows):
+    """
+    Per-series normalization used by the global model: each window is expressed relative to its last price.
+    Args:
+        windows (np.ndarray): Raw prices of shape (batch, time_step).
+    Returns:
+        tuple: (normalized windows, reference prices of shape (batch,))
+    """
+    windows = np.asarray(windows, dtype=np.float64)
+    reference = windows[:, -1]
+    return windows / reference[:, np.newaxis] - 1.0, reference
+
+
+class NumpyGlobalLSTM(NumpyLSTM):
+    """
+    Pure-NumPy forward pass of GlobalLSTMWithDropout. Tickers map to embedding rows 1..n in training order;
+    unknown tickers use row 0, so any stock with price history can be forecast.
+    """
+
+    def __init__(self, kernel, recurrent_kernel, bias, dense_kernel, dense_bias, embeddings, tickers,
+                 dropout_rate=0.2, time_step=90):
+        super().__init__(kernel, recurrent_kernel, bias, dense_kernel, dense_bias, dropout_rate)
+        self.embeddings = embeddings
+        self.tickers = [str(t) for t in tickers]
+        self.ticker_index = {ticker: i + 1 for i, ticker in enumerate(self.tickers)}
+        self.time_step = int(time_step)
+
+    @property
+    def weights(self):
+        return super().weights + [self.embeddings]
+
+    @classmethod
+    def from_keras(cls, model, tickers, time_step=90):
+        kernel, recurrent_kernel, bias = model.lstm.get_weights()
+        dense_kernel, dense_bias = model.dense.get_weights()
+        (embeddings,) = model.embedding.get_weights()
+        return cls(kernel, recurrent_kernel, bias, dense_kernel, dense_bias, embeddings, tickers,
+                   model.dropout.rate, time_step)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["kernel"],
+                data["recurrent_kernel"],
+                data["bias"],
+                data["dense_kernel"],
+                data["dense_bias"],
+                data["embeddings"],
+                data["tickers"],
+                data["dropout_rate"],
+                data["time_step"],
+            )
+
+    def save(self, path):
+        np.savez(
+            path,
+            kernel=self.kernel,
+            recurrent_kernel=self.recurrent_kernel,
+            bias=self.bias,
+            dense_kernel=self.dense_kernel,
+            dense_bias=self.dense_bias,
+            embeddings=self.embeddings,
+            tickers=np.array(self.tickers),
+            dropout_rate=np.float32(self.dropout_rate),
+            time_step=np.int32(self.time_step),
+        )
+
+    def ticker_ids(self, tickers):
+        return np.array([self.ticker_index.get(ticker, 0) for ticker in tickers])
+
+    def features(self, inputs, ticker_ids):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        embedded = self.embeddings[ticker_ids][:, np.newaxis, :]
+        embedded = np.repeat(embedded, inputs.shape[1], axis=1)
+        return super().features(np.concatenate([inputs, embedded], axis=-1))
+
+    def __call__(self, inputs, ticker_ids, training=False, rng=None):
+        features = self.features(inputs, ticker_ids)
+        if training:
+            rng = rng or np.random.default_rng()
+            keep = rng.random(features.shape) >= self.dropout_rate
+            features = features * keep / (1.0 - self.dropout_rate)
+        return self.head(features)
+
+    def forecast(self, windows, tickers, n_iter=50, seed=None):
+        """
+        Forecast several tickers in one forward pass, with Monte Carlo dropout uncertainty.
+        Args:
+            windows (np.ndarray): Raw prices of shape (batch, time_step), one row per ticker.
+            tickers (list[str]): Ticker symbol of each row.
+        Returns:
+            tuple: (mean, std) price forecasts of shape (batch, output_dim).
+        """
+        normalized, reference = normalize_windows(windows)
+        features = self.features(normalized[..., np.newaxis], self.ticker_ids(tickers))
+        rng = np.random.default_rng(seed)
+        keep = rng.random((n_iter,) + features.shape) >= self.dropout_rate
+        samples = self.head((features * keep / (1.0 - self.dropout_rate)).astype(np.float32))
+        prices = (samples + 1.0) * reference[np.newaxis, :, np.newaxis]
+        return prices.mean(axis=0), prices.std(axis=0)
+
+
+def export_keras_model(keras_path, npz_path):
+    """Export the weights of a saved LSTMWithDropout .keras model to a .npz artifact."""
+    import tensorflow as tf
+    import ml_lib.lstm_model  # registers LSTMWithDropout for deserialization
+
+    model = tf.keras.models.load_model(keras_path)
+    NumpyLSTM.from_keras(model).save(npz_path)
+    return npz_path
+
+
+if __name__ == "__main__":
+    from ml_lib.model_registry import MODELS_FOLDER, numpy_model_file_path
+
+    parser = argparse.ArgumentParser(description="Export trained Keras LSTM models to NumPy .npz artifacts.")
+    parser.add_argument("--tickers", nargs="*", help="Only export these ticker symbols.")
+    args = parser.parse_args()
+
+    suffix = "_trained_model.keras"
+    for keras_path in sorted(glob.glob(os.path.join(MODELS_FOLDER, f"*{suffix}"))):
+        ticker = os.path.basename(keras_path)[:-len(suffix)]
+        if args.tickers and ticker not in args.tickers:
+            continue
+        print(f"Exported {export_keras_model(keras_path, numpy_model_file_path(ticker))}")
@@ -0,0 +1,207 @@
+"""
+Benchmark of the stock_price_historical layouts on a synthetic PostgreSQL dataset (10M rows by default).
+
+Builds the same bars twice in a scratch schema: once in the current layout (one heap with the unique
+(stock_id, price_date) B-tree) and once as stock_price_historical_partitioning.sql lays it out (yearly
+range partitions with the unique key and a BRIN index on price_date). Reports for each layout: bulk load
+and index build time, upsert throughput of a daily sync (every stock, --append-days new bars), on-disk
+sizes, and latency percentiles of per-stock tail and range reads and of a one-week read across all stocks:
+    python -m ml_lib.partition_benchmark
+    python -m ml_lib.partition_benchmark --stocks 500 --days 2000 --queries 500 --database-url postgresql://...
+The scratch schema is dropped afterwards unless --keep is given.
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from ml_lib.benchmark import latency_summary
+
+SCHEMA = "partition_bench"
+LAYOUTS = ("plain", "partitioned")
+END_DATE = date(2025, 1, 3)
+COLUMNS = """
+    id BIGINT NOT NULL DEFAULT nextval('{schema}.{table}_id_seq'),
+    stock_id INTEGER NOT NULL,
+    price_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    open_price NUMERIC(19, 4),
+    high_price NUMERIC(19, 4),
+    low_price NUMERIC(19, 6),
+    close_price NUMERIC(19, 6),
+    volume BIGINT,
+    fetched_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+"""
+# Deterministic pseudo prices so both layouts get identical rows
+BARS_SELECT = """
+    SELECT s, d, p * 0.995, p * 1.01, p * 0.99, p, (1000 + (s * 7919 + n) % 1000000)::BIGINT
+    FROM generate_series(1, :stocks) AS s
+    CROSS JOIN generate_series(CAST(:start AS TIMESTAMP), CAST(:end AS TIMESTAMP), INTERVAL '1 day') AS d
+    CROSS JOIN LATERAL (SELECT CAST(d AS DATE) - DATE '2000-01-01' AS n) AS day_number
+    CROSS JOIN LATERAL (SELECT 20 + (s % 200) + 5 * sin(n / 30.0 + s) AS p) AS price
+    WHERE EXTRACT(ISODOW FROM d) < 6
+"""
+INSERT = ("INSERT INTO {schema}.{table} (stock_id, price_date, open_price, high_price, low_price, close_price, "
+          "volume) ")
+QUERIES = {
+    "tail": "SELECT price_date, close_price FROM {schema}.{table} WHERE stock_id = :stock_id "
+            "ORDER BY price_date DESC LIMIT 90",
+    "range": "SELECT price_date, close_price FROM {schema}.{table} WHERE stock_id = :stock_id "
+             "AND price_date BETWEEN :start AND :end ORDER BY price_date",
+    "crossSection": "SELECT stock_id, close_price FROM {schema}.{table} "
+                    "WHERE price_date >= :start AND price_date < CAST(:start AS TIMESTAMP) + INTERVAL '7 days'",
+}
+
+
+def business_days_start(days, end=END_DATE):
+    """The date `days` business days before end (inclusive)."""
+    start = end
+    counted = 1 if end.weekday() < 5 else 0
+    while counted < days:
+        start -= timedelta(days=1)
+        counted += start.weekday() < 5
+    return start
+
+
+def create_layout(conn, layout, start, end):
+    table = layout
+    conn.execute(text(f"CREATE SEQUENCE {SCHEMA}.{table}_id_seq"))
+    columns = COLUMNS.format(schema=SCHEMA, table=table)
+    if layout == "plain":
+        conn.execute(text(f"CREATE TABLE {SCHEMA}.{table} ({columns}, PRIMARY KEY (id))"))
+        return
+    conn.execute(text(
+        f"CREATE TABLE {SCHEMA}.{table} ({columns}, PRIMARY KEY (id, price_date)) PARTITION BY RANGE (price_date)"
+    ))
+    for year in range(start.year, end.year + 2):
+        conn.execute(text(
+            f"CREATE TABLE {SCHEMA}.{table}_y{year} PARTITION OF {SCHEMA}.{table} "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        ))
+
+
+def create_indexes(conn, layout):
+    table = layout
+    conn.execute(text(f"CREATE UNIQUE INDEX {table}_stock_date ON {SCHEMA}.{table} (stock_id, price_date)"))
+    if layout == "partitioned":
+        conn.execute(text(
+            f"CREATE INDEX {table}_price_date_brin ON {SCHEMA}.{table} "
+            f"USING BRIN (price_date) WITH (pages_per_range = 32, autosummarize = on)"
+        ))
+    conn.execute(text(f"ANALYZE {SCHEMA}.{table}"))
+
+
+def relation_sizes(conn, layout):
+    """Total and index bytes of a table, summed over its partitions."""
+    # pg_partition_tree is empty for a table that is not partitioned, so the table itself is added
+    row = conn.execute(text(
+        "SELECT sum(pg_total_relation_size(relid)), sum(pg_indexes_size(relid)) FROM ("
+        "SELECT relid FROM pg_partition_tree(CAST(:table AS regclass)) "
+        "UNION SELECT CAST(:table AS regclass)) AS relations"
+    ), {"table": f"{SCHEMA}.{layout}"}).one()
+    return {"totalBytes": int(row[0]), "indexBytes": int(row[1])}
+
+
+def time_queries(conn, layout, stocks, start, end, queries, seed=0):
+    rng = np.random.default_rng(seed)
+    span_days = (end - start).days
+    results = {}
+    for name, sql in QUERIES.items():
+        statement = text(sql.format(schema=SCHEMA, table=layout))
+        seconds = []
+        for _ in range(queries):
+            window_start = start + timedelta(days=int(rng.integers(0, max(span_days - 365, 1))))
+            params = {"stock_id": int(rng.integers(1, stocks + 1)), "start": window_start,
+                      "end": window_start + timedelta(days=365)}
+            started = time.perf_counter()
+            conn.execute(statement, params).fetchall()
+            seconds.append(time.perf_counter() - started)
+        results[name] = latency_summary(seconds)
+    return results
+
+
+def benchmark_layout(engine, layout, stocks, days, append_days, queries):
+    """
+    Returns:
+        dict: Load/index/upsert timings and throughput, sizes and query latency percentiles of one layout.
+    """
+    start, end = business_days_start(days), END_DATE
+    result = {}
+    with engine.begin() as conn:
+        create_layout(conn, layout, start, end)
+        started = time.perf_counter()
+        loaded = conn.execute(
+            text(INSERT.format(schema=SCHEMA, table=layout) + BARS_SELECT + " ORDER BY d, s"),
+            {"stocks": stocks, "start": start, "end": end},
+        ).rowcount
+        result["loadSeconds"] = time.perf_counter() - started
+        result["rows"] = loaded
+        result["loadRowsPerSecond"] = loaded / result["loadSeconds"]
+        started = time.perf_counter()
+        create_indexes(conn, layout)
+        result["indexSeconds"] = time.perf_counter() - started
+
+    # A daily sync re-fetches the last stored bar and appends the new ones, as price_sync_job does
+    append_start = end + timedelta(days=1)
+    append_end = append_start + timedelta(days=append_days * 7 // 5)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in ("open_price", "high_price", "low_price", "close_price",
+                                                         "volume"))
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        upserted = conn.execute(
+            text(INSERT.format(schema=SCHEMA, table=layout) + BARS_SELECT
+                 + f" ORDER BY d, s ON CONFLICT (stock_id, price_date) DO UPDATE SET {updates}"),
+            {"stocks": stocks, "start": end, "end": append_end},
+        ).rowcount
+        seconds = time.perf_counter() - started
+    result["upsertRows"] = upserted
+    result["upsertRowsPerSecond"] = upserted / seconds
+
+    with engine.connect() as conn:
+        result.update(relation_sizes(conn, layout))
+        result["queries"] = time_queries(conn, layout, stocks, start, end, queries)
+    print(f"{layout}: {loaded} rows loaded at {result['loadRowsPerSecond']:,.0f} rows/s, "
+          f"upsert {result['upsertRowsPerSecond']:,.0f} rows/s, tail p50 "
+          f"{result['queries']['tail']['p50Ms']:.2f} ms")
+    return result
+
+
+def run_partition_benchmark(engine, stocks=2000, days=5000, append_days=5, queries=200, keep=False):
+    """
+    Returns:
+        dict: Per layout results plus the dataset shape; see benchmark_layout.
+    """
+    if engine.dialect.name != "postgresql":
+        raise ValueError("The partitioning benchmark needs PostgreSQL.")
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    report = {"stocks": stocks, "days": days, "targetRows": stocks * days, "layouts": {}}
+    try:
+        for layout in LAYOUTS:
+            report["layouts"][layout] = benchmark_layout(engine, layout, stocks, days, append_days, queries)
+    finally:
+        if not keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plain vs partitioned+BRIN stock_price_historical on synthetic bars.")
+    parser.add_argument("--stocks", type=int, default=2000, help="Synthetic stocks.")
+    parser.add_argument("--days", type=int, default=5000, help="Business days of bars per stock (2000 x 5000 = 10M).")
+    parser.add_argument("--append-days", type=int, default=5, help="New business days written by the upsert test.")
+    parser.add_argument("--queries", type=int, default=200, help="Timed executions per query type.")
+    parser.add_argument("--database-url", help="PostgreSQL to benchmark on instead of the configured one.")
+    parser.add_argument("--keep", action="store_true", help="Keep the partition_bench schema for inspection.")
+    args = parser.parse_args()
+
+    if args.database_url:
+        bench_engine = create_engine(args.database_url)
+    else:
+        from db.dbConnect import engine as bench_engine
+    print(json.dumps(run_partition_benchmark(bench_engine, args.stocks, args.days, args.append_days, args.queries,
+                                             args.keep), indent=2))
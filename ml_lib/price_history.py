@@ -0,0 +1,228 @@
+import io
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import Float, cast, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from db.dbConnect import SessionLocal
+from models.models import Stock, StockPriceHistorical
+from ml_lib.price_query import PRICE_DTYPE, price_array
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+# Minimum number of seconds between two yfinance top-ups of the same ticker in this process
+PRICE_REFRESH_SECONDS = int(os.getenv("PRICE_REFRESH_SECONDS", "900"))
+# Rows per COPY / executemany statement of the bulk ingestion path
+PRICE_INGEST_CHUNK = int(os.getenv("PRICE_INGEST_CHUNK", "5000"))
+INGEST_COLUMNS = ["stock_id", "price_date", "open_price", "high_price", "low_price", "close_price", "volume"]
+
+_last_refresh = {}
+
+
+def price_columns(stock_id, frame):
+    """
+    Convert a yfinance OHLCV frame into the columns of stock_price_historical, one array per column.
+    Bars are keyed by their exchange-local date at midnight; a date repeated in the frame keeps its last bar.
+    Returns:
+        pd.DataFrame: stock_id, price_date, open/high/low/close_price and volume columns.
+    """
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    columns = pd.DataFrame({
+        "stock_id": np.full(len(frame), stock_id, dtype=np.int64),
+        "price_date": index.normalize(),
+        "open_price": frame["Open"].to_numpy(dtype=np.float64),
+        "high_price": frame["High"].to_numpy(dtype=np.float64),
+        "low_price": frame["Low"].to_numpy(dtype=np.float64),
+        "close_price": frame["Close"].to_numpy(dtype=np.float64),
+        "volume": pd.array(np.rint(frame["Volume"].to_numpy(dtype=np.float64)), dtype="Int64"),
+    })
+    return columns.drop_duplicates("price_date", keep="last").reset_index(drop=True)
+
+
+def _copy_chunk(db, chunk):
+    """Stream a chunk through COPY into a temporary table, then upsert it with one INSERT ... SELECT."""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, header=False, index=False, na_rep="", date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+    db.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS price_ingest_staging (stock_id integer, price_date timestamp, "
+        "open_price numeric(19, 4), high_price numeric(19, 4), low_price numeric(19, 6), "
+        "close_price numeric(19, 6), volume bigint) ON COMMIT DROP"
+    ))
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY price_ingest_staging ({', '.join(INGEST_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+    updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in INGEST_COLUMNS[2:])
+    db.execute(text(
+        f"INSERT INTO stock_price_historical ({', '.join(INGEST_COLUMNS)}) "
+        f"SELECT {', '.join(INGEST_COLUMNS)} FROM price_ingest_staging "
+        f"ON CONFLICT (stock_id, price_date) DO UPDATE SET {updates}, fetched_at = now()"
+    ))
+    db.execute(text("TRUNCATE price_ingest_staging"))
+
+
+def _executemany_chunk(db, chunk):
+    """Upsert a chunk with one INSERT ... ON CONFLICT statement executed over all its rows."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(StockPriceHistorical)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockPriceHistorical.stock_id, StockPriceHistorical.price_date],
+        set_={name: stmt.excluded[name] for name in INGEST_COLUMNS[2:]} | {"fetched_at": func.now()},
+    )
+    records = chunk.astype(object).where(chunk.notna(), None)
+    records["price_date"] = [ts.to_pydatetime() for ts in chunk["price_date"]]
+    db.execute(stmt, records.to_dict("records"))
+
+
+def upsert_price_columns(db, columns, chunk_size=None, method="auto"):
+    """
+    Upsert price_columns output (of one or several stocks) into stock_price_historical in chunks of
+    chunk_size rows, through COPY on PostgreSQL (psycopg2) and executemany otherwise. The caller commits.
+    """
+    chunk_size = chunk_size or PRICE_INGEST_CHUNK
+    if method == "auto":
+        method = "copy" if db.get_bind().dialect.driver == "psycopg2" else "executemany"
+    write_chunk = _copy_chunk if method == "copy" else _executemany_chunk
+    for start in range(0, len(columns), chunk_size):
+        write_chunk(db, columns.iloc[start:start + chunk_size])
+
+
+def ingest_price_frame(db, stock_id, frame, chunk_size=None, method="auto"):
+    """
+    Bulk-write a yfinance OHLCV frame into stock_price_historical and advance the stock's data point dates.
+    Rows are upserted on the unique (stock_id, price_date) key, so re-ingesting overlapping bars is safe and
+    replaces them (e.g. a partial intraday bar by the final one). Writes go through upsert_price_columns.
+    The caller commits.
+    Args:
+        db: Database session.
+        stock_id (int): The stock the bars belong to.
+        frame (pd.DataFrame): Open/High/Low/Close/Volume bars indexed by timestamp.
+        chunk_size (int): Rows per statement (default PRICE_INGEST_CHUNK).
+        method (str): "copy", "executemany" or "auto".
+    Returns:
+        int: Number of bars written.
+    """
+    if frame is None or frame.empty:
+        return 0
+    columns = price_columns(stock_id, frame)
+    upsert_price_columns(db, columns, chunk_size, method)
+
+    stock = db.query(Stock.first_data_point_date, Stock.last_data_point_date).filter(
+        Stock.stock_id == stock_id).first()
+    first_bar, last_bar = columns["price_date"].min().date(), columns["price_date"].max().date()
+    values = {}
+    if stock is not None and (stock.last_data_point_date is None or _as_date(stock.last_data_point_date) < last_bar):
+        values["last_data_point_date"] = last_bar
+    if stock is not None and (stock.first_data_point_date is None or _as_date(stock.first_data_point_date) > first_bar):
+        values["first_data_point_date"] = first_bar
+    if values:
+        db.query(Stock).filter(Stock.stock_id == stock_id).update(values)
+    return len(columns)
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def refresh_stock_prices(db, stock, force=False):
+    """
+    Top up stock_price_historical with the bars yfinance has after Stock.last_data_point_date.
+    The last stored bar is re-fetched as well, so a partial intraday bar gets replaced by the final one.
+    Args:
+        db: Database session.
+        stock (Stock): The stock to refresh.
+        force (bool): Ignore the per-process refresh interval.
+    Returns:
+        int: Number of bars written.
+    """
+    last_date = stock.last_data_point_date
+    now = time.monotonic()
+    if not force and now - _last_refresh.get(stock.stock_id, -PRICE_REFRESH_SECONDS) < PRICE_REFRESH_SECONDS:
+        return 0
+
+    ticker = yf.Ticker(stock.ticker_symbol)
+    if last_date is None:
+        new_data = ticker.history(period='max', interval='1d')
+    else:
+        new_data = ticker.history(start=last_date, end=date.today() + timedelta(days=1), interval='1d')
+    if new_data is None or new_data.empty:
+        return 0
+
+    written = ingest_price_frame(db, stock.stock_id, new_data)
+    db.commit()
+    # Only a stored top-up starts the interval; the last stored bar is always re-fetched, so an empty
+    # result means yfinance failed and the next read should try again
+    _last_refresh[stock.stock_id] = now
+    print(f"Stored {written} bars for {stock.ticker_symbol} from {new_data.index.min().date()}.")
+    return written
+
+
+def query_price_frame(db, stock_id, starting_date=None, ending_date=None, size=None, size_dir=-1):
+    """
+    Read daily bars of one stock from stock_price_historical into a yfinance-shaped DataFrame.
+    Args:
+        db: Database session.
+        stock_id (int): The stock id.
+        starting_date: Optional inclusive lower bound on the bar date.
+        ending_date: Optional inclusive upper bound on the bar date.
+        size (int): Optional number of bars to keep.
+        size_dir (int): 1 keeps the first `size` bars of the range, anything else the last `size`.
+    Returns:
+        pd.DataFrame: Open/High/Low/Close/Volume columns indexed by date, ascending.
+    """
+    array = price_array(db, stock_id, starting_date, ending_date, size, newest=bool(size) and size_dir != 1)
+    frame = pd.DataFrame({column: array[name] for column, name in zip(PRICE_COLUMNS, PRICE_DTYPE.names[1:])})
+    frame.index = pd.DatetimeIndex(array["date"].astype("datetime64[ns]"), name="Date")
+    return frame
+
+
+def latest_closes(db, stock_id, count=2):
+    """Return the last `count` close prices of a stock, most recent first."""
+    rows = (
+        db.query(cast(StockPriceHistorical.close_price, Float))
+        .filter(StockPriceHistorical.stock_id == stock_id)
+        .order_by(StockPriceHistorical.price_date.desc())
+        .limit(count)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def load_stock_prices(ticker_symbol, starting_date=None, ending_date=None, size=None, size_dir=-1, refresh=True):
+    """
+    Load daily bars for a ticker from the local store, topping it up from yfinance first when stale.
+    Args:
+        ticker_symbol (str): The stock ticker symbol.
+        starting_date, ending_date, size, size_dir: See query_price_frame.
+        refresh (bool): Fetch missing trailing bars from yfinance before reading.
+    Returns:
+        tuple: (frame, closes) where closes are the last two close prices of the whole series,
+        or None if the ticker is not a known stock.
+    """
+    db = SessionLocal()
+    try:
+        stock = db.query(Stock).filter(Stock.ticker_symbol == ticker_symbol).first()
+        if stock is None:
+            return None
+        if refresh:
+            try:
+                refresh_stock_prices(db, stock)
+            except Exception as e:
+                db.rollback()
+                print(f"Error refreshing prices for {ticker_symbol}: {e}")
+        frame = query_price_frame(db, stock.stock_id, starting_date, ending_date, size, size_dir)
+        closes = latest_closes(db, stock.stock_id)
+        return frame, closes
+    finally:
+        db.close()
@@ -0,0 +1,78 @@
+"""
+Read-only NumPy views of stock_price_historical for analytics code:
+    tail(db, stock_id, 90)["close"]
+    range(db, stock_id, "2024-01-01", "2024-12-31")
+Rows come from one Core select over the (stock_id, price_date) unique index, without ORM objects.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, cast, select
+
+from models.models import StockPriceHistorical
+
+
+def _to_naive_datetime(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_localize(None)
+    return timestamp.to_pydatetime()
+
+
+PRICE_DTYPE = np.dtype([
+    ("date", "datetime64[us]"),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+])
+
+
+def price_array(db, stock_id, starting_date=None, ending_date=None, size=None, newest=True):
+    """Read bars with one Core select into a PRICE_DTYPE array, ascending by date; no ORM objects are built."""
+    query = select(
+        StockPriceHistorical.price_date,
+        cast(StockPriceHistorical.open_price, Float),
+        cast(StockPriceHistorical.high_price, Float),
+        cast(StockPriceHistorical.low_price, Float),
+        cast(StockPriceHistorical.close_price, Float),
+        cast(StockPriceHistorical.volume, Float),
+    ).where(StockPriceHistorical.stock_id == stock_id)
+    if starting_date is not None:
+        query = query.where(StockPriceHistorical.price_date >= _to_naive_datetime(starting_date))
+    if ending_date is not None:
+        query = query.where(StockPriceHistorical.price_date <= _to_naive_datetime(ending_date))
+    # Both orders walk the (stock_id, price_date) unique index; the newest-first one backwards
+    order = StockPriceHistorical.price_date.desc() if newest else StockPriceHistorical.price_date.asc()
+    query = query.order_by(order)
+    if size:
+        query = query.limit(size)
+
+    rows = db.execute(query).all()
+    if newest:
+        rows.reverse()
+    array = np.empty(len(rows), dtype=PRICE_DTYPE)
+    if rows:
+        dates, *values = zip(*rows)
+        array["date"] = np.array(dates, dtype="datetime64[us]")
+        for name, column in zip(PRICE_DTYPE.names[1:], values):
+            array[name] = np.array(column, dtype=np.float64)  # NULL becomes NaN
+    return array
+
+
+def tail(db, stock_id, n):
+    """
+    The last n daily bars of a stock.
+    Returns:
+        np.ndarray: Structured PRICE_DTYPE array (date, open, high, low, close, volume), ascending by date.
+    """
+    return price_array(db, stock_id, size=n)
+
+
+def range(db, stock_id, start=None, end=None):
+    """
+    The daily bars of a stock between start and end, both inclusive and optional.
+    Returns:
+        np.ndarray: Structured PRICE_DTYPE array (date, open, high, low, close, volume), ascending by date.
+    """
+    return price_array(db, stock_id, start, end, newest=False)
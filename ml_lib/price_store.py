@@ -0,0 +1,176 @@
+"""
+Memory-mapped columnar cache of daily bars, one .npy file of PRICE_DTYPE rows per ticker.
+
+Refreshed incrementally from stock_price_historical (run after ml_lib.price_sync_job):
+    python -m ml_lib.price_store
+    python -m ml_lib.price_store --tickers AAPL MSFT
+and read through price_store.get / history_frame, which open the files with mmap_mode="r".
+Every process maps the same page-cache pages, so gunicorn workers share one copy of the history.
+Refreshes write a new file and swap it in with os.replace; readers keep their old mapping until
+they next notice the file changed.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from db.dbConnect import SessionLocal
+from models.models import Stock, AssetStatus
+from ml_lib.price_query import PRICE_DTYPE, range as price_range
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join("ml_lib", "priceStore"))
+# history_frame treats a ticker as missing when its cached bars stop this many days before the end
+# or start this many days after the start (weekends and holidays fit in the slack)
+PRICE_STORE_MAX_STALE_DAYS = int(os.getenv("PRICE_STORE_MAX_STALE_DAYS", "4"))
+
+
+def _file_name(ticker_symbol):
+    return f"{ticker_symbol.replace('/', '_')}.npy"
+
+
+class PriceStore:
+    """Reader and incremental writer of the per-ticker .npy price files in `directory`."""
+
+    def __init__(self, directory=PRICE_STORE_DIR):
+        self.directory = directory
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def path(self, ticker_symbol):
+        return os.path.join(self.directory, _file_name(ticker_symbol))
+
+    def get(self, ticker_symbol):
+        """
+        Return the cached bars of a ticker as a read-only memory-mapped PRICE_DTYPE array, ascending
+        by date, or None if the ticker is not cached. The mapping is reopened after a refresh.
+        """
+        path = self.path(ticker_symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._maps.get(ticker_symbol)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        array = np.load(path, mmap_mode="r")
+        with self._lock:
+            self._maps[ticker_symbol] = (version, array)
+        return array
+
+    def read(self, ticker_symbol, start=None, end=None, n=None):
+        """
+        The cached bars between start and end (inclusive, optional), or only the last n of them.
+        Returns:
+            np.ndarray: A view into the mapped file (no copy), or None if the ticker is not cached.
+        """
+        array = self.get(ticker_symbol)
+        if array is None:
+            return None
+        dates = array["date"]
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).tz_localize(None)))
+        hi = len(array) if end is None else np.searchsorted(
+            dates, np.datetime64(pd.Timestamp(end).tz_localize(None)), side="right")
+        if n is not None:
+            lo = max(lo, hi - n)
+        return array[lo:hi]
+
+    def history_frame(self, ticker_symbol, start=None, end=None, max_stale_days=PRICE_STORE_MAX_STALE_DAYS):
+        """
+        The cached bars from start up to, but excluding, end as a yfinance-shaped Open/High/Low/Close/Volume
+        frame indexed by date, like Ticker.history(start, end). None if the ticker is not cached, its first
+        bar is more than max_stale_days after start, or its last bar is more than max_stale_days before end.
+        """
+        array = self.get(ticker_symbol)
+        if array is None or len(array) == 0:
+            return None
+        if start is not None:
+            start = pd.Timestamp(start).tz_localize(None)
+            if pd.Timestamp(array["date"][0]) > start.normalize() + timedelta(days=max_stale_days):
+                return None
+        bars = self.read(ticker_symbol, start)
+        until = pd.Timestamp.now()
+        if end is not None:
+            until = min(until, pd.Timestamp(end).tz_localize(None))
+            bars = bars[:np.searchsorted(bars["date"], np.datetime64(pd.Timestamp(end).tz_localize(None)))]
+        if len(bars) == 0 or pd.Timestamp(bars["date"][-1]) < until.normalize() - timedelta(days=max_stale_days):
+            return None
+        frame = pd.DataFrame({column: bars[name] for column, name in
+                              zip(["Open", "High", "Low", "Close", "Volume"], PRICE_DTYPE.names[1:])})
+        frame.index = pd.DatetimeIndex(bars["date"].astype("datetime64[ns]"), name="Date")
+        return frame
+
+    def refresh_ticker(self, db, stock_id, ticker_symbol):
+        """
+        Append the bars stored after the last cached one (the last cached bar is read again, so a
+        replaced partial bar is picked up) and swap the file in atomically.
+        Returns:
+            int: Number of bars read from the database.
+        """
+        cached = self.get(ticker_symbol)
+        since = None
+        if cached is not None and len(cached):
+            since = pd.Timestamp(cached["date"][-1]).to_pydatetime()
+        new_bars = price_range(db, stock_id, start=since)
+        if cached is not None and since is not None:
+            if len(new_bars) == 0:
+                return 0
+            kept = cached[cached["date"] < new_bars["date"][0]]
+            bars = np.concatenate([kept, new_bars])
+        else:
+            bars = new_bars
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(ticker_symbol)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+        return len(new_bars)
+
+    def refresh(self, tickers=None):
+        """
+        Refresh the cached files of every non-blacklisted stock (or the given tickers).
+        Returns:
+            dict: Run statistics.
+        """
+        started = time.perf_counter()
+        stats = {"tickers": 0, "barsRead": 0, "failed": []}
+        db = SessionLocal()
+        try:
+            query = db.query(Stock.stock_id, Stock.ticker_symbol).filter(Stock.status != AssetStatus.BLACKLIST)
+            if tickers:
+                query = query.filter(Stock.ticker_symbol.in_(tickers))
+            for stock_id, ticker_symbol in query.order_by(Stock.ticker_symbol).all():
+                try:
+                    stats["barsRead"] += self.refresh_ticker(db, stock_id, ticker_symbol)
+                    stats["tickers"] += 1
+                except Exception as e:
+                    print(f"Error refreshing the price store for {ticker_symbol}: {e}")
+                    stats["failed"].append(ticker_symbol)
+        finally:
+            db.close()
+        stats["totalSeconds"] = time.perf_counter() - started
+        print(f"Price store refreshed: {stats['tickers']} tickers, {stats['barsRead']} bars read "
+              f"in {stats['totalSeconds']:.2f}s")
+        return stats
+
+
+price_store = PriceStore()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the memory-mapped price store from stock_price_historical.")
+    parser.add_argument("--tickers", nargs="*", help="Only refresh these ticker symbols.")
+    parser.add_argument("--json", action="store_true", help="Print the run statistics as JSON.")
+    args = parser.parse_args()
+
+    run_stats = price_store.refresh(tickers=args.tickers)
+    if args.json:
+        print(json.dumps(run_stats, indent=2))
@@ -0,0 +1,217 @@
+"""
+Bring stock_price_historical up to date for the whole universe in batches.
+
+Reads last_data_point_date of every non-blacklisted stock in one query, groups the tickers by it,
+and fetches each group's missing bars with multi-symbol yf.download calls of --batch-size tickers,
+each using --workers download threads. yf.download keeps its results in module globals, so only one
+call runs at a time; only the next batch downloads while the previous one is written. Every batch is
+upserted and its stocks' data point dates advanced with one statement each, then committed:
+    python -m ml_lib.price_sync_job
+    python -m ml_lib.price_sync_job --tickers AAPL MSFT --batch-size 50 --workers 4
+As in refresh_stock_prices, the last stored bar is fetched again so a partial bar gets replaced.
+On a partitioned stock_price_historical, each run first creates this and next year's partition.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import case, or_, text
+
+from db.dbConnect import SessionLocal
+from models.models import Stock, AssetStatus
+from ml_lib.price_history import price_columns, upsert_price_columns
+
+SYNC_BATCH_SIZE = int(os.getenv("PRICE_SYNC_BATCH_SIZE", "50"))
+SYNC_WORKERS = int(os.getenv("PRICE_SYNC_WORKERS", "4"))
+# yf.download resets and collects shared module state (yfinance.shared._DFS), so concurrent calls mix up results
+_download_lock = threading.Lock()
+
+
+def ensure_price_partitions(db, today=None):
+    """
+    Create this and next year's partition of stock_price_historical when it is partitioned
+    (db/scripts/stock_price_historical_partitioning.sql); the table has no DEFAULT partition.
+    Returns:
+        list[int]: The years ensured, empty when the table is not partitioned.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+    if not db.execute(text("SELECT to_regproc('create_stock_price_historical_partition') IS NOT NULL")).scalar():
+        return []
+    year = (today or date.today()).year
+    for partition_year in (year, year + 1):
+        db.execute(text("SELECT create_stock_price_historical_partition(:year)"), {"year": partition_year})
+    db.commit()
+    return [year, year + 1]
+
+
+def stocks_by_staleness(db, tickers=None):
+    """
+    Return {last_data_point_date: [(stock_id, ticker_symbol), ...]} for every non-blacklisted stock,
+    oldest date first; stocks without stored bars are keyed by None and come first.
+    """
+    query = db.query(Stock.stock_id, Stock.ticker_symbol, Stock.last_data_point_date).filter(
+        Stock.status != AssetStatus.BLACKLIST)
+    if tickers:
+        query = query.filter(Stock.ticker_symbol.in_(tickers))
+    groups = {}
+    for stock_id, ticker_symbol, last_date in query.order_by(Stock.ticker_symbol).all():
+        groups.setdefault(last_date, []).append((stock_id, ticker_symbol))
+    return dict(sorted(groups.items(), key=lambda item: (item[0] is not None, item[0] or date.min)))
+
+
+def download_batch(ticker_symbols, last_date, threads=SYNC_WORKERS):
+    """
+    Fetch the daily bars after last_date (all of them if None) of several tickers in one yf.download call
+    with `threads` download threads.
+    Returns:
+        dict: {ticker_symbol: OHLCV frame}, without tickers that returned no bars.
+    """
+    if last_date is None:
+        kwargs = {"period": "max"}
+    else:
+        kwargs = {"start": last_date, "end": date.today() + timedelta(days=1)}
+    with _download_lock:
+        data = yf.download(ticker_symbols, interval="1d", group_by="ticker", auto_adjust=True,
+                           threads=threads, progress=False, **kwargs)
+    if data is None or data.empty:
+        return {}
+    frames = {}
+    for ticker_symbol in ticker_symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker_symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[ticker_symbol]
+        else:
+            frame = data
+        # Multi-symbol downloads share one date index; drop the dates this ticker did not trade
+        frame = frame.dropna(subset=["Close"])
+        if not frame.empty:
+            frames[ticker_symbol] = frame
+    return frames
+
+
+def store_batch(db, stocks, frames):
+    """
+    Upsert a downloaded batch and advance first/last_data_point_date of its stocks in one UPDATE.
+    Returns:
+        int: Number of bars written.
+    """
+    stock_ids = {ticker_symbol: stock_id for stock_id, ticker_symbol in stocks}
+    columns = [price_columns(stock_ids[ticker_symbol], frame) for ticker_symbol, frame in frames.items()]
+    if not columns:
+        return 0
+    columns = pd.concat(columns, ignore_index=True)
+    upsert_price_columns(db, columns)
+
+    bounds = columns.groupby("stock_id")["price_date"].agg(["min", "max"])
+    first_dates = {int(stock_id): row["min"].date() for stock_id, row in bounds.iterrows()}
+    last_dates = {int(stock_id): row["max"].date() for stock_id, row in bounds.iterrows()}
+    new_last = case(last_dates, value=Stock.stock_id)
+    new_first = case(first_dates, value=Stock.stock_id)
+    # Only ever widen the stored range, as ingest_price_frame does
+    db.query(Stock).filter(Stock.stock_id.in_(list(last_dates))).update({
+        Stock.last_data_point_date: case(
+            (or_(Stock.last_data_point_date.is_(None), Stock.last_data_point_date < new_last), new_last),
+            else_=Stock.last_data_point_date,
+        ),
+        Stock.first_data_point_date: case(
+            (or_(Stock.first_data_point_date.is_(None), Stock.first_data_point_date > new_first), new_first),
+            else_=Stock.first_data_point_date,
+        ),
+    }, synchronize_session=False)
+    return len(columns)
+
+
+def run_price_sync(tickers=None, batch_size=SYNC_BATCH_SIZE, workers=SYNC_WORKERS):
+    """
+    Fetch and store the missing daily bars of every non-blacklisted stock (or the given tickers).
+    Args:
+        tickers (list[str]): Optional subset of ticker symbols.
+        batch_size (int): Tickers per yf.download call.
+        workers (int): Download threads of each yf.download call.
+    Returns:
+        dict: Run statistics with per-batch results.
+    """
+    run_started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        try:
+            ensure_price_partitions(db)
+        except Exception as e:
+            db.rollback()
+            print(f"Error creating stock_price_historical partitions: {e}")
+        groups = stocks_by_staleness(db, tickers)
+        batches = [
+            (last_date, stocks[start:start + batch_size])
+            for last_date, stocks in groups.items()
+            for start in range(0, len(stocks), batch_size)
+        ]
+        stats = {
+            "tickers": sum(len(stocks) for stocks in groups.values()),
+            "stalenessGroups": len(groups),
+            "batches": len(batches),
+            "barsWritten": 0,
+            "noData": [],
+            "failed": [],
+            "results": [],
+        }
+
+        # One download thread fetches the next batch while this thread writes the current one; a batch is only
+        # submitted once the one before it has been stored, so at most two batches are held in memory
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-sync") as executor:
+            def submit(batch):
+                last_date, stocks = batch
+                return executor.submit(download_batch, [ticker for _, ticker in stocks], last_date, workers)
+
+            future = submit(batches[0]) if batches else None
+            for index, (last_date, stocks) in enumerate(batches):
+                current = future
+                future = submit(batches[index + 1]) if index + 1 < len(batches) else None
+                tickers_in_batch = [ticker for _, ticker in stocks]
+                started = time.perf_counter()
+                try:
+                    frames = current.result()
+                    written = store_batch(db, stocks, frames)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    print(f"Error syncing prices for {', '.join(tickers_in_batch)}: {e}")
+                    stats["failed"].extend(tickers_in_batch)
+                    continue
+                stats["barsWritten"] += written
+                stats["noData"].extend(t for t in tickers_in_batch if t not in frames)
+                stats["results"].append({
+                    "since": str(last_date) if last_date else None,
+                    "tickers": len(stocks),
+                    "bars": written,
+                    "storeSeconds": time.perf_counter() - started,
+                })
+    finally:
+        db.close()
+
+    stats["totalSeconds"] = time.perf_counter() - run_started
+    print(
+        f"Price sync finished: {stats['barsWritten']} bars for {stats['tickers']} tickers in "
+        f"{stats['batches']} batches, {len(stats['failed'])} failed, {stats['totalSeconds']:.2f}s"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch the missing daily bars of every stock in batches.")
+    parser.add_argument("--tickers", nargs="*", help="Only sync these ticker symbols.")
+    parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE, help="Tickers per yf.download call.")
+    parser.add_argument("--workers", type=int, default=SYNC_WORKERS, help="Download threads per batch.")
+    parser.add_argument("--json", action="store_true", help="Print the run statistics as JSON.")
+    args = parser.parse_args()
+
+    run_stats = run_price_sync(tickers=args.tickers, batch_size=args.batch_size, workers=args.workers)
+    if args.json:
+        print(json.dumps(run_stats, indent=2))
@@ -0,0 +1,159 @@
+"""
+Reduced-precision exports of the trained LSTM models and an accuracy-vs-memory report.
+
+Each model's weights are stored as float16 or as int8 with one scale per tensor
+(model.npz -> model.float16.npz / model.int8.npz) and dequantized on the fly at inference.
+The report runs the walk-forward benchmark of ml_lib.benchmark on every precision so a
+deployment can pick one, then serve it by setting MODEL_PRECISION:
+    python -m ml_lib.quantization --end-date 2025-03-31 --output precision.json
+    python -m ml_lib.quantization --precisions int8 --export    # write the exports next to the models
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ml_lib.benchmark import benchmark_ticker, discover_models, load_closes, active_time_steps, resolve_time_step
+from ml_lib.model_registry import load_model_artifacts, numpy_model_file_path, quantized_model_file_path
+from ml_lib.numpy_lstm import NumpyLSTM, QuantizedNumpyLSTM, PRECISIONS, WEIGHT_NAMES
+
+REDUCED_PRECISIONS = ("float16", "int8")
+
+
+def full_precision_file(model_file):
+    """The float32 export a (possibly quantized) served model file was derived from."""
+    for precision in REDUCED_PRECISIONS:
+        suffix = f".{precision}.npz"
+        if model_file.endswith(suffix):
+            return model_file[:-len(suffix)] + ".npz"
+    return model_file
+
+
+def load_full_precision(ticker_symbol, model_file, scaler_file):
+    """
+    Load the float32 NumpyLSTM of a model, converting a Keras-only model on the way.
+    Returns:
+        tuple: (NumpyLSTM, path of its .npz export)
+    """
+    model_file = full_precision_file(model_file)
+    if model_file.endswith(".npz"):
+        return NumpyLSTM.load(model_file), model_file
+    model, _ = load_model_artifacts(model_file, scaler_file)
+    return NumpyLSTM.from_keras(model), numpy_model_file_path(ticker_symbol)
+
+
+def max_weight_error(model, quantized):
+    return max(float(np.abs(getattr(model, name) - getattr(quantized, name)).max()) for name in WEIGHT_NAMES)
+
+
+def export_quantized(model, numpy_file, precision):
+    """Write a reduced-precision copy of model next to its float32 export and return its path."""
+    path = quantized_model_file_path(numpy_file, precision)
+    QuantizedNumpyLSTM.from_model(model, precision).save(path)
+    return path
+
+
+def precision_report(tickers=None, precisions=PRECISIONS, end_date=None, origins=60, n_iter=50, seed=0,
+                     export=False, price_loader=load_closes, time_step_loader=active_time_steps):
+    """
+    Benchmark every discovered model at each precision on the same walk-forward origins and MC dropout seed.
+    Quantized files are written to a temporary directory unless export is True.
+    Returns:
+        dict: JSON-serialisable report with per-ticker results per precision and a per-precision summary.
+    """
+    started = time.perf_counter()
+    results = {}
+    models = discover_models(tickers)
+    time_steps = time_step_loader(list(models))
+    with tempfile.TemporaryDirectory() as tmp:
+        for ticker_symbol, (model_file, scaler_file) in models.items():
+            try:
+                time_step = resolve_time_step(ticker_symbol, time_steps)
+                closes = price_loader(ticker_symbol, end_date)
+                if closes is None:
+                    raise ValueError(f"No stored prices for {ticker_symbol}.")
+                model, numpy_file = load_full_precision(ticker_symbol, model_file, scaler_file)
+                if not os.path.exists(numpy_file):
+                    numpy_file = numpy_file if export else os.path.join(tmp, f"{ticker_symbol}.npz")
+                    model.save(numpy_file)
+                ticker_results = {}
+                for precision in precisions:
+                    if precision == "float32":
+                        path, error = numpy_file, 0.0
+                    else:
+                        target = numpy_file if export else os.path.join(tmp, f"{ticker_symbol}.npz")
+                        path = export_quantized(model, target, precision)
+                        error = max_weight_error(model, QuantizedNumpyLSTM.load(path))
+                    result = benchmark_ticker(ticker_symbol, path, scaler_file, closes, origins, n_iter, seed,
+                                              time_step)
+                    result["fileBytes"] = os.path.getsize(path)
+                    result["maxWeightError"] = error
+                    if not export and precision != "float32":
+                        result["modelFile"] = None
+                    ticker_results[precision] = result
+                if "float32" in ticker_results:
+                    baseline = ticker_results["float32"]
+                    for result in ticker_results.values():
+                        result["deltaMape"] = result["mape"] - baseline["mape"]
+                        result["deltaRmse"] = result["rmse"] - baseline["rmse"]
+                        result["memoryRatio"] = result["residentBytes"] / baseline["residentBytes"]
+                results[ticker_symbol] = ticker_results
+            except Exception as e:
+                print(f"Error evaluating {ticker_symbol}: {e}")
+                results[ticker_symbol] = {"error": str(e)}
+
+    succeeded = [r for r in results.values() if "error" not in r]
+    summary = {}
+    for precision in precisions:
+        rows = [r[precision] for r in succeeded]
+        if not rows:
+            continue
+        summary[precision] = {
+            "tickers": len(rows),
+            "residentBytes": int(sum(r["residentBytes"] for r in rows)),
+            "fileBytes": int(sum(r["fileBytes"] for r in rows)),
+            "meanP50Ms": float(np.mean([r["latency"]["p50Ms"] for r in rows])),
+            "meanMape": float(np.mean([r["mape"] for r in rows])),
+            "meanRmse": float(np.mean([r["rmse"] for r in rows])),
+            "maxDeltaMape": float(max(abs(r.get("deltaMape", 0.0)) for r in rows)),
+        }
+    return {
+        "meta": {
+            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "endDate": str(end_date) if end_date else None,
+            "origins": origins,
+            "nIter": n_iter,
+            "seed": seed,
+            "exported": export,
+            "totalSeconds": time.perf_counter() - started,
+        },
+        "summary": summary,
+        "tickers": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy-vs-memory report of reduced-precision model exports.")
+    parser.add_argument("--tickers", nargs="*", help="Only evaluate these ticker symbols.")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--end-date", help="Last stored bar used (YYYY-MM-DD); fix it to compare runs.")
+    parser.add_argument("--origins", type=int, default=60, help="Number of walk-forward forecast origins.")
+    parser.add_argument("--n-iter", type=int, default=50, help="Monte Carlo dropout samples per forecast.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the dropout masks.")
+    parser.add_argument("--export", action="store_true",
+                        help="Keep the quantized exports next to the models so MODEL_PRECISION can serve them.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    report = precision_report(args.tickers, args.precisions, args.end_date, args.origins, args.n_iter, args.seed,
+                              args.export)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Precision report written to '{args.output}'")
+    else:
+        print(json.dumps(report["summary"], indent=2))
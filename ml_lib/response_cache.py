@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of forecast API responses.
+
+    Entries are keyed by (endpoint, ticker, dates...) and tagged with the active PredictionModel's
+    (model_id, model_version, latest_modified_time), so a lookup after a retrain in another process
+    misses. Forecast writes and retrains in this process drop entries through invalidate_model and
+    invalidate_ticker; every entry also expires after ttl seconds, which bounds how long bars and
+    forecasts written by other processes (price refresh, nightly forecast job) stay unseen.
+    """
+
+    def __init__(self, max_size=256, ttl=300, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, version):
+        """Return the cached response for key if it was stored under the same model version and is fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["version"] == version:
+                if self.clock() - entry["stored_at"] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["value"]
+                self.expirations += 1
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = {"version": version, "value": value, "stored_at": self.clock()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, version, compute):
+        """
+        Return the cached response, or compute and cache it. Nothing is cached without a version
+        (no active model) or when the response is empty or an error.
+        """
+        if version is None:
+            return compute()
+        value = self.get(key, version)
+        if value is not None:
+            return value
+        value = compute()
+        if value and not (isinstance(value, dict) and "error" in value):
+            self.put(key, version, value)
+        return value
+
+    def _drop(self, matches):
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if matches(key, entry)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_ticker(self, ticker_symbol):
+        """Drop every response of a ticker, e.g. after it was retrained."""
+        return self._drop(lambda key, entry: key[1] == ticker_symbol)
+
+    def invalidate_model(self, model_id):
+        """Drop every response built from a model's forecasts, e.g. after new forecast rows were stored."""
+        return self._drop(lambda key, entry: entry["version"][0] == model_id)
+
+    def invalidate(self):
+        return self._drop(lambda key, entry: True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hitRate": self.hits / lookups if lookups else None,
+            }
+
+
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+)
@@ -4,8 +4,11 @@ import pandas as pd
 from db.dbConnect import get_db,SessionLocal
 from models.models import Stock, StockPriceHistorical, AssetStatus,PredictionModel,StockPrediction
 from classes.prediction import StockPriceHistoricalType
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 from contextlib import contextmanager
+from ml_lib.response_cache import response_cache
+from ml_lib.price_history import ingest_price_frame
 
 def get_all_available_companies():
     url = "https://raw.githubusercontent.com/datasets/s-and-p-500-companies/master/data/constituents.csv"
@@ -49,23 +52,8 @@ def get_data(company, date=None, size=None) -> list[StockPriceHistoricalType] |
         new_data = get_past_history(company=company, begin_date=start_date)
 
         if new_data is not None and not new_data.empty:
-            for ts_index, row in new_data.iterrows():
-                stock_price = StockPriceHistorical(
-                    stock_id=stock_id,
-                    price_date=ts_index.to_pydatetime().date(),
-                    open_price=float(row['Open']) if row['Open'] else None,
-                    high_price=float(row['High']) if row['High'] else None,
-                    low_price=float(row['Low']) if row['Low'] else None,
-                    close_price=float(row['Close']) if row['Close'] else None,
-                    volume=int(row['Volume']) if row['Volume'] else None
-                )
-                db.add(stock_price)
-            db.commit()
-
-            last_data_entry = new_data.index.max().date()  # Store only the date
-            db.query(Stock).filter(Stock.stock_id == stock_id).update(
-                {"last_data_point_date": last_data_entry}
-            )
+            # Columnar bulk upsert; also advances last_data_point_date
+            ingest_price_frame(db, stock_id, new_data)
             db.commit()
 
             print(f"Added data for {company} from {start_date} to the latest date.")
@@ -76,23 +64,8 @@ def get_data(company, date=None, size=None) -> list[StockPriceHistoricalType] |
         new_data = get_past_history(company=company, date=date)
 
         if new_data is not None and not new_data.empty:
-            for ts_index, row in new_data.iterrows():
-                stock_price = StockPriceHistorical(
-                    stock_id=stock_id,
-                    price_date=ts_index.to_pydatetime().date(),  # Store only the date
-                    open_price=float(row['Open']) if row['Open'] else None,
-                    high_price=float(row['High']) if row['High'] else None,
-                    low_price=float(row['Low']) if row['Low'] else None,
-                    close_price=float(row['Close']) if row['Close'] else None,
-                    volume=int(row['Volume']) if row['Volume'] else None
-                )
-                db.add(stock_price)
-            db.commit()
-
-            last_data_entry = new_data.index.max().date()  # Store only the date
-            db.query(Stock).filter(Stock.stock_id == stock_id).update(
-                {"last_data_point_date": last_data_entry}
-            )
+            # Columnar bulk upsert; also advances last_data_point_date
+            ingest_price_frame(db, stock_id, new_data)
             db.commit()
 
             print(f"Added data for {company} up to {date}.")
@@ -103,23 +76,8 @@ def get_data(company, date=None, size=None) -> list[StockPriceHistoricalType] |
         new_data = get_past_history(company=company)
 
         if new_data is not None and not new_data.empty:
-            for ts_index, row in new_data.iterrows():
-                stock_price = StockPriceHistorical(
-                    stock_id=stock_id,
-                    price_date=ts_index.to_pydatetime().date(),  # Store only the date
-                    open_price=float(row['Open']) if row['Open'] else None,
-                    high_price=float(row['High']) if row['High'] else None,
-                    low_price=float(row['Low']) if row['Low'] else None,
-                    close_price=float(row['Close']) if row['Close'] else None,
-                    volume=int(row['Volume']) if row['Volume'] else None
-                )
-                db.add(stock_price)
-            db.commit()
-
-            last_data_entry = new_data.index.max().date()  # Store only the date
-            db.query(Stock).filter(Stock.stock_id == stock_id).update(
-                {"last_data_point_date": last_data_entry}
-            )
+            # Columnar bulk upsert; also advances last_data_point_date
+            ingest_price_frame(db, stock_id, new_data)
             db.commit()
 
             print(f"Added all historical data for {company}.")
@@ -131,23 +89,8 @@ def get_data(company, date=None, size=None) -> list[StockPriceHistoricalType] |
         new_data = get_past_history(company=company, date=date, begin_date=start_date)
 
         if new_data is not None and not new_data.empty:
-            for ts_index, row in new_data.iterrows():
-                stock_price = StockPriceHistorical(
-                    stock_id=stock_id,
-                    price_date=ts_index.to_pydatetime().date(),  # Store only the date
-                    open_price=float(row['Open']) if row['Open'] else None,
-                    high_price=float(row['High']) if row['High'] else None,
-                    low_price=float(row['Low']) if row['Low'] else None,
-                    close_price=float(row['Close']) if row['Close'] else None,
-                    volume=int(row['Volume']) if row['Volume'] else None
-                )
-                db.add(stock_price)
-            db.commit()
-
-            last_data_entry = new_data.index.max().date()  # Store only the date
-            db.query(Stock).filter(Stock.stock_id == stock_id).update(
-                {"last_data_point_date": last_data_entry}
-            )
+            # Columnar bulk upsert; also advances last_data_point_date
+            ingest_price_frame(db, stock_id, new_data)
             db.commit()
 
             print(f"Updated data for {company} from {start_date} to {date}.")
@@ -198,21 +141,29 @@ def addcompany(company,db=None):
         return stock
 
 
-def model_regiterer(stock_symbol, time_step, rmse, model_location, scaler_location,last_date,data_points):
+def model_regiterer(stock_symbol, time_step, rmse, model_location, scaler_location,last_date,data_points,model_version="v1",model_type="ticker"):
     with get_db_context() as db:
         stock = addcompany(stock_symbol,db)
         existing_model = db.query(PredictionModel).filter(PredictionModel.target_stock_id == stock.stock_id).first()
 
         if existing_model:
+            # One commit flips the row to the new artifact version, so readers see either the old or the new one
             existing_model.latest_modified_time = datetime.utcnow()
             existing_model.trained_upto_date = last_date
             existing_model.data_points = data_points
+            existing_model.rmse = rmse
+            existing_model.time_step = time_step
+            existing_model.model_version = model_version
+            existing_model.model_location = model_location
+            existing_model.scaler_location = scaler_location
+            existing_model.model_type = model_type
             db.commit()
+            response_cache.invalidate_ticker(stock_symbol)
             print(f"Updated last_modified_time for model {existing_model.model_id}.")
             return  existing_model
         else:
             model = PredictionModel(
-                model_version="v1",
+                model_version=model_version,
                 target_stock_id=stock.stock_id,
                 latest_modified_time=datetime.utcnow(),
                 time_step=time_step,
@@ -221,16 +172,39 @@ def model_regiterer(stock_symbol, time_step, rmse, model_location, scaler_locati
                 model_location=model_location,
                 scaler_location=scaler_location,
                 trained_upto_date=last_date,
-                data_points = data_points
+                data_points = data_points,
+                model_type=model_type
             )
             db.add(model)
             db.commit()
+            response_cache.invalidate_ticker(stock_symbol)
             if stock.status == AssetStatus.PENDING:
                 db.query(Stock).filter(Stock.stock_id == stock.stock_id).update({"status": AssetStatus.ACTIVE})
                 db.commit()
             print(f"Created a new model for stock {stock_symbol} with model_id {model.model_id}.")
             return model
         
+def store_hyperparameters(stock_symbol, hyperparameters):
+    """
+    Save a tuned configuration (units, input_dim, batch, ...) on the stock's prediction model.
+    Returns:
+        bool: False when the stock has no prediction model yet.
+    """
+    with get_db_context() as db:
+        model = (
+            db.query(PredictionModel)
+            .join(Stock, Stock.stock_id == PredictionModel.target_stock_id)
+            .filter(Stock.ticker_symbol == stock_symbol)
+            .first()
+        )
+        if model is None:
+            return False
+        model.hyperparameters = dict(hyperparameters)
+        db.commit()
+        print(f"Stored hyperparameters for model {model.model_id}: {hyperparameters}")
+        return True
+
+
 def store_prediction(model_id,last_actual_date,predicted_date,predicted_price,confidencescore):
     with get_db_context() as db:
         existing_prediction = db.query(StockPrediction).filter(StockPrediction.model_id==model_id,StockPrediction.predicted_date == predicted_date).first()
@@ -246,6 +220,7 @@ def store_prediction(model_id,last_actual_date,predicted_date,predicted_price,co
                 existing_prediction.prediction_generated_at = datetime.utcnow()
                 existing_prediction.confidence_score = confidencescore
                 db.commit()
+                response_cache.invalidate_model(model_id)
                 print(f"Updated existing prediction for model_id {model_id} with new values.")
             else:
                 print(f"Skipped updating prediction for model_id {model_id} as the new time delta is not greater.")
@@ -262,7 +237,57 @@ def store_prediction(model_id,last_actual_date,predicted_date,predicted_price,co
 
             db.add(pred)
             db.commit()
+            response_cache.invalidate_model(model_id)
+
+
+
+def build_prediction_upsert(model_id, last_actual_date, predicted_dates, predicted_prices, confidencescores):
+    generated_at = datetime.utcnow()
+    rows = [
+        {
+            "model_id": model_id,
+            "last_actual_data_date": last_actual_date,
+            "predicted_date": predicted_date,
+            "predicted_price": float(predicted_price),
+            "confidence_score": float(confidencescore),
+            "prediction_generated_at": generated_at,
+        }
+        for predicted_date, predicted_price, confidencescore in zip(predicted_dates, predicted_prices, confidencescores)
+    ]
+    stmt = pg_insert(StockPrediction).values(rows)
+    excluded = stmt.excluded
+    # Same rule as store_prediction: the forecast made from the closer last_actual_data_date wins.
+    # Both rows share predicted_date on conflict, so that is the one with the later last_actual_data_date.
+    return stmt.on_conflict_do_update(
+        index_elements=[StockPrediction.model_id, StockPrediction.predicted_date],
+        set_={
+            "last_actual_data_date": excluded.last_actual_data_date,
+            "predicted_price": excluded.predicted_price,
+            "confidence_score": excluded.confidence_score,
+            "prediction_generated_at": excluded.prediction_generated_at,
+        },
+        where=StockPrediction.last_actual_data_date < excluded.last_actual_data_date,
+    )
+
 
+def store_predictions(model_id, last_actual_date, predicted_dates, predicted_prices, confidencescores):
+    """
+    Write a whole forecast vector with a single INSERT ... ON CONFLICT DO UPDATE statement.
+    Relies on the unique index on stock_predictions(model_id, predicted_date).
+    Args:
+        model_id (int): The prediction model that produced the forecast.
+        last_actual_date (date): Last actual data date the forecast was made from.
+        predicted_dates (list[date]): Forecast dates.
+        predicted_prices (list[float]): Forecast prices, aligned with predicted_dates.
+        confidencescores (list[float]): Forecast standard deviations, aligned with predicted_dates.
+    """
+    if len(predicted_dates) == 0:
+        return
+    with get_db_context() as db:
+        db.execute(build_prediction_upsert(model_id, last_actual_date, predicted_dates, predicted_prices, confidencescores))
+        db.commit()
+    response_cache.invalidate_model(model_id)
+    print(f"Stored {len(predicted_dates)} predictions for model_id {model_id}.")
 
 
 def get_model_details(stock_symbol):
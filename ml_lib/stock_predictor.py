@@ -1,9 +1,7 @@
 import yfinance as yf
 import numpy as np
-import tensorflow as tf
 import matplotlib.pyplot as plt
 import os
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 import math
 import requests
@@ -11,16 +9,46 @@ import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import pickle
 from datetime import datetime, timedelta
-from ml_lib.stock_market_handlerV2 import model_regiterer,get_model_details,store_prediction
+from ml_lib.stock_market_handlerV2 import model_regiterer,get_model_details,store_prediction,store_predictions
+from ml_lib.model_registry import model_registry, model_file_path, artifact_paths, is_versioned_location
+from ml_lib.model_store import publish_model_version, gc_model_versions
+from ml_lib.global_model import uses_global_model, load_global_model
+from ml_lib.price_history import load_stock_prices
+from ml_lib.windowing import make_windows, split_index, window_dataset
 
 
-def predict_with_uncertainty(model, input_data, scaler, n_iter=50):
+def mc_dropout_samples(model, input_data, n_iter=50, seed=None):
+    """
+    Draw n_iter Monte Carlo dropout forecasts in a single batched forward pass.
+    Args:
+        model: A trained forecasting model.
+        input_data (np.ndarray): Scaled input window of shape (1, time_step, 1).
+        n_iter (int): Number of dropout samples.
+        seed (int): Optional seed for the dropout masks.
+    Returns:
+        np.ndarray: Scaled forecasts of shape (n_iter, output_dim).
+    """
+    if hasattr(model, "mc_dropout"):
+        return model.mc_dropout(input_data, n_iter=n_iter, seed=seed)
+
+    import tensorflow as tf
+
+    if seed is not None:
+        tf.random.set_seed(seed)
+    batch = np.repeat(input_data, n_iter, axis=0)
+    return model(batch, training=True).numpy()
+
+
+def predict_with_uncertainty(model, input_data, scaler, n_iter=50, batched=True, seed=None):
     try:
-        predictions = []
-        for _ in range(n_iter):
-            pred = model(input_data, training=True).numpy()
-            predictions.append(pred)
-        predictions = np.array(predictions)
+        if batched:
+            predictions = mc_dropout_samples(model, input_data, n_iter=n_iter, seed=seed)
+        else:
+            predictions = []
+            for _ in range(n_iter):
+                pred = np.asarray(model(input_data, training=True))
+                predictions.append(pred)
+            predictions = np.array(predictions)
         mean_pred = predictions.mean(axis=0).flatten()
         std_pred = predictions.std(axis=0).flatten()
         mean_pred = scaler.inverse_transform(mean_pred.reshape(-1, 1)).flatten()
@@ -31,49 +59,31 @@ def predict_with_uncertainty(model, input_data, scaler, n_iter=50):
         return None, None
 
 
-@tf.keras.utils.register_keras_serializable()
-class LSTMWithDropout(tf.keras.Model):
-    def __init__(self, units=128, output_dim=7, **kwargs):
-        super().__init__(**kwargs)
-        self.units = units
-        self.output_dim = output_dim
-        self.lstm = tf.keras.layers.LSTM(units)
-        self.dropout = tf.keras.layers.Dropout(0.2)
-        self.dense = tf.keras.layers.Dense(output_dim)
-
-    def call(self, inputs, training=False):
-        x = self.lstm(inputs)
-        x = self.dropout(x, training=training)
-        return self.dense(x)
-
-    def get_config(self):
-        config = super().get_config()
-        config.update({
-            "units": self.units,
-            "output_dim": self.output_dim
-        })
-        return config
-
-    @classmethod
-    def from_config(cls, config):
-        return cls(**config)
+def _download_stock_data(company):
+    response = yf.Ticker(company).history(period='max', interval='1d')
+    closes = response['Close'].iloc[::-1].head(2).tolist()
+    return response, closes
 
 
 def getStockData(company, starting_date=None, ending_date=None, size=None,size_dir = -1):
     try:
-        response = yf.Ticker(company).history(period='max', interval='1d')
-        # print(response.tail())
-        last_close_price = response['Close'].iloc[-1] if not response.empty else None
-        next_last_close_price = response['Close'].iloc[-2] if len(response) > 1 else None
+        stored = load_stock_prices(company, starting_date, ending_date, size, size_dir)
+        if stored is not None and len(stored[1]) > 0:
+            response, closes = stored
+        else:
+            # Not a tracked stock yet (or no stored bars); fall back to a direct yfinance download
+            response, closes = _download_stock_data(company)
+            if starting_date:
+                response = response.loc[response.index >= starting_date]
+            if ending_date:
+                response = response.loc[response.index <= ending_date]
+            if size and size_dir== 1:
+                response = response.head(size)
+            elif size:
+                response = response.tail(size)
+        last_close_price = closes[0] if len(closes) > 0 else None
+        next_last_close_price = closes[1] if len(closes) > 1 else None
         perce = ((last_close_price-next_last_close_price)/next_last_close_price)*100 if starting_date and ending_date else None
-        if starting_date:
-            response = response.loc[response.index >= starting_date]
-        if ending_date:
-            response = response.loc[response.index <= ending_date]
-        if size and size_dir== 1:
-            response = response.head(size)
-        elif size:
-            response = response.tail(size)
         last_date = response.index[-1] if not response.empty else None 
         print("point 3 pass")
         return [response,last_close_price,perce,last_date]
@@ -87,7 +97,35 @@ def mean_absolute_percentage_error(y_true, y_pred):
     y_true, y_pred = np.array(y_true), np.array(y_pred)
     return np.mean(np.abs((y_true - y_pred) / y_true)) * 100
 
-def trainer(company_name,batch=32,input_dim=90,lc=128):
+DEFAULT_HYPERPARAMETERS = {"batch": 32, "input_dim": 90, "units": 128}
+
+
+def resolve_hyperparameters(company_name, batch=None, input_dim=None, lc=None):
+    """
+    Fill in unspecified training hyperparameters from the config tuned by ml_lib.tuning
+    (PredictionModel.hyperparameters), falling back to the defaults.
+    Returns:
+        tuple: (batch, input_dim, lc)
+    """
+    tuned = dict(DEFAULT_HYPERPARAMETERS)
+    if batch is None or input_dim is None or lc is None:
+        try:
+            model_detail = get_model_details(company_name)
+            tuned.update(getattr(model_detail, "hyperparameters", None) or {})
+        except Exception as e:
+            print(f"Could not read tuned hyperparameters for {company_name}: {e}")
+    return (
+        int(batch if batch is not None else tuned["batch"]),
+        int(input_dim if input_dim is not None else tuned["input_dim"]),
+        int(lc if lc is not None else tuned["units"]),
+    )
+
+
+def trainer(company_name,batch=None,input_dim=None,lc=None):
+    import tensorflow as tf
+    from ml_lib.lstm_model import LSTMWithDropout
+
+    batch, input_dim, lc = resolve_hyperparameters(company_name, batch, input_dim, lc)
     try:
         stdata = getStockData(company_name)
         close_prices_b = stdata[0]['Close'].values
@@ -98,20 +136,16 @@ def trainer(company_name,batch=32,input_dim=90,lc=128):
         print(f"Length of dataset: {dataset_length}")
         try:
 
-            X, Y = [], []
-            for i in range(len(close_prices) - input_dim-output_dim):
-                X.append(close_prices[i:i+input_dim])
-                Y.append(close_prices[i+input_dim:i+input_dim+output_dim])
-
-            X = np.array(X).reshape(-1, input_dim, 1)
-            Y = np.array(Y)
-            X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=0.05, shuffle=False)
+            X, Y = make_windows(close_prices, input_dim, output_dim)
+            split = split_index(len(X), test_size=0.05)
+            X_test, Y_test = X[split:], Y[split:]
+            train_data = window_dataset(close_prices, 0, split, input_dim, output_dim, batch, shuffle=True)
             model = LSTMWithDropout(lc, output_dim)
             model.compile(optimizer='adam', loss=tf.keras.losses.Huber())
             model.summary()
             early_stop = tf.keras.callbacks.EarlyStopping(monitor='loss',patience=10,restore_best_weights=True,verbose=1)
 
-            model.fit(X_train,Y_train,epochs=100,batch_size=batch,callbacks=[early_stop],verbose=1)
+            model.fit(train_data,epochs=100,callbacks=[early_stop],verbose=1)
 
             prediction = model.predict(X_test)
             final_rmse = math.sqrt(mean_squared_error(Y_test.flatten(), prediction.flatten()))
@@ -124,17 +158,7 @@ def trainer(company_name,batch=32,input_dim=90,lc=128):
             print(f"Approximate Accuracy: {accuracy_percent:.2f}%")
             print(f"Final RMSE: {final_rmse:.5f}")
             print("---------------------------------------------------------------------------------------------")
-            models_folder = "trainedModels"
-            if not os.path.exists(os.path.join("ml_lib",models_folder)):
-                os.makedirs(os.path.join("ml_lib",models_folder))
-
-            scaler_file = os.path.join("ml_lib",models_folder, f"{company_name}_scaler.pkl")
-            with open(scaler_file, "wb") as f:
-                pickle.dump(scaler, f)
-            print(f"Scaler saved as '{scaler_file}'")
-            model_path = os.path.join("ml_lib",models_folder, f"{company_name}_trained_model.keras")
-            model.save(model_path)
-            print(f"Model saved as '{model_path}'")
+            published = publish_model_version(company_name, model, scaler)
             # images_folder = os.path.join("ml_lib", "images")
             # if not os.path.exists(images_folder):
             #     os.makedirs(images_folder)
@@ -152,7 +176,8 @@ def trainer(company_name,batch=32,input_dim=90,lc=128):
             #     plt.savefig(graph_path)
             #     plt.close()
             #     print(f"Graph saved as '{graph_path}'")
-            model_regiterer(company_name,time_step=input_dim,rmse=final_rmse,model_location=model_path,scaler_location=scaler_file,last_date=stdata[-1],data_points=int(dataset_length-dataset_length*0.05))
+            model_regiterer(company_name,time_step=input_dim,rmse=final_rmse,model_location=published["model_location"],scaler_location=published["scaler_location"],last_date=stdata[-1],data_points=int(dataset_length-dataset_length*0.05),model_version=published["version"])
+            gc_model_versions(company_name, published["version"])
             return model,final_rmse
         except Exception as err:
             print(f"An error occurred: {err}")
@@ -161,59 +186,170 @@ def trainer(company_name,batch=32,input_dim=90,lc=128):
         return None, None
 
 
+FINE_TUNE_EPOCHS = int(os.getenv("FINE_TUNE_EPOCHS", "5"))
+FINE_TUNE_REPLAY_BARS = int(os.getenv("FINE_TUNE_REPLAY_BARS", "250"))
+FINE_TUNE_DRIFT_RATIO = float(os.getenv("FINE_TUNE_DRIFT_RATIO", "1.5"))
+
+
+def _full_training(company_name, batch):
+    model, rmse = trainer(company_name, batch=batch) or (None, None)
+    return model, rmse, "full"
+
+
+def incremental_trainer(company_name, batch=None, epochs=FINE_TUNE_EPOCHS, replay_bars=FINE_TUNE_REPLAY_BARS,
+                        drift_ratio=FINE_TUNE_DRIFT_RATIO):
+    """
+    Warm-start the existing model on the bars added since its trained_upto_date.
+    The model is fine-tuned on replay_bars of older history up to the new bars, keeping the fitted scaler;
+    the windows whose targets fall in the new bars are held out and give the recorded RMSE.
+    Falls back to a full trainer() run when there is no usable model yet, or when the model's error on the
+    new bars exceeds drift_ratio times the RMSE recorded at its last training.
+    Returns:
+        tuple: (model, rmse, mode) where mode is "fine-tune", "full" or "up-to-date".
+    """
+    import tensorflow as tf
+    import ml_lib.lstm_model  # registers LSTMWithDropout for deserialization
+
+    model_detail = get_model_details(company_name)
+    if model_detail is not None and is_versioned_location(model_detail.model_location):
+        model_file = model_detail.model_location
+    else:
+        model_file = model_file_path(company_name)
+    scaler_file = artifact_paths(company_name, model_file, getattr(model_detail, "scaler_location", None))[1]
+    if (model_detail is None or uses_global_model(model_detail) or model_detail.trained_upto_date is None or model_detail.rmse is None
+            or not os.path.exists(model_file) or not os.path.exists(scaler_file)):
+        print(f"No model to fine-tune for {company_name}; running a full training.")
+        return _full_training(company_name, batch)
+
+    try:
+        input_dim = model_detail.time_step or 90
+        output_dim = 7
+        stdata = getStockData(company_name)
+        closes = stdata[0]['Close']
+        new_bars = int((closes.index.date > model_detail.trained_upto_date).sum())
+        if new_bars == 0:
+            print(f"{company_name} is already trained up to {model_detail.trained_upto_date}.")
+            return None, float(model_detail.rmse), "up-to-date"
+
+        with open(scaler_file, "rb") as f:
+            scaler = pickle.load(f)
+        model = tf.keras.models.load_model(model_file)
+
+        tail = closes.values[-(new_bars + replay_bars + input_dim + output_dim):]
+        series = scaler.transform(tail.reshape(-1, 1))
+        X, Y = make_windows(series, input_dim, output_dim)
+        # Windows whose targets reach into the new bars measure how far the model has drifted
+        recent = min(new_bars, len(X))
+        if recent == 0 or recent == len(X):
+            print(f"Not enough history to fine-tune {company_name}; running a full training.")
+            return _full_training(company_name, batch)
+        prediction = model.predict(X[-recent:], verbose=0)
+        drift_rmse = math.sqrt(mean_squared_error(Y[-recent:].flatten(), prediction.flatten()))
+        print(f"{company_name}: RMSE on {new_bars} new bars {drift_rmse:.5f} (trained at {float(model_detail.rmse):.5f})")
+        if drift_rmse > drift_ratio * float(model_detail.rmse):
+            print(f"Validation error drifted past {drift_ratio}x for {company_name}; running a full training.")
+            return _full_training(company_name, batch)
+
+        model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=1e-4), loss=tf.keras.losses.Huber())
+        early_stop = tf.keras.callbacks.EarlyStopping(monitor='loss',patience=2,restore_best_weights=True,verbose=1)
+        tuned = getattr(model_detail, "hyperparameters", None) or {}
+        batch = batch or tuned.get("batch", DEFAULT_HYPERPARAMETERS["batch"])
+        # The windows ending in the new bars are held out, so the recorded RMSE is a test error like trainer()'s
+        train_data = window_dataset(series, 0, len(X) - recent, input_dim, output_dim, batch, shuffle=True)
+        model.fit(train_data,epochs=epochs,callbacks=[early_stop],verbose=1)
+
+        prediction = model.predict(X[-recent:], verbose=0)
+        final_rmse = math.sqrt(mean_squared_error(Y[-recent:].flatten(), prediction.flatten()))
+        print(f"Fine-tuned {company_name}: held-out RMSE on new bars {final_rmse:.5f}")
+
+        published = publish_model_version(company_name, model, scaler)
+        model_regiterer(company_name,time_step=input_dim,rmse=final_rmse,model_location=published["model_location"],scaler_location=published["scaler_location"],last_date=stdata[-1],data_points=(model_detail.data_points or 0)+new_bars,model_version=published["version"])
+        gc_model_versions(company_name, published["version"])
+        return model, final_rmse, "fine-tune"
+    except Exception as e:
+        print(f"Error in incremental_trainer: {e}")
+        return None, None, "fine-tune"
+
+
+def recent_closes(company_name, date=None, size=90):
+    """
+    Fetch the last `size` closes up to date.
+    Returns:
+        tuple: (last_date, closes) where closes is a 1-D array.
+    """
+    previous_data = getStockData(company_name,ending_date=date,size=size)[0]['Close']
+    return previous_data.index[-1].date(), previous_data.values
+
+
+def prepare_input_window(company_name, scaler, date=None, input_dim=90):
+    """
+    Fetch the last input_dim closes up to date and scale them into a model input window.
+    Returns:
+        tuple: (last_date, window) where window has shape (1, input_dim, 1).
+    """
+    last_date, previous_data = recent_closes(company_name, date, input_dim)
+    previous_data = scaler.transform(previous_data.reshape(-1, 1)).reshape(1, input_dim, 1)
+    return last_date, previous_data
+
+
+def save_forecast(model_id, last_date, mean_prediction, std_prediction):
+    """
+    Store a forecast vector for the days following last_date.
+    Returns:
+        dict: predicted_date -> {"predicted_price", "confidence_interval"}
+    """
+    output = {}
+    predicted_dates = [last_date + timedelta(days=i + 1) for i in range(len(mean_prediction))]
+    for i, predicted_date in enumerate(predicted_dates):
+        output[predicted_date] = {
+            "predicted_price": float(mean_prediction[i]),
+            "confidence_interval": float(std_prediction[i])
+        }
+    store_predictions(
+        model_id=model_id,
+        last_actual_date=last_date,
+        predicted_dates=predicted_dates,
+        predicted_prices=mean_prediction,
+        confidencescores=std_prediction
+    )
+    return output
+
+
+def predict_global(company_name, date, model_detail, n_iter=50):
+    """Forecast one ticker with the global model its PredictionModel row points to."""
+    model = load_global_model(model_detail.model_location)
+    if model is None:
+        return None
+    last_date, previous_data = recent_closes(company_name, date, model.time_step)
+    mean_prediction, std_prediction = model.forecast(previous_data[np.newaxis, :], [company_name], n_iter=n_iter)
+    return save_forecast(model_detail.model_id, last_date, mean_prediction[0], std_prediction[0])
+
+
 def predict(company_name, date):
     try:
-        input_dim = 90
         # print(company_name,date)
         model_detail = get_model_details(company_name)
         if model_detail == None:
             print("no model details")
             return None
-        model_path = os.path.join("ml_lib","trainedModels", f"{company_name}_trained_model.keras")
-        if not os.path.exists(model_path):
-            print(f"Model file for {company_name} not found.")
-            return None
-        model = tf.keras.models.load_model(model_path)
-        scaler_file = os.path.join("ml_lib","trainedModels", f"{company_name}_scaler.pkl")
-        if not os.path.exists(scaler_file):
-            print(f"Scaler file for {company_name} not found.")
+        if uses_global_model(model_detail):
+            return predict_global(company_name, date, model_detail)
+        input_dim = model_detail.time_step or 90
+        artifacts = model_registry.get(company_name, model_detail.latest_modified_time,
+                                       model_detail.model_location, model_detail.scaler_location)
+        if artifacts is None:
             return None
+        model, scaler = artifacts
 
-        with open(scaler_file, "rb") as f:
-            scaler = pickle.load(f)
+        last_date, previous_data = prepare_input_window(company_name, scaler, date, input_dim)
 
-            previous_data = getStockData(company_name,ending_date=date,size=input_dim)[0]['Close']
-            last_date = previous_data.index[-1].date()
-            previous_data = previous_data.values
-            # print(last_date)
-
-
-            previous_data = scaler.transform(previous_data.reshape(-1, 1)).reshape(1, input_dim, 1)
-
-            mean_prediction, std_prediction = predict_with_uncertainty(model, previous_data, scaler, n_iter=50)
-            output = {}
-            if model_detail.model_id is not None:
-                for i in range(len(mean_prediction)):
-                    predicted_date = last_date + timedelta(days=i + 1)
-                    output[predicted_date] = {
-                        "predicted_price": float(mean_prediction[i]),
-                        "confidence_interval": float(std_prediction[i])
-                    }
-                    store_prediction(
-                        model_id=model_detail.model_id,
-                        last_actual_date=last_date,
-                        predicted_date=predicted_date,
-                        predicted_price=float(mean_prediction[i]),
-                        confidencescore=float(std_prediction[i])
-                    )
-            # print(std_prediction)
-            print("=================================================================================================================")
-            return output
+        mean_prediction, std_prediction = predict_with_uncertainty(model, previous_data, scaler, n_iter=50)
+        output = {}
+        if model_detail.model_id is not None:
+            output = save_forecast(model_detail.model_id, last_date, mean_prediction, std_prediction)
+        # print(std_prediction)
+        print("=================================================================================================================")
+        return output
     except Exception as e:
         print(f"Error in predict: {e}")
         return None
-
-
-
-
-
@@ -4,9 +4,10 @@ import numpy as np
 import tensorflow as tf
 import matplotlib.pyplot as plt
 import os
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 from .stock_market_handlerV2 import get_all_available_companies,get_past_history,get_data,model_regiterer
+from .windowing import make_windows, split_index, window_dataset
+from .lstm_model import inference_function
 import math
 from sklearn.preprocessing import MinMaxScaler
 import pickle
@@ -28,14 +29,13 @@ def trainerV2(company_name,batch=32,input_dim=90,lc=128):
     close_prices = scaler.fit_transform(close_prices_b.reshape(-1,1))
     try:
 
-        X, Y = [], []
-        for i in range(len(close_prices) - input_dim-output_dim):
-            X.append(close_prices[i:i+input_dim])
-            Y.append(close_prices[i+input_dim:i+input_dim+output_dim])
-
-        X = np.array(X).reshape(-1, input_dim, 1)
-        Y = np.array(Y)
-        X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=0.05, shuffle=False)
+        X, Y = make_windows(close_prices, input_dim, output_dim)
+        split = split_index(len(X), test_size=0.05)
+        X_test, Y_test = X[split:], Y[split:]
+        # Last 10% of the training windows for validation, as validation_split did
+        val_split = math.ceil(split * 0.9)
+        train_data = window_dataset(close_prices, 0, val_split, input_dim, output_dim, batch, shuffle=True)
+        val_data = window_dataset(close_prices, val_split, split, input_dim, output_dim, batch)
         model = tf.keras.Sequential()
         model.add(tf.keras.layers.LSTM(lc, input_shape=(input_dim, 1)))
         # model.add(tf.keras.layers.Dropout(0.2))
@@ -48,7 +48,7 @@ def trainerV2(company_name,batch=32,input_dim=90,lc=128):
         model.summary()
         early_stop = tf.keras.callbacks.EarlyStopping(monitor='loss',patience=5,restore_best_weights=True,verbose=1)
 
-        model.fit(X_train,Y_train,epochs=100,batch_size=batch,callbacks=[early_stop],verbose=1,validation_split=0.1)
+        model.fit(train_data,epochs=100,callbacks=[early_stop],verbose=1,validation_data=val_data)
 
         prediction = model.predict(X_test)
         final_rmse = math.sqrt(mean_squared_error(Y_test.flatten(), prediction.flatten()))
@@ -96,6 +96,7 @@ def predictV2(company_name, date):
         print(f"Model or stats file for {company_name} not found.")
         return None
     model = tf.keras.models.load_model(model_path)
+    serve = inference_function(model, input_dim)
     scaler_file = os.path.join("ml_lib",models_folder, f"{company_name}_scaler.pkl")
     if not os.path.exists(scaler_file):
         print(f"Scaler file for {company_name} not found.")
@@ -131,7 +132,7 @@ def predictV2(company_name, date):
 
         previous_data = scaler.transform(previous_data.reshape(-1, 1)).reshape(1, input_dim, 1)
 
-        prediction = model.predict(previous_data)
+        prediction = serve(previous_data.astype(np.float32)).numpy()
         
         prediction = scaler.inverse_transform(prediction.reshape(-1, 1)).flatten()  # Inverse transform predictions
 
@@ -16,10 +16,9 @@ def get_local_session():
 
 
 if __name__ == "__main__":
-    with get_local_session() as db:
-        data = db.query(Stock).all()
-    for i in data:
-        trainer(i.ticker_symbol)
+    # Trains every stock in parallel and resumes from ml_lib/trainedModels/training_jobs.json
+    from ml_lib.training_job import run_training_job
+    run_training_job()
 # predict('V','2025-04-21')
 
 
@@ -0,0 +1,197 @@
+"""
+Train the LSTM model of every stock in a process pool, resumably.
+
+Each worker process gets its own TensorFlow thread budget so the pool does not
+oversubscribe the CPU. Progress is checkpointed to a JSON job table after every
+ticker, so a restarted run skips the tickers that already finished:
+    python -m ml_lib.training_job
+    python -m ml_lib.training_job --tickers AAPL MSFT --workers 2 --threads 4
+    python -m ml_lib.training_job --force   # retrain everything
+    python -m ml_lib.training_job --force --incremental   # daily refresh: fine-tune on the new bars
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from db.dbConnect import SessionLocal
+from models.models import Stock
+from ml_lib.stock_predictor import trainer, incremental_trainer
+
+JOB_TABLE_PATH = os.getenv("TRAINING_JOB_TABLE", os.path.join("ml_lib", "trainedModels", "training_jobs.json"))
+THREADS_PER_WORKER = int(os.getenv("TRAINING_THREADS_PER_WORKER", "2"))
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def configure_thread_budget(threads):
+    """Limit the TensorFlow/BLAS threads of the current process. Must run before TensorFlow starts any op."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except RuntimeError as err:
+        print(f"Could not set the TensorFlow thread budget: {err}")
+
+
+def load_job_table(path=JOB_TABLE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_job_table(table, path=JOB_TABLE_PATH):
+    """Write the job table atomically so a crash mid-write never corrupts the checkpoint."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(table, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def train_ticker(ticker_symbol, batch=None, input_dim=None, lc=None, incremental=False):
+    """
+    Train one ticker and return its job record.
+    With incremental=True the existing model is fine-tuned on new bars instead (see incremental_trainer).
+    Returns:
+        dict: status ("done" or "failed"), mode, wallSeconds, epochs, rmse and error.
+    """
+    started = time.perf_counter()
+    record = {"status": "failed", "mode": "full", "epochs": None, "rmse": None, "error": None}
+    try:
+        if incremental:
+            model, rmse, record["mode"] = incremental_trainer(ticker_symbol, batch=batch)
+            result = (model, rmse) if rmse is not None else None
+        else:
+            result = trainer(ticker_symbol, batch=batch, input_dim=input_dim, lc=lc)
+        if result is None or result[1] is None:
+            record["error"] = "trainer did not produce a model"
+        else:
+            model, rmse = result
+            history = getattr(model, "history", None)
+            record.update({
+                "status": "done",
+                "epochs": len(history.epoch) if history is not None else 0,
+                "rmse": float(rmse),
+            })
+    except Exception as err:
+        record["error"] = str(err)
+    record["wallSeconds"] = time.perf_counter() - started
+    record["finishedAt"] = _now()
+    return record
+
+
+def get_training_tickers():
+    session = SessionLocal()
+    try:
+        return [row.ticker_symbol for row in session.query(Stock.ticker_symbol).order_by(Stock.ticker_symbol).all()]
+    finally:
+        session.close()
+
+
+def run_training_job(tickers=None, workers=None, threads_per_worker=THREADS_PER_WORKER,
+                     table_path=JOB_TABLE_PATH, force=False, batch=None, input_dim=None, lc=None, incremental=False):
+    """
+    Train every stock (or the given tickers), skipping the ones already marked done in the job table.
+    Args:
+        workers (int): Number of training processes; defaults to the cores divided by threads_per_worker.
+            With a single worker the training runs in this process.
+        threads_per_worker (int): TensorFlow intra-op threads for each worker.
+        force (bool): Retrain tickers that already completed.
+        incremental (bool): Fine-tune existing models on their new bars rather than training from scratch.
+    Returns:
+        dict: The summary of this run and the per-ticker job records.
+    """
+    started = time.perf_counter()
+    tickers = list(tickers) if tickers else get_training_tickers()
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    table = load_job_table(table_path)
+
+    pending = [t for t in tickers if force or table.get(t, {}).get("status") != "done"]
+    skipped = [t for t in tickers if t not in pending]
+    print(f"Training {len(pending)} tickers with {workers} workers x {threads_per_worker} threads "
+          f"({len(skipped)} already done).")
+
+    def record(ticker_symbol, result):
+        attempts = table.get(ticker_symbol, {}).get("attempts", 0) + 1
+        table[ticker_symbol] = dict(result, attempts=attempts)
+        save_job_table(table, table_path)
+        if result["status"] == "done":
+            print(f"{ticker_symbol}: {result.get('mode', 'full')}, {result['epochs']} epochs, RMSE {result['rmse']:.5f}, "
+                  f"{result['wallSeconds']:.1f}s")
+        else:
+            print(f"{ticker_symbol}: failed: {result['error']}")
+
+    for ticker_symbol in pending:
+        table[ticker_symbol] = dict(table.get(ticker_symbol, {}), status="pending", queuedAt=_now())
+    save_job_table(table, table_path)
+
+    if workers == 1:
+        configure_thread_budget(threads_per_worker)
+        for ticker_symbol in pending:
+            record(ticker_symbol, train_ticker(ticker_symbol, batch, input_dim, lc, incremental))
+    elif pending:
+        # spawn: TensorFlow is not fork-safe, and each child must configure its threads before importing it
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_thread_budget,
+            initargs=(threads_per_worker,),
+        ) as executor:
+            futures = {
+                executor.submit(train_ticker, ticker_symbol, batch, input_dim, lc, incremental): ticker_symbol
+                for ticker_symbol in pending
+            }
+            for future in as_completed(futures):
+                ticker_symbol = futures[future]
+                try:
+                    result = future.result()
+                except Exception as err:
+                    # The worker process itself died (e.g. out of memory)
+                    result = {"status": "failed", "epochs": None, "rmse": None, "error": str(err),
+                              "wallSeconds": None, "finishedAt": _now()}
+                record(ticker_symbol, result)
+
+    results = {t: table[t] for t in tickers if t in table}
+    return {
+        "tickers": len(tickers),
+        "trained": sum(1 for t in pending if table[t]["status"] == "done"),
+        "failed": sum(1 for t in pending if table[t]["status"] == "failed"),
+        "skipped": len(skipped),
+        "workers": workers,
+        "threadsPerWorker": threads_per_worker,
+        "totalSeconds": time.perf_counter() - started,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the LSTM models of every stock in parallel.")
+    parser.add_argument("--tickers", nargs="*", help="Only train these ticker symbols.")
+    parser.add_argument("--workers", type=int, help="Number of training processes.")
+    parser.add_argument("--threads", type=int, default=THREADS_PER_WORKER, help="TensorFlow threads per process.")
+    parser.add_argument("--table", default=JOB_TABLE_PATH, help="Path of the JSON job table checkpoint.")
+    parser.add_argument("--force", action="store_true", help="Retrain tickers that already completed.")
+    parser.add_argument("--incremental", action="store_true", help="Fine-tune existing models on their new bars.")
+    parser.add_argument("--json", action="store_true", help="Print the full summary as JSON.")
+    args = parser.parse_args()
+
+    summary = run_training_job(args.tickers, args.workers, args.threads, args.table, args.force,
+                               incremental=args.incremental)
+    if args.json:
+        print(json.dumps(summary, indent=2, default=str))
+    else:
+        print(f"Trained {summary['trained']}, failed {summary['failed']}, skipped {summary['skipped']} "
+              f"of {summary['tickers']} tickers in {summary['totalSeconds']:.1f}s")
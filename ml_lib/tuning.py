@@ -0,0 +1,215 @@
+"""
+Hyperparameter search for LSTMWithDropout, one ticker per worker process.
+
+Each ticker's search runs Hyperband-style successive halving over the stock_tuner search
+space: every configuration trains for a few epochs, only the best 1/eta are trained further,
+and so on until the largest epoch budget. The winning units / input window / batch size are
+written to PredictionModel.hyperparameters, where trainer picks them up, and each search is
+recorded under stock_tuner/<TICKER>_lstm/search.json:
+    python -m ml_lib.tuning --tickers AAPL MSFT --workers 2
+    python -m ml_lib.tuning --tickers NVDA --train   # retrain with the winning config
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.metrics import mean_squared_error
+from sklearn.preprocessing import MinMaxScaler
+
+from ml_lib.stock_market_handlerV2 import store_hyperparameters
+from ml_lib.stock_predictor import getStockData, trainer
+from ml_lib.training_job import THREADS_PER_WORKER, configure_thread_budget
+from ml_lib.windowing import make_windows, window_count, window_dataset
+
+TUNER_FOLDER = "stock_tuner"
+OUTPUT_DIM = 7
+# Same ranges as the stock_tuner/AMD_forecast search
+SEARCH_SPACE = {
+    "units": [64, 128],
+    "input_dim": [60, 90, 120],
+    "batch": [16, 32, 64],
+}
+MIN_EPOCHS = 2
+MAX_EPOCHS = 18
+ETA = 3
+
+
+def search_configs(space=SEARCH_SPACE, max_trials=None, seed=0):
+    """Every combination of the search space, shuffled and optionally capped at max_trials."""
+    names = sorted(space)
+    configs = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    np.random.default_rng(seed).shuffle(configs)
+    return configs[:max_trials] if max_trials else configs
+
+
+def rung_epochs(min_epochs=MIN_EPOCHS, max_epochs=MAX_EPOCHS, eta=ETA):
+    """Cumulative epoch budgets of the successive halving rungs, e.g. 2, 6, 18."""
+    budgets = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        budgets.append(epochs)
+        epochs *= eta
+    budgets.append(max_epochs)
+    return budgets
+
+
+def successive_halving(configs, train_and_score, budgets, eta=ETA):
+    """
+    Train every trial to the first budget, keep the best 1/eta by validation score, train those to the next
+    budget, and so on. train_and_score(trial_index, config, epochs) trains a trial up to `epochs` total
+    epochs and returns its validation RMSE (lower is better).
+    Returns:
+        list: One record per trial with its config, scores per rung and the rung it was pruned at.
+    """
+    trials = [{"trial": i, "config": config, "scores": {}, "prunedAt": None} for i, config in enumerate(configs)]
+    alive = list(trials)
+    for rung, epochs in enumerate(budgets):
+        for trial in alive:
+            score = train_and_score(trial["trial"], trial["config"], epochs)
+            trial["scores"][str(epochs)] = score if math.isfinite(score) else None
+        alive.sort(key=lambda t: t["scores"][str(epochs)] if t["scores"][str(epochs)] is not None else math.inf)
+        if rung == len(budgets) - 1:
+            break
+        keep = max(1, len(alive) // eta)
+        for trial in alive[keep:]:
+            trial["prunedAt"] = epochs
+        alive = alive[:keep]
+    return trials
+
+
+def final_score(trial):
+    score = list(trial["scores"].values())[-1]
+    return score if score is not None else math.inf
+
+
+def best_trial(trials):
+    return min((t for t in trials if t["prunedAt"] is None), key=final_score)
+
+
+def tune_ticker(ticker_symbol, space=SEARCH_SPACE, max_trials=None, min_epochs=MIN_EPOCHS, max_epochs=MAX_EPOCHS,
+                eta=ETA, seed=0):
+    """
+    Search the hyperparameters of one ticker. Validation windows are the same trailing 5% of bars that
+    trainer holds out, so every configuration is scored on the same dates whatever its input window.
+    Returns:
+        dict: ticker, best config and validation RMSE (scaled, like PredictionModel.rmse), trials and wall time.
+    """
+    import tensorflow as tf
+    from ml_lib.lstm_model import LSTMWithDropout
+
+    started = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed)
+    closes = getStockData(ticker_symbol)[0]['Close'].values
+    series = MinMaxScaler().fit_transform(closes.reshape(-1, 1))
+    val_windows = math.ceil(window_count(len(series), max(space["input_dim"]), OUTPUT_DIM) * 0.05)
+    if val_windows == 0:
+        raise ValueError(f"Not enough history to tune {ticker_symbol} ({len(series)} bars).")
+
+    models = {}
+
+    def train_and_score(trial_index, config, epochs):
+        X, Y = make_windows(series, config["input_dim"], OUTPUT_DIM)
+        split = len(X) - val_windows
+        if trial_index not in models:
+            model = LSTMWithDropout(config["units"], OUTPUT_DIM)
+            model.compile(optimizer='adam', loss=tf.keras.losses.Huber())
+            models[trial_index] = [model, 0]
+        model, done = models[trial_index]
+        train_data = window_dataset(series, 0, split, config["input_dim"], OUTPUT_DIM, config["batch"], shuffle=True)
+        model.fit(train_data, initial_epoch=done, epochs=epochs, verbose=0)
+        models[trial_index][1] = epochs
+        prediction = model.predict(X[split:], verbose=0)
+        return math.sqrt(mean_squared_error(Y[split:].flatten(), prediction.flatten()))
+
+    trials = successive_halving(search_configs(space, max_trials, seed), train_and_score,
+                                rung_epochs(min_epochs, max_epochs, eta), eta)
+    best = best_trial(trials)
+    return {
+        "ticker": ticker_symbol,
+        "best": dict(best["config"]),
+        "valRmse": final_score(best),
+        "trials": trials,
+        "wallSeconds": time.perf_counter() - started,
+    }
+
+
+def save_search(result):
+    folder = os.path.join(TUNER_FOLDER, f"{result['ticker']}_lstm")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, "search.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def run_tuning(tickers, workers=None, threads_per_worker=THREADS_PER_WORKER, train=False, **search):
+    """
+    Tune several tickers in a process pool, store each winner on its PredictionModel and optionally retrain.
+    Returns:
+        dict: Per-ticker best config and validation RMSE, or the error.
+    """
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    results = {}
+
+    def finish(ticker_symbol, result):
+        path = save_search(result)
+        print(f"{ticker_symbol}: best {result['best']} (val RMSE {result['valRmse']:.5f}), "
+              f"{result['wallSeconds']:.1f}s, trials saved to '{path}'")
+        if not store_hyperparameters(ticker_symbol, result["best"]):
+            print(f"No prediction model for {ticker_symbol} yet; pass --train to train one with this config.")
+        results[ticker_symbol] = {"best": result["best"], "valRmse": result["valRmse"]}
+
+    if workers == 1:
+        configure_thread_budget(threads_per_worker)
+        for ticker_symbol in tickers:
+            try:
+                finish(ticker_symbol, tune_ticker(ticker_symbol, **search))
+            except Exception as e:
+                print(f"Error tuning {ticker_symbol}: {e}")
+                results[ticker_symbol] = {"error": str(e)}
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tickers)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_thread_budget,
+            initargs=(threads_per_worker,),
+        ) as executor:
+            futures = {executor.submit(tune_ticker, ticker_symbol, **search): ticker_symbol for ticker_symbol in tickers}
+            for future in as_completed(futures):
+                ticker_symbol = futures[future]
+                try:
+                    finish(ticker_symbol, future.result())
+                except Exception as e:
+                    print(f"Error tuning {ticker_symbol}: {e}")
+                    results[ticker_symbol] = {"error": str(e)}
+
+    if train:
+        for ticker_symbol, result in results.items():
+            if "best" in result:
+                best = result["best"]
+                trainer(ticker_symbol, batch=best["batch"], input_dim=best["input_dim"], lc=best["units"])
+                store_hyperparameters(ticker_symbol, best)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the LSTM forecasting models.")
+    parser.add_argument("--tickers", nargs="+", required=True, help="Ticker symbols to tune.")
+    parser.add_argument("--workers", type=int, help="Number of tuning processes (one ticker each).")
+    parser.add_argument("--threads", type=int, default=THREADS_PER_WORKER, help="TensorFlow threads per process.")
+    parser.add_argument("--max-trials", type=int, help="Cap on the number of sampled configurations.")
+    parser.add_argument("--min-epochs", type=int, default=MIN_EPOCHS, help="Epoch budget of the first rung.")
+    parser.add_argument("--max-epochs", type=int, default=MAX_EPOCHS, help="Epoch budget of the last rung.")
+    parser.add_argument("--eta", type=int, default=ETA, help="Keep the best 1/eta trials at every rung.")
+    parser.add_argument("--train", action="store_true", help="Retrain each ticker with its winning config.")
+    args = parser.parse_args()
+
+    summary = run_tuning(args.tickers, args.workers, args.threads, args.train, max_trials=args.max_trials,
+                         min_epochs=args.min_epochs, max_epochs=args.max_epochs, eta=args.eta)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def window_count(series_length, input_dim=90, output_dim=7):
+    """Number of (input, target) windows the trainers cut from a series."""
+    return max(series_length - input_dim - output_dim, 0)
+
+
+def make_windows(series, input_dim=90, output_dim=7):
+    """
+    Cut a series into overlapping (input, target) windows without copying it.
+    Args:
+        series (np.ndarray): Scaled prices of shape (n,) or (n, 1).
+        input_dim (int): Length of each input window.
+        output_dim (int): Number of following prices to predict.
+    Returns:
+        tuple: Read-only views X of shape (windows, input_dim, 1) and Y of shape (windows, output_dim).
+    """
+    series = np.asarray(series).reshape(-1)
+    count = window_count(len(series), input_dim, output_dim)
+    if count == 0:
+        return np.empty((0, input_dim, 1), series.dtype), np.empty((0, output_dim), series.dtype)
+    windows = sliding_window_view(series, input_dim + output_dim)[:count]
+    return windows[:, :input_dim, np.newaxis], windows[:, input_dim:]
+
+
+def split_index(count, test_size):
+    """Index of the first held-out window, matching train_test_split(..., shuffle=False)."""
+    return count - math.ceil(count * test_size)
+
+
+def window_dataset(series, start, stop, input_dim=90, output_dim=7, batch_size=32, shuffle=False):
+    """
+    tf.data pipeline over windows [start, stop) of a series.
+    Only the series and the window start indices are held; each batch of windows is gathered on the fly,
+    so memory stays proportional to the series length rather than windows x input_dim.
+    """
+    import tensorflow as tf
+
+    values = tf.constant(np.asarray(series, dtype=np.float32).reshape(-1))
+    offsets = tf.range(input_dim + output_dim, dtype=tf.int64)
+
+    def gather(starts):
+        windows = tf.gather(values, starts[:, tf.newaxis] + offsets)
+        return windows[:, :input_dim, tf.newaxis], windows[:, input_dim:]
+
+    dataset = tf.data.Dataset.range(start, stop)
+    if shuffle:
+        dataset = dataset.shuffle(max(stop - start, 1), reshuffle_each_iteration=True)
+    return (
+        dataset.batch(batch_size)
+        .map(gather, num_parallel_calls=tf.data.AUTOTUNE)
+        .prefetch(tf.data.AUTOTUNE)
+    )
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, String, DateTime, Enum, Integer, Boolean, JSON, Date, ForeignKey, Numeric, BigInteger, \
-    Text
+    Text, Index
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base
@@ -103,6 +103,14 @@ class StockPriceHistorical(Base):
     # Relationship
     stock = relationship("Stock", back_populates="historical_prices")
 
+    # One bar per stock and day; required by the ON CONFLICT upsert in ingest_price_frame and serves the
+    # per-stock tail/range scans of ml_lib.price_query. On PostgreSQL the table is range-partitioned by
+    # year of price_date with a BRIN index on it (db/scripts/stock_price_historical_partitioning.sql);
+    # there the primary key is (id, price_date), and id alone stays unique.
+    __table_args__ = (
+        Index("uq_stock_price_historical_stock_date", "stock_id", "price_date", unique=True),
+    )
+
     def __repr__(self):
         return f"<StockPriceHistorical(stock_id={self.stock_id}, date='{self.price_date}', close={self.close_price})>"
 
@@ -122,6 +130,8 @@ class PredictionModel(Base):
     scaler_location = Column(Text)
     trained_upto_date = Column(Date, nullable=True)
     data_points = Column(Integer, nullable=False)
+    hyperparameters = Column(JSON, nullable=True)
+    model_type = Column(String(20), nullable=True, default="ticker")  # "ticker" or "global"
 
     # Relationships
     target_stock = relationship("Stock", back_populates="prediction_models")
@@ -143,6 +153,11 @@ class StockPrediction(Base):
     predicted_price = Column(Numeric(19, 4))
     confidence_score = Column(Numeric(19, 4), nullable=False)
 
+    # One forecast per model and day; required by the ON CONFLICT upsert in store_predictions
+    __table_args__ = (
+        Index("uq_stock_predictions_model_date", "model_id", "predicted_date", unique=True),
+    )
+
     # Relationship
     model = relationship("PredictionModel", back_populates="predictions")
 
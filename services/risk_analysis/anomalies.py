@@ -5,6 +5,7 @@ import pandas as pd
 from yfinance import Ticker
 
 from classes.Risk_Components import AnomalyDetectionResponse, AnomalyFlag, HistoricalDataPoint
+from ml_lib.price_store import price_store
 
 
 class AnomalyDetectionService:
@@ -20,7 +21,9 @@ class AnomalyDetectionService:
 
         try:
             # Get historical data
-            hist = self.ticker_data.history(start=start_date, end=end_date)
+            hist = price_store.history_frame(self.ticker, start_date, end_date)
+            if hist is None:
+                hist = self.ticker_data.history(start=start_date, end=end_date)
             if hist.empty:
                 return AnomalyDetectionResponse(flags=[], anomaly_score=0, historical_data=[])
 
@@ -10,6 +10,7 @@ import yfinance as yf
 from yfinance import Ticker
 
 from models.models import QuantitativeRiskAnalysis
+from ml_lib.price_store import price_store
 from services.llm.llm import generate_content_with_llm, LLMProvider, WriterModel
 from services.utils import calculate_risk_scores, to_python_type, get_stock_by_ticker, parse_llm_json_response, \
     calculate_volume_change
@@ -171,7 +172,9 @@ class QuantitativeRiskService:
 
         try:
             # Get historical price data
-            hist = self.ticker_data.history(start=start_date, end=end_date)
+            hist = price_store.history_frame(self.ticker, start_date, end_date)
+            if hist is None:
+                hist = self.ticker_data.history(start=start_date, end=end_date)
             if hist.empty:
                 raise ValueError(f"No historical data available for {self.ticker}")
 
@@ -189,8 +192,15 @@ class QuantitativeRiskService:
                 if beta is not None:
                     beta = float(beta)
                 else:
-                    market_data = yf.Ticker('^GSPC').history(start=start_date, end=end_date)  # S&P 500 as market index
+                    market_data = price_store.history_frame('^GSPC', start_date, end_date)  # S&P 500 as market index
+                    if market_data is None:
+                        market_data = yf.Ticker('^GSPC').history(start=start_date, end=end_date)
                     market_returns = market_data['Close'].pct_change().dropna()
+                    # Cached bars are indexed by naive dates, yfinance bars by exchange-local timestamps
+                    if daily_returns.index.tz is not None:
+                        daily_returns.index = daily_returns.index.tz_localize(None)
+                    if market_returns.index.tz is not None:
+                        market_returns.index = market_returns.index.tz_localize(None)
 
                     # Align both series to have matching dates
                     common_idx = daily_returns.index.intersection(market_returns.index)
@@ -0,0 +1,18 @@
+"""
+In-memory SQLite database shared by the tests that run against the ORM models. Each test module creates
+and drops the tables it needs on this engine and patches SessionLocal with TestingSessionLocal.
+"""
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER primary keys
+    return "INTEGER"
+
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from models.models import Base, Stock, AssetStatus, PredictionModel, StockPrediction
+from ml_lib import controllers
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, PredictionModel.__table__, StockPrediction.__table__]
+
+
+def fake_history(s_date, e_date, st_id=None, st_sym=None):
+    return {
+        "ticker": st_sym,
+        "currentPrice": 100.0,
+        "priceChange": 1.0,
+        "history": [{"date": "2025-01-10", "price": 100.0, "volume": 10.0}],
+    }
+
+
+class TestBatchPredictions(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        for stock_id, ticker in ((1, "AAPL"), (2, "TSLA"), (3, "NOMODEL")):
+            db.add(Stock(stock_id=stock_id, ticker_symbol=ticker, status=AssetStatus.ACTIVE))
+        for model_id, stock_id in ((1, 1), (2, 2)):
+            db.add(PredictionModel(model_id=model_id, model_version="v1", target_stock_id=stock_id, is_active=True,
+                                   latest_modified_time=datetime(2025, 1, 1), rmse=0.1, data_points=100))
+        # AAPL already has a full week of forecasts, TSLA has none.
+        for i in range(7):
+            db.add(StockPrediction(prediction_id=i + 1, model_id=1, last_actual_data_date=date(2025, 1, 10),
+                                   predicted_date=date(2025, 1, 11) + timedelta(days=i),
+                                   predicted_price=101 + i, confidence_score=1))
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def _fill_tsla(self, ticker_symbol, last_date):
+        db = TestingSessionLocal()
+        for i in range(7):
+            db.add(StockPrediction(prediction_id=100 + i, model_id=2, last_actual_data_date=date(2025, 1, 10),
+                                   predicted_date=date(2025, 1, 11) + timedelta(days=i),
+                                   predicted_price=200 + i, confidence_score=2))
+        db.commit()
+        db.close()
+
+    @patch("ml_lib.controllers.get_stock_history", side_effect=fake_history)
+    @patch("ml_lib.controllers.SessionLocal", TestingSessionLocal)
+    def test_only_tickers_with_gaps_run_inference(self, _history):
+        with patch("ml_lib.controllers.predict", side_effect=self._fill_tsla) as mock_predict:
+            results = dict(controllers.get_predictions_batch(
+                ["AAPL", "TSLA", "NOMODEL", "MISSING", "AAPL"], "2025-01-01", "2025-01-10"))
+
+        mock_predict.assert_called_once_with("TSLA", "2025-01-10")
+        self.assertEqual(set(results), {"AAPL", "TSLA", "NOMODEL", "MISSING"})
+        self.assertEqual(len(results["AAPL"]["predictionData"]["predictions"]), 7)
+        self.assertEqual(results["TSLA"]["predictionData"]["nextWeek"]["predicted"], 206.0)
+        self.assertEqual(results["AAPL"]["modelMetadata"]["version"], "v1")
+        self.assertIn("error", results["NOMODEL"])
+        self.assertIn("error", results["MISSING"])
+
+    @patch("ml_lib.controllers.get_stock_history", side_effect=fake_history)
+    @patch("ml_lib.controllers.SessionLocal", TestingSessionLocal)
+    def test_preload_skips_forecasts_before_the_lookback(self, _history):
+        db = TestingSessionLocal()
+        db.add(StockPrediction(prediction_id=50, model_id=1, last_actual_data_date=date(2024, 6, 1),
+                               predicted_date=date(2024, 6, 3), predicted_price=90, confidence_score=1))
+        db.commit()
+        db.close()
+
+        with patch("ml_lib.controllers._batch_ticker_prediction", return_value={}) as ticker_prediction:
+            dict(controllers.get_predictions_batch(["AAPL"], "2024-01-01", "2025-01-10"))
+        preloaded = ticker_prediction.call_args.args[2]
+        self.assertEqual(sorted(p.prediction_id for p in preloaded), list(range(1, 8)))
+
+    @patch("ml_lib.controllers.get_stock_history", side_effect=fake_history)
+    @patch("ml_lib.controllers.SessionLocal", TestingSessionLocal)
+    def test_stored_forecasts_after_an_old_last_bar_are_used(self, _history):
+        with patch("ml_lib.controllers.predict") as mock_predict:
+            results = dict(controllers.get_predictions_batch(["AAPL"], "2025-01-01", "2025-02-15"))
+
+        mock_predict.assert_not_called()
+        self.assertEqual(len(results["AAPL"]["predictionData"]["predictions"]), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from ml_lib import model_registry as registry_module
+from ml_lib.benchmark import discover_models, run_benchmark
+
+TRAINED_MODELS = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ml_lib/trainedModels'))
+
+
+def fake_prices(ticker_symbol, end_date=None):
+    if ticker_symbol == "MSFT":
+        return None
+    index = pd.bdate_range("2024-01-01", periods=200)
+    return pd.Series(180 + 10 * np.sin(np.arange(200) / 15), index=index)
+
+
+def fake_time_steps(tickers):
+    return {"AAPL": 90}
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for ticker in ("AAPL", "MSFT"):
+            for suffix in ("_lstm.npz", "_scaler.pkl"):
+                shutil.copy(os.path.join(TRAINED_MODELS, ticker + suffix), tmp.name)
+        folder_patch = patch.object(registry_module, "MODELS_FOLDER", tmp.name)
+        folder_patch.start()
+        self.addCleanup(folder_patch.stop)
+
+    def test_discovers_models_on_disk(self):
+        os.makedirs(os.path.join(registry_module.MODELS_FOLDER, "_global", "20250101T000000"))
+        models = discover_models()
+        self.assertEqual(list(models), ["AAPL", "MSFT"])
+        self.assertTrue(models["AAPL"][0].endswith("AAPL_lstm.npz"))
+
+    def test_report_is_json_with_latency_and_error_metrics(self):
+        report = run_benchmark(origins=10, n_iter=5, price_loader=fake_prices, time_step_loader=fake_time_steps)
+        report = json.loads(json.dumps(report))
+
+        aapl = report["tickers"]["AAPL"]
+        self.assertEqual(aapl["origins"], 10)
+        self.assertEqual(set(aapl["latency"]), {"p50Ms", "p90Ms", "p99Ms", "meanMs"})
+        self.assertGreater(aapl["residentBytes"], 0)
+        self.assertGreaterEqual(aapl["mape"], 0)
+        self.assertIn("error", report["tickers"]["MSFT"])
+        self.assertEqual((report["summary"]["tickers"], report["summary"]["succeeded"]), (2, 1))
+
+    def test_windows_follow_the_model_time_step(self):
+        report = run_benchmark(["AAPL"], origins=500, n_iter=5, price_loader=fake_prices,
+                               time_step_loader=lambda tickers: {"AAPL": 60})
+        aapl = report["tickers"]["AAPL"]
+        self.assertEqual(aapl["timeStep"], 60)
+        # 200 bars leave 200 - 60 - 7 + 1 origins once the window is 60 bars long
+        self.assertEqual(aapl["origins"], 134)
+        self.assertEqual(aapl["firstOrigin"], str(pd.bdate_range("2024-01-01", periods=200)[60].date()))
+
+        report = run_benchmark(["AAPL"], origins=500, n_iter=5, price_loader=fake_prices,
+                               time_step_loader=lambda tickers: {})
+        self.assertEqual(report["tickers"]["AAPL"]["timeStep"], 90)
+
+    def test_seeded_runs_are_repeatable(self):
+        first = run_benchmark(["AAPL"], origins=5, n_iter=5, price_loader=fake_prices, time_step_loader=fake_time_steps)
+        second = run_benchmark(["AAPL"], origins=5, n_iter=5, price_loader=fake_prices, time_step_loader=fake_time_steps)
+        self.assertEqual(first["tickers"]["AAPL"]["mape"], second["tickers"]["AAPL"]["mape"])
+
+
+if __name__ == '__main__':
+    unittest.main()
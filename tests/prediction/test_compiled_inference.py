@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from ml_lib.lstm_model import LSTMWithDropout, inference_function
+from ml_lib.model_registry import load_model_artifacts
+
+TRAINED_MODELS = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ml_lib/trainedModels'))
+
+
+class TestCompiledInference(unittest.TestCase):
+    def setUp(self):
+        self.model = LSTMWithDropout(units=8)
+        self.windows = np.random.default_rng(0).random((5, 30, 1)).astype(np.float32)
+        self.expected = self.model(self.windows, training=False).numpy()
+
+    def test_graph_matches_eager_without_retracing(self):
+        self.model.compile_inference(time_step=30)
+        self.assertEqual(self.model.tracing_count(), 3)
+
+        np.testing.assert_allclose(self.model.serve(self.windows).numpy(), self.expected, atol=1e-6)
+        self.model.serve(self.windows[:1])
+        self.model.mc_dropout(self.windows[:1], n_iter=50, seed=0)
+        self.model.mc_dropout(self.windows[:1], n_iter=7, seed=0)
+        self.assertEqual(self.model.tracing_count(), 3)
+
+    def test_mc_dropout_is_unchanged_by_compilation(self):
+        eager = self.model.mc_dropout(self.windows[:1], n_iter=20, seed=3)
+        self.model.compile_inference(time_step=30)
+        np.testing.assert_allclose(self.model.mc_dropout(self.windows[:1], n_iter=20, seed=3), eager, atol=1e-6)
+
+    def test_other_keras_models_are_wrapped(self):
+        sequential = tf.keras.Sequential([tf.keras.Input((30, 1)), tf.keras.layers.LSTM(4), tf.keras.layers.Dense(7)])
+        serve = inference_function(sequential, time_step=30)
+        np.testing.assert_allclose(serve(self.windows).numpy(), sequential(self.windows).numpy(), atol=1e-6)
+        self.assertEqual(serve.experimental_get_tracing_count(), 1)
+
+    def test_loaded_keras_models_are_warmed(self):
+        model, _ = load_model_artifacts(os.path.join(TRAINED_MODELS, "AAPL_trained_model.keras"),
+                                        os.path.join(TRAINED_MODELS, "AAPL_scaler.pkl"))
+        self.assertEqual(model.tracing_count(), 3)
+        window = np.random.default_rng(1).random((1, 90, 1)).astype(np.float32)
+        np.testing.assert_allclose(model.serve(window).numpy(), model(window, training=False).numpy(), atol=1e-5)
+        self.assertEqual(model.tracing_count(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
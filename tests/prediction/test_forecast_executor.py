@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ml_lib.forecast_executor import SingleFlight, run_forecast
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def slow_forecast(self, ticker, last_date):
+        self.calls += 1
+        self.release.wait(5)
+        return f"{ticker}@{last_date}"
+
+    def run_concurrently(self, keys):
+        with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+            futures = [pool.submit(self.flights.do, key, self.slow_forecast, *key) for key in keys]
+            # Let every caller join its flight before the leader returns
+            while self.flights.leaders + self.flights.coalesced < len(keys):
+                time.sleep(0.01)
+            self.release.set()
+            return [f.result() for f in futures]
+
+    def test_concurrent_calls_for_same_key_run_once(self):
+        results = self.run_concurrently([("AAPL", "2025-04-21")] * 5)
+
+        self.assertEqual(results, ["AAPL@2025-04-21"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flights.stats(), {"inFlight": 0, "leaders": 1, "coalesced": 4})
+
+    def test_different_keys_are_not_coalesced(self):
+        self.run_concurrently([("AAPL", "2025-04-21"), ("AAPL", "2025-04-22"), ("TSLA", "2025-04-21")])
+        self.assertEqual(self.calls, 3)
+
+    def test_errors_reach_every_waiter_and_release_the_key(self):
+        def failing():
+            raise ValueError("no data")
+
+        with self.assertRaises(ValueError):
+            self.flights.do("key", failing)
+        self.assertEqual(self.flights.do("key", lambda: "ok"), "ok")
+
+
+class TestRunForecast(unittest.TestCase):
+    def test_blocking_work_does_not_stall_the_event_loop(self):
+        async def scenario():
+            ticks = []
+
+            async def ticker():
+                for _ in range(5):
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+
+            result, _ = await asyncio.gather(run_forecast(time.sleep, 0.2), ticker())
+            return result, ticks
+
+        result, ticks = asyncio.run(scenario())
+        self.assertIsNone(result)
+        self.assertLess(ticks[-1] - ticks[0], 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
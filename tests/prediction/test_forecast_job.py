@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from models.models import Base, Stock, AssetStatus, PredictionModel
+from ml_lib import forecast_job
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, PredictionModel.__table__]
+
+
+class TestForecastJob(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE))
+        db.add(Stock(stock_id=2, ticker_symbol="TSLA", status=AssetStatus.ACTIVE))
+        db.add(Stock(stock_id=3, ticker_symbol="PEND", status=AssetStatus.PENDING))
+        for model_id, stock_id in ((1, 1), (2, 2), (3, 3)):
+            db.add(PredictionModel(model_id=model_id, model_version="v1", target_stock_id=stock_id, is_active=True,
+                                   latest_modified_time=datetime(2025, 1, 1), time_step=90, data_points=100))
+        db.commit()
+        db.close()
+        self.session_patch = patch("ml_lib.forecast_job.SessionLocal", TestingSessionLocal)
+        self.session_patch.start()
+
+    def tearDown(self):
+        self.session_patch.stop()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def test_only_active_stocks_are_forecast(self):
+        self.assertEqual([t for t, _ in forecast_job.get_active_models()], ["AAPL", "TSLA"])
+        self.assertEqual([t for t, _ in forecast_job.get_active_models(["TSLA"])], ["TSLA"])
+
+    def test_run_collects_timings_and_failures(self):
+        def fake_forecast(ticker_symbol, model_detail, date=None, n_iter=50):
+            if ticker_symbol == "TSLA":
+                raise ValueError("no artifacts")
+            return {"lastActualDate": "2025-01-10",
+                    "timings": {"load": 0.5, "data": 0.25, "inference": 1.0, "store": 0.125}}
+
+        with patch("ml_lib.forecast_job.forecast_ticker", side_effect=fake_forecast):
+            stats = forecast_job.run_forecast_job()
+
+        self.assertEqual(stats["tickers"], 2)
+        self.assertEqual(stats["succeeded"], 1)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["phaseSeconds"]["inference"], 1.0)
+        self.assertEqual({r["ticker"]: r["status"] for r in stats["results"]}, {"AAPL": "ok", "TSLA": "error"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from ml_lib import forecast_job, global_model, model_registry
+from ml_lib.lstm_model import GlobalLSTMWithDropout
+from ml_lib.numpy_lstm import NumpyGlobalLSTM, normalize_windows
+
+
+def price_frame(seed, periods=160):
+    rng = np.random.default_rng(seed)
+    closes = (50 + 10 * seed) * np.exp(np.cumsum(rng.normal(0, 0.01, periods)))
+    return pd.DataFrame({"Close": closes}, index=pd.bdate_range("2024-01-01", periods=periods))
+
+
+class TestGlobalModel(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        folder_patch = patch.object(model_registry, "MODELS_FOLDER", tmp.name)
+        folder_patch.start()
+        self.addCleanup(folder_patch.stop)
+        self.frames = {"AAPL": price_frame(1), "MSFT": price_frame(2), "NEW": price_frame(3)}
+
+    def test_numpy_forward_pass_matches_keras(self):
+        model = GlobalLSTMWithDropout(num_tickers=2, units=8, embedding_dim=3)
+        windows = np.random.default_rng(0).random((3, 20, 1)).astype(np.float32)
+        ids = np.array([0, 1, 2])
+        expected = model((windows, ids)).numpy()
+
+        numpy_model = NumpyGlobalLSTM.from_keras(model, ["AAPL", "MSFT"], time_step=20)
+        np.testing.assert_allclose(numpy_model(windows, ids), expected, atol=1e-5)
+        self.assertEqual(list(numpy_model.ticker_ids(["MSFT", "NEW"])), [2, 0])
+
+    def test_windows_are_normalized_per_series(self):
+        data = global_model.build_global_windows({t: f["Close"] for t, f in self.frames.items()}, input_dim=20)
+        windows, ids, targets = data["arrays"]["train"]
+
+        self.assertEqual(data["tickers"], ["AAPL", "MSFT", "NEW"])
+        self.assertEqual(set(ids), {1, 2, 3})
+        np.testing.assert_allclose(windows[:, -1], 0.0, atol=1e-6)
+        self.assertLess(np.abs(targets).max(), 1.0)
+
+    def test_trained_model_forecasts_seen_and_unseen_tickers_in_one_pass(self):
+        with patch("ml_lib.stock_predictor.getStockData",
+                   side_effect=lambda ticker: [self.frames[ticker], None, None, self.frames[ticker].index[-1]]):
+            trained = global_model.train_global_model(["AAPL", "MSFT"], input_dim=20, units=4, embedding_dim=2,
+                                                      epochs=1)
+
+        model = global_model.load_global_model(trained["model_location"])
+        self.assertIs(model, global_model.load_global_model())
+        self.assertEqual(model.tickers, ["AAPL", "MSFT"])
+        windows = np.stack([self.frames[t]["Close"].values[-20:] for t in ("AAPL", "NEW")])
+        mean, std = model.forecast(windows, ["AAPL", "NEW"], n_iter=20, seed=0)
+        self.assertEqual(mean.shape, (2, 7))
+        self.assertTrue(np.all(std >= 0))
+
+        normalized, _ = normalize_windows(windows)
+        batched = model(normalized[..., np.newaxis], model.ticker_ids(["AAPL", "NEW"]))
+        single = model(normalized[1:, :, np.newaxis], model.ticker_ids(["NEW"]))
+        np.testing.assert_allclose(batched[1:], single, atol=1e-6)
+
+    def test_forecast_job_batches_global_tickers(self):
+        model = NumpyGlobalLSTM.from_keras(self._keras_model(), ["AAPL", "MSFT"], time_step=20)
+        details = [(t, SimpleNamespace(model_id=i, model_type="global", model_location="x/model.keras"))
+                   for i, t in enumerate(("AAPL", "MSFT", "NEW"))]
+        saved = []
+        with patch.object(forecast_job, "get_active_models", return_value=details), \
+                patch.object(forecast_job, "load_global_model", return_value=model), \
+                patch.object(forecast_job, "recent_closes",
+                             side_effect=lambda t, d, size: (date(2024, 8, 1), self.frames[t]["Close"].values[-size:])), \
+                patch.object(forecast_job, "save_forecast", side_effect=lambda *args: saved.append(args)), \
+                patch.object(model, "forecast", wraps=model.forecast) as forecast:
+            stats = forecast_job.run_forecast_job()
+
+        self.assertEqual(stats["succeeded"], 3)
+        forecast.assert_called_once()
+        self.assertEqual(sorted(args[0] for args in saved), [0, 1, 2])
+
+    def _keras_model(self):
+        model = GlobalLSTMWithDropout(2, 4, embedding_dim=2)
+        model((np.zeros((1, 20, 1), dtype=np.float32), np.zeros(1, dtype=np.int32)))
+        return model
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import pickle
+import tempfile
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from ml_lib.lstm_model import LSTMWithDropout
+from ml_lib import model_registry, stock_predictor
+
+
+class TestIncrementalTrainer(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.models_folder = tmp.name
+        version_dir = os.path.join(tmp.name, "TEST", "v0")
+        os.makedirs(version_dir)
+        self.model_file = os.path.join(version_dir, "model.keras")
+        self.scaler_file = os.path.join(version_dir, "scaler.pkl")
+
+        index = pd.bdate_range("2024-01-01", periods=400)
+        self.frame = pd.DataFrame({"Close": 100 + np.sin(np.arange(400) / 10)}, index=index)
+        scaler = MinMaxScaler().fit(self.frame[["Close"]].values)
+        with open(self.scaler_file, "wb") as f:
+            pickle.dump(scaler, f)
+        model = LSTMWithDropout(8, 7)
+        model(np.zeros((1, 90, 1), dtype=np.float32))
+        model.save(self.model_file)
+
+        self.detail = SimpleNamespace(trained_upto_date=index[389].date(), rmse=10.0, time_step=90, data_points=300,
+                                      model_location=self.model_file, scaler_location=self.scaler_file)
+        patches = {
+            "get_model_details": lambda ticker: self.detail,
+            "getStockData": lambda ticker: [self.frame, None, None, self.frame.index[-1]],
+        }
+        for name, replacement in patches.items():
+            patcher = patch.object(stock_predictor, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        folder_patch = patch.object(model_registry, "MODELS_FOLDER", self.models_folder)
+        folder_patch.start()
+        self.addCleanup(folder_patch.stop)
+        self.trainer = self.start_mock("trainer", return_value=("full-model", 0.1))
+        self.registerer = self.start_mock("model_regiterer")
+
+    def start_mock(self, name, **kwargs):
+        patcher = patch.object(stock_predictor, name, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_fine_tunes_on_new_bars_and_records_date(self):
+        model, rmse, mode = stock_predictor.incremental_trainer("TEST", epochs=1, replay_bars=20)
+
+        self.assertEqual(mode, "fine-tune")
+        self.trainer.assert_not_called()
+        kwargs = self.registerer.call_args.kwargs
+        self.assertNotEqual(kwargs["model_location"], self.model_file)
+        self.assertTrue(os.path.exists(os.path.join(os.path.dirname(kwargs["model_location"]), "model.npz")))
+        self.assertEqual(kwargs["model_version"], os.path.basename(os.path.dirname(kwargs["model_location"])))
+        self.assertEqual(kwargs["last_date"], self.frame.index[-1])
+        self.assertEqual(kwargs["data_points"], 310)
+        self.assertAlmostEqual(kwargs["rmse"], rmse)
+        self.assertEqual(len(model.history.epoch), 1)
+
+    def test_new_bar_windows_are_held_out_of_the_fine_tune(self):
+        dataset = self.start_mock("window_dataset", wraps=stock_predictor.window_dataset)
+
+        stock_predictor.incremental_trainer("TEST", epochs=1, replay_bars=20)
+        # 127 bars give 30 windows; the last 10 end in new bars and only score the model
+        self.assertEqual(dataset.call_args.args[1:3], (0, 20))
+
+    def test_counts_new_bars_when_data_points_is_unset(self):
+        self.detail.data_points = None
+
+        stock_predictor.incremental_trainer("TEST", epochs=1, replay_bars=20)
+        self.assertEqual(self.registerer.call_args.kwargs["data_points"], 10)
+
+    def test_skips_when_no_new_bars(self):
+        self.detail.trained_upto_date = self.frame.index[-1].date()
+
+        self.assertEqual(stock_predictor.incremental_trainer("TEST")[2], "up-to-date")
+        self.registerer.assert_not_called()
+        self.trainer.assert_not_called()
+
+    def test_drift_triggers_full_retrain(self):
+        self.detail.rmse = 1e-9
+
+        self.assertEqual(stock_predictor.incremental_trainer("TEST", epochs=1), ("full-model", 0.1, "full"))
+        self.registerer.assert_not_called()
+
+    def test_missing_model_triggers_full_retrain(self):
+        self.detail = None
+
+        self.assertEqual(stock_predictor.incremental_trainer("TEST")[2], "full")
+        self.trainer.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from ml_lib import model_registry as registry_module
+from ml_lib.model_registry import ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder_patch = patch.object(registry_module, "MODELS_FOLDER", self.tmp.name)
+        self.folder_patch.start()
+        for ticker in ("AAPL", "TSLA", "MSFT"):
+            self._touch(ticker)
+
+        self.scaler = MagicMock(spec=[])
+        self.scaler.data_range_ = np.ones(1)
+        self.loader = MagicMock(side_effect=lambda model_file, scaler_file: (MagicMock(weights=[]), self.scaler))
+
+    def tearDown(self):
+        self.folder_patch.stop()
+        self.tmp.cleanup()
+
+    def _touch(self, ticker, mtime=1000):
+        for path in (registry_module.model_file_path(ticker), registry_module.scaler_file_path(ticker)):
+            with open(path, "wb") as f:
+                f.write(b"x")
+            os.utime(path, (mtime, mtime))
+
+    def test_second_lookup_is_a_hit(self):
+        registry = ModelRegistry(max_size=2, loader=self.loader)
+        first = registry.get("AAPL", "2025-01-01")
+        second = registry.get("AAPL", "2025-01-01")
+
+        self.assertIs(first[0], second[0])
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertEqual(registry.stats()["hits"], 1)
+        self.assertEqual(registry.stats()["misses"], 1)
+
+    def test_retrain_invalidates_entry(self):
+        registry = ModelRegistry(max_size=2, loader=self.loader)
+        registry.get("AAPL", "2025-01-01")
+        registry.get("AAPL", "2025-02-01")
+        self._touch("AAPL", mtime=2000)
+        registry.get("AAPL", "2025-02-01")
+
+        stats = registry.stats()
+        self.assertEqual(self.loader.call_count, 3)
+        self.assertEqual(stats["invalidations"], 2)
+        self.assertEqual(stats["size"], 1)
+
+    def test_least_recently_used_is_evicted(self):
+        registry = ModelRegistry(max_size=2, loader=self.loader)
+        registry.get("AAPL")
+        registry.get("TSLA")
+        registry.get("AAPL")
+        registry.get("MSFT")
+
+        stats = registry.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(sorted(m["ticker"] for m in stats["models"]), ["AAPL", "MSFT"])
+
+    def test_missing_artifacts_return_none(self):
+        registry = ModelRegistry(loader=self.loader)
+        self.assertIsNone(registry.get("NOPE"))
+        self.loader.assert_not_called()
+
+    def test_resident_bytes_counts_weights_and_scaler(self):
+        model = MagicMock(weights=[np.zeros((4, 8), dtype=np.float32), np.zeros(8, dtype=np.float32)])
+        self.assertEqual(registry_module.resident_bytes(model, self.scaler), (32 + 8) * 4 + 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
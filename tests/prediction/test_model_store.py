@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from ml_lib import model_registry as registry_module
+from ml_lib.lstm_model import LSTMWithDropout
+from ml_lib.model_registry import ModelRegistry
+from ml_lib.model_store import publish_model_version, gc_model_versions, list_model_versions
+from ml_lib.numpy_lstm import NumpyLSTM
+
+
+def build_model(seed):
+    np.random.seed(seed)
+    model = LSTMWithDropout(4, 7)
+    model(np.zeros((1, 90, 1), dtype=np.float32))
+    model.lstm.set_weights([np.random.rand(*w.shape).astype(np.float32) for w in model.lstm.get_weights()])
+    return model
+
+
+class TestModelStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.folder = tmp.name
+        folder_patch = patch.object(registry_module, "MODELS_FOLDER", self.folder)
+        folder_patch.start()
+        self.addCleanup(folder_patch.stop)
+        self.scaler = MinMaxScaler().fit(np.array([[0.0], [10.0]]))
+
+    def test_publish_writes_an_immutable_content_addressed_version(self):
+        model = build_model(0)
+        published = publish_model_version("AAPL", model, self.scaler)
+        version_dir = os.path.dirname(published["model_location"])
+
+        self.assertEqual(os.path.basename(version_dir), published["version"])
+        self.assertEqual(sorted(os.listdir(version_dir)), ["model.keras", "model.npz", "scaler.pkl"])
+        self.assertEqual(publish_model_version("AAPL", model, self.scaler), published)
+        self.assertEqual(list_model_versions("AAPL"), [published["version"]])
+
+    def test_registry_swaps_to_the_new_version(self):
+        registry = ModelRegistry()
+        first = publish_model_version("AAPL", build_model(0), self.scaler)
+        second = publish_model_version("AAPL", build_model(1), self.scaler)
+        self.assertNotEqual(first["version"], second["version"])
+
+        old_model, _ = registry.get("AAPL", "t1", first["model_location"], first["scaler_location"])
+        new_model, _ = registry.get("AAPL", "t2", second["model_location"], second["scaler_location"])
+
+        self.assertIsInstance(new_model, NumpyLSTM)
+        self.assertFalse(np.array_equal(old_model.kernel, new_model.kernel))
+        self.assertEqual(registry.stats()["invalidations"], 1)
+
+    def test_gc_keeps_newest_versions_and_the_active_one(self):
+        versions = []
+        for seed in range(4):
+            published = publish_model_version("AAPL", build_model(seed), self.scaler)
+            version_dir = os.path.dirname(published["model_location"])
+            os.utime(version_dir, (1000 + seed, 1000 + seed))
+            versions.append(published["version"])
+
+        removed = gc_model_versions("AAPL", active_version=versions[0], keep=2)
+
+        self.assertEqual(removed, [versions[1]])
+        self.assertEqual(sorted(list_model_versions("AAPL")), sorted([versions[0], versions[2], versions[3]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
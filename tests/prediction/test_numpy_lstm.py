@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import glob
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+import ml_lib.lstm_model  # registers LSTMWithDropout for deserialization
+from ml_lib.numpy_lstm import NumpyLSTM
+
+MODELS_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ml_lib/trainedModels'))
+SUFFIX = "_trained_model.keras"
+
+
+class TestNumpyLSTMParity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.keras_files = sorted(glob.glob(os.path.join(MODELS_FOLDER, f"*{SUFFIX}")))
+        cls.windows = np.random.default_rng(0).random((4, 90, 1)).astype(np.float32)
+
+    def test_trained_models_match_keras(self):
+        self.assertTrue(self.keras_files)
+        for keras_file in self.keras_files:
+            ticker = os.path.basename(keras_file)[:-len(SUFFIX)]
+            with self.subTest(ticker=ticker):
+                model = tf.keras.models.load_model(keras_file)
+                expected = model(self.windows, training=False).numpy()
+
+                np.testing.assert_allclose(NumpyLSTM.from_keras(model)(self.windows), expected, atol=1e-5)
+
+                npz_file = os.path.join(MODELS_FOLDER, f"{ticker}_lstm.npz")
+                if os.path.exists(npz_file):
+                    np.testing.assert_allclose(NumpyLSTM.load(npz_file)(self.windows), expected, atol=1e-5)
+
+    def test_mc_dropout_is_seeded_and_centred(self):
+        model = NumpyLSTM.load(os.path.join(MODELS_FOLDER, "AAPL_lstm.npz"))
+        window = self.windows[:1]
+        first = model.mc_dropout(window, n_iter=2000, seed=7)
+        second = model.mc_dropout(window, n_iter=2000, seed=7)
+
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(first.shape, (2000, 7))
+        np.testing.assert_allclose(first.mean(axis=0), model(window)[0], atol=5e-3)
+
+    def test_save_and_load_round_trip(self):
+        model = NumpyLSTM.load(os.path.join(MODELS_FOLDER, "AAPL_lstm.npz"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.npz")
+            model.save(path)
+            np.testing.assert_array_equal(NumpyLSTM.load(path)(self.windows), model(self.windows))
+
+
+if __name__ == '__main__':
+    unittest.main()
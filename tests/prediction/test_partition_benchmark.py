@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from datetime import date
+
+from sqlalchemy import create_engine
+
+from ml_lib.partition_benchmark import business_days_start, run_partition_benchmark
+
+
+class TestPartitionBenchmark(unittest.TestCase):
+    def test_business_days_start(self):
+        # 2025-01-03 is a Friday; five business days go back to Monday 2024-12-30
+        self.assertEqual(business_days_start(5, date(2025, 1, 3)), date(2024, 12, 30))
+        self.assertEqual(business_days_start(1, date(2025, 1, 3)), date(2025, 1, 3))
+        self.assertEqual(business_days_start(1, date(2025, 1, 5)), date(2025, 1, 3))
+
+    def test_requires_postgresql(self):
+        with self.assertRaises(ValueError):
+            run_partition_benchmark(create_engine("sqlite://"), stocks=1, days=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
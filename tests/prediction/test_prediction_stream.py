@@ -0,0 +1,115 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from API import prediction
+from models.models import Base, Stock, AssetStatus, PredictionModel, StockPrediction, StockPriceHistorical
+from ml_lib import controllers
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, PredictionModel.__table__, StockPrediction.__table__, StockPriceHistorical.__table__]
+
+app = FastAPI()
+app.include_router(prediction.router)
+client = TestClient(app)
+
+
+def read_events(response):
+    return [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+@patch("ml_lib.controllers.refresh_stock_prices", return_value=0)
+@patch("ml_lib.controllers.SessionLocal", TestingSessionLocal)
+class TestPredictionStream(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE))
+        db.add(Stock(stock_id=2, ticker_symbol="NOMODEL", status=AssetStatus.ACTIVE))
+        for stock_id in (1, 2):
+            for i, day in enumerate(["2025-01-08", "2025-01-09", "2025-01-10"]):
+                db.add(StockPriceHistorical(stock_id=stock_id, price_date=datetime.fromisoformat(day),
+                                            open_price=98 + i, high_price=98 + i, low_price=98 + i,
+                                            close_price=98 + i, volume=10))
+        db.add(PredictionModel(model_id=1, model_version="v1", target_stock_id=1, is_active=True,
+                               latest_modified_time=datetime(2025, 1, 1), rmse=0.1, data_points=100))
+        for i in range(7):
+            db.add(StockPrediction(prediction_id=i + 1, model_id=1, last_actual_data_date=date(2025, 1, 10),
+                                   predicted_date=date(2025, 1, 11) + timedelta(days=i),
+                                   predicted_price=101 + i, confidence_score=1))
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def _stream(self, ticker_symbol):
+        body = {"ticker_symbol": ticker_symbol, "starting_date": "2025-01-01", "ending_date": "2025-01-10"}
+        response = client.post("/V2/get-predicted-prices/stream", json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        return read_events(response)
+
+    def test_sections_stream_in_order(self, *_):
+        events = self._stream("AAPL")
+
+        self.assertEqual([e["type"] for e in events], ["stockData", "predictionData", "modelMetadata", "complete"])
+        self.assertEqual(events[0]["data"]["history"][-1], {"date": "2025-01-10", "price": 100.0, "volume": 10.0})
+        self.assertEqual(events[0]["data"]["currentPrice"], 100.0)
+        self.assertEqual(events[1]["data"]["nextWeek"]["predicted"], 107.0)
+        self.assertEqual(events[2]["data"]["version"], "v1")
+
+    def test_history_is_sent_before_a_failing_forecast(self, *_):
+        events = self._stream("NOMODEL")
+
+        self.assertEqual([e["type"] for e in events], ["stockData", "error", "complete"])
+        self.assertIn("No active prediction model", events[1]["message"])
+
+    def test_get_predictions_assembles_the_same_sections(self, *_):
+        result = controllers.get_predictions("AAPL", "2025-01-01", "2025-01-10")
+
+        self.assertEqual(list(result), ["stockData", "predictionData", "modelMetadata"])
+        self.assertEqual(len(result["predictionData"]["predictions"]), 7)
+        self.assertIn("error", controllers.get_predictions("NOMODEL", "2025-01-01", "2025-01-10"))
+        self.assertIn("not found", controllers.get_predictions("MISSING", "2025-01-01", "2025-01-10")["error"])
+
+    def test_stored_forecasts_are_read_in_one_session(self, *_):
+        with patch("ml_lib.controllers.SessionLocal", side_effect=TestingSessionLocal) as sessions, \
+                patch("ml_lib.controllers.predict") as mock_predict:
+            result = controllers.get_predictions("AAPL", "2025-01-01", "2025-01-10")
+
+        self.assertEqual(sessions.call_count, 1)
+        mock_predict.assert_not_called()
+        self.assertEqual(result["predictionData"]["predictions"][0]["date"], date(2025, 1, 11))
+
+    def test_stored_forecasts_after_an_old_last_bar_are_used(self, *_):
+        # ending_date is weeks past the last bar, so its forecasts fall before the preloaded window
+        with patch("ml_lib.controllers.predict") as mock_predict:
+            result = controllers.get_predictions("AAPL", "2025-01-01", "2025-02-15")
+
+        mock_predict.assert_not_called()
+        self.assertEqual(len(result["predictionData"]["predictions"]), 7)
+
+    def test_missing_days_run_inference_once(self, *_):
+        db = TestingSessionLocal()
+        db.query(StockPrediction).filter(StockPrediction.prediction_id == 7).delete()
+        db.commit()
+        db.close()
+
+        with patch("ml_lib.controllers.predict") as mock_predict:
+            result = controllers.get_predictions("AAPL", "2025-01-01", "2025-01-10")
+
+        mock_predict.assert_called_once_with("AAPL", "2025-01-10")
+        self.assertEqual(len(result["predictionData"]["predictions"]), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
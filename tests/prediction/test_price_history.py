@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from models.models import Base, Stock, AssetStatus, StockPriceHistorical
+from ml_lib import price_history
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, StockPriceHistorical.__table__]
+
+
+def yf_frame(days, start_price):
+    index = pd.DatetimeIndex([pd.Timestamp(d, tz="America/New_York") for d in days])
+    closes = [start_price + i for i in range(len(days))]
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes,
+                         "Volume": [1000] * len(days)}, index=index)
+
+
+class TestPriceHistory(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE,
+                     last_data_point_date=date(2025, 1, 8)))
+        for i, day in enumerate(["2025-01-06", "2025-01-07", "2025-01-08"]):
+            db.add(StockPriceHistorical(stock_id=1, price_date=datetime.fromisoformat(day),
+                                        open_price=10 + i, high_price=10 + i, low_price=10 + i,
+                                        close_price=10 + i, volume=100))
+        db.commit()
+        db.close()
+        price_history._last_refresh.clear()
+        self.session_patch = patch("ml_lib.price_history.SessionLocal", TestingSessionLocal)
+        self.session_patch.start()
+
+    def tearDown(self):
+        self.session_patch.stop()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def test_range_and_tail_queries(self):
+        frame, closes = price_history.load_stock_prices("AAPL", ending_date="2025-01-07", refresh=False)
+        self.assertEqual(list(frame["Close"]), [10.0, 11.0])
+        self.assertEqual(closes, [12.0, 11.0])
+
+        frame, _ = price_history.load_stock_prices("AAPL", size=2, refresh=False)
+        self.assertEqual([d.day for d in frame.index], [7, 8])
+
+        frame, _ = price_history.load_stock_prices("AAPL", starting_date="2025-01-07", size=1, size_dir=1,
+                                                   refresh=False)
+        self.assertEqual(list(frame["Close"]), [11.0])
+
+    def test_unknown_ticker_returns_none(self):
+        self.assertIsNone(price_history.load_stock_prices("NOPE", refresh=False))
+
+    @patch("ml_lib.price_history.yf.Ticker")
+    def test_top_up_fetches_only_trailing_bars(self, mock_ticker):
+        mock_ticker.return_value.history.return_value = yf_frame(["2025-01-08", "2025-01-09", "2025-01-10"], 50)
+
+        frame, closes = price_history.load_stock_prices("AAPL")
+        history_kwargs = mock_ticker.return_value.history.call_args.kwargs
+        self.assertEqual(history_kwargs["start"], date(2025, 1, 8))
+        self.assertEqual(list(frame["Close"]), [10.0, 11.0, 50.0, 51.0, 52.0])
+        self.assertEqual(closes, [52.0, 51.0])
+
+        db = TestingSessionLocal()
+        self.assertEqual(db.query(Stock).first().last_data_point_date, date(2025, 1, 10))
+        db.close()
+
+        # A second read inside the refresh interval does not hit yfinance again
+        price_history.load_stock_prices("AAPL")
+        self.assertEqual(mock_ticker.return_value.history.call_count, 1)
+
+    @patch("ml_lib.price_history.yf.Ticker")
+    def test_failed_top_up_is_retried_on_the_next_read(self, mock_ticker):
+        mock_ticker.return_value.history.side_effect = [
+            RuntimeError("rate limited"), pd.DataFrame(), yf_frame(["2025-01-08", "2025-01-09"], 50),
+        ]
+
+        for _ in range(3):
+            price_history.load_stock_prices("AAPL")
+        frame, _ = price_history.load_stock_prices("AAPL")
+        self.assertEqual(mock_ticker.return_value.history.call_count, 3)
+        self.assertEqual(list(frame["Close"]), [10.0, 11.0, 50.0, 51.0])
+
+    def test_bulk_ingest_upserts_in_chunks(self):
+        frame = yf_frame(["2025-01-03", "2025-01-06", "2025-01-07", "2025-01-08", "2025-01-09"], 20)
+        frame.loc[frame.index[-1], "Volume"] = float("nan")
+
+        db = TestingSessionLocal()
+        for _ in range(2):
+            self.assertEqual(price_history.ingest_price_frame(db, 1, frame, chunk_size=2), 5)
+            db.commit()
+
+        rows = db.query(StockPriceHistorical).order_by(StockPriceHistorical.price_date).all()
+        self.assertEqual([float(r.close_price) for r in rows], [20.0, 21.0, 22.0, 23.0, 24.0])
+        self.assertIsNone(rows[-1].volume)
+        stock = db.query(Stock).first()
+        self.assertEqual((stock.first_data_point_date, stock.last_data_point_date),
+                         (date(2025, 1, 3), date(2025, 1, 9)))
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
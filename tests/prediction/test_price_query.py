@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from models.models import Base, Stock, AssetStatus, StockPriceHistorical
+from ml_lib import price_query
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, StockPriceHistorical.__table__]
+
+
+class TestPriceQuery(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        self.db = TestingSessionLocal()
+        self.db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE))
+        self.db.add(Stock(stock_id=2, ticker_symbol="MSFT", status=AssetStatus.ACTIVE))
+        for stock_id in (1, 2):
+            for day in range(2, 8):
+                self.db.add(StockPriceHistorical(stock_id=stock_id, price_date=datetime(2025, 1, day),
+                                                 open_price=day, high_price=day, low_price=day,
+                                                 close_price=100 * stock_id + day, volume=None if day == 7 else 10))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def test_tail_returns_the_last_bars_ascending(self):
+        bars = price_query.tail(self.db, 1, 3)
+        self.assertEqual(bars.dtype, price_query.PRICE_DTYPE)
+        np.testing.assert_array_equal(bars["close"], [105.0, 106.0, 107.0])
+        self.assertEqual(str(bars["date"][-1].astype("datetime64[D]")), "2025-01-07")
+        self.assertTrue(np.isnan(bars["volume"][-1]))
+
+    def test_range_is_inclusive_and_per_stock(self):
+        bars = price_query.range(self.db, 2, "2025-01-03", datetime(2025, 1, 5))
+        np.testing.assert_array_equal(bars["close"], [203.0, 204.0, 205.0])
+        self.assertEqual(len(price_query.range(self.db, 2)), 6)
+        self.assertEqual(len(price_query.tail(self.db, 3, 5)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
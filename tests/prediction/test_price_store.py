@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+from models.models import Base, Stock, AssetStatus, StockPriceHistorical
+from ml_lib.price_store import PriceStore
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, StockPriceHistorical.__table__]
+
+
+def add_bars(stock_id, days, close_offset=0):
+    db = TestingSessionLocal()
+    for day in days:
+        db.merge(StockPriceHistorical(id=stock_id * 100 + day, stock_id=stock_id, price_date=datetime(2025, 1, day),
+                                      open_price=day, high_price=day, low_price=day,
+                                      close_price=day + close_offset, volume=10))
+    db.commit()
+    db.close()
+
+
+class TestPriceStore(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE))
+        db.add(Stock(stock_id=2, ticker_symbol="GONE", status=AssetStatus.BLACKLIST))
+        db.commit()
+        db.close()
+        add_bars(1, [2, 3, 6])
+        add_bars(2, [2])
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = PriceStore(self.directory.name)
+        self.session_patch = patch("ml_lib.price_store.SessionLocal", TestingSessionLocal)
+        self.session_patch.start()
+
+    def tearDown(self):
+        self.session_patch.stop()
+        self.directory.cleanup()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def test_refresh_writes_memory_mapped_files(self):
+        stats = self.store.refresh()
+        self.assertEqual((stats["tickers"], stats["barsRead"]), (1, 3))
+        self.assertIsNone(self.store.get("GONE"))
+
+        bars = self.store.get("AAPL")
+        self.assertIsInstance(bars, np.memmap)
+        self.assertFalse(bars.flags.writeable)
+        np.testing.assert_array_equal(bars["close"], [2.0, 3.0, 6.0])
+        self.assertIs(self.store.get("AAPL"), bars)
+
+    def test_incremental_refresh_appends_and_replaces_the_last_bar(self):
+        self.store.refresh()
+        add_bars(1, [6, 7, 8], close_offset=0.5)
+        self.assertEqual(self.store.refresh()["barsRead"], 3)
+
+        bars = self.store.get("AAPL")
+        np.testing.assert_array_equal(bars["close"], [2.0, 3.0, 6.5, 7.5, 8.5])
+        self.assertEqual(self.store.refresh()["barsRead"], 1)
+
+    def test_read_slices_without_copying(self):
+        self.store.refresh()
+        view = self.store.read("AAPL", start="2025-01-03", end=datetime(2025, 1, 6))
+        np.testing.assert_array_equal(view["close"], [3.0, 6.0])
+        self.assertTrue(np.shares_memory(view, self.store.get("AAPL")))
+        np.testing.assert_array_equal(self.store.read("AAPL", n=2)["close"], [3.0, 6.0])
+        self.assertIsNone(self.store.read("MSFT"))
+
+    def test_history_frame_skips_stale_tickers(self):
+        self.store.refresh()
+        frame = self.store.history_frame("AAPL", end="2025-01-07")
+        self.assertEqual(list(frame.columns), ["Open", "High", "Low", "Close", "Volume"])
+        self.assertEqual(list(frame["Close"]), [2.0, 3.0, 6.0])
+        self.assertIsNone(self.store.history_frame("AAPL", end="2025-02-01"))
+
+    def test_history_frame_excludes_end_like_yfinance(self):
+        self.store.refresh()
+        frame = self.store.history_frame("AAPL", start="2025-01-02", end="2025-01-06")
+        self.assertEqual(list(frame["Close"]), [2.0, 3.0])
+        frame = self.store.history_frame("AAPL", start="2025-01-02", end=datetime(2025, 1, 6, 15, 30))
+        self.assertEqual(list(frame["Close"]), [2.0, 3.0, 6.0])
+
+    def test_history_frame_needs_bars_from_start(self):
+        self.store.refresh()
+        # 2024-12-30 to the first bar on 2025-01-02 is within the slack, 2024-12-20 is not
+        self.assertEqual(len(self.store.history_frame("AAPL", start="2024-12-30", end="2025-01-07")), 3)
+        self.assertIsNone(self.store.history_frame("AAPL", start="2024-12-20", end="2025-01-07"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import time
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from models.models import Base, Stock, AssetStatus, StockPriceHistorical
+from ml_lib import price_sync_job
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, StockPriceHistorical.__table__]
+
+
+def download_frame(tickers, days, missing=()):
+    """A group_by="ticker" multi-symbol yf.download result; `missing` tickers did not trade on the last day."""
+    index = pd.DatetimeIndex(days, name="Date")
+    data = {}
+    for offset, ticker in enumerate(tickers):
+        closes = np.arange(len(days), dtype=np.float64) + 10 * (offset + 1)
+        if ticker in missing:
+            closes[-1] = np.nan
+        for field in ("Open", "High", "Low", "Close"):
+            data[(ticker, field)] = closes
+        data[(ticker, "Volume")] = np.full(len(days), 1000.0)
+    return pd.DataFrame(data, index=index)
+
+
+class TestPriceSyncJob(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE,
+                     first_data_point_date=date(2025, 1, 6), last_data_point_date=date(2025, 1, 8)))
+        db.add(Stock(stock_id=2, ticker_symbol="MSFT", status=AssetStatus.ACTIVE,
+                     first_data_point_date=date(2025, 1, 6), last_data_point_date=date(2025, 1, 8)))
+        db.add(Stock(stock_id=3, ticker_symbol="NEW", status=AssetStatus.PENDING))
+        db.add(Stock(stock_id=4, ticker_symbol="GONE", status=AssetStatus.BLACKLIST))
+        db.add(StockPriceHistorical(stock_id=1, price_date=datetime(2025, 1, 8), open_price=1, high_price=1,
+                                    low_price=1, close_price=1, volume=1))
+        db.commit()
+        db.close()
+        self.session_patch = patch("ml_lib.price_sync_job.SessionLocal", TestingSessionLocal)
+        self.session_patch.start()
+
+    def tearDown(self):
+        self.session_patch.stop()
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def test_tickers_are_grouped_by_last_data_point_date(self):
+        db = TestingSessionLocal()
+        groups = price_sync_job.stocks_by_staleness(db)
+        db.close()
+        self.assertEqual(list(groups), [None, date(2025, 1, 8)])
+        self.assertEqual(groups[date(2025, 1, 8)], [(1, "AAPL"), (2, "MSFT")])
+
+    @patch("ml_lib.price_sync_job.yf.download")
+    def test_sync_upserts_batches_and_advances_dates(self, mock_download):
+        def fake_download(tickers, **kwargs):
+            if "period" in kwargs:
+                return download_frame(tickers, ["2025-01-02", "2025-01-03"])
+            self.assertEqual(kwargs["start"], date(2025, 1, 8))
+            return download_frame(tickers, ["2025-01-08", "2025-01-09", "2025-01-10"], missing=("MSFT",))
+
+        mock_download.side_effect = fake_download
+        stats = price_sync_job.run_price_sync(batch_size=2, workers=2)
+
+        self.assertEqual(mock_download.call_count, 2)
+        self.assertEqual((stats["tickers"], stats["batches"], stats["barsWritten"]), (3, 2, 7))
+        self.assertEqual(stats["failed"], [])
+
+        db = TestingSessionLocal()
+        dates = {s.ticker_symbol: (s.first_data_point_date, s.last_data_point_date) for s in db.query(Stock)}
+        self.assertEqual(dates["AAPL"], (date(2025, 1, 6), date(2025, 1, 10)))
+        self.assertEqual(dates["MSFT"], (date(2025, 1, 6), date(2025, 1, 9)))
+        self.assertEqual(dates["NEW"], (date(2025, 1, 2), date(2025, 1, 3)))
+        self.assertEqual(dates["GONE"], (None, None))
+        # The re-fetched 2025-01-08 bar replaced the stored one instead of duplicating it
+        aapl = db.query(StockPriceHistorical).filter(StockPriceHistorical.stock_id == 1).count()
+        self.assertEqual(aapl, 3)
+        db.close()
+
+    @patch("ml_lib.price_sync_job.yf.download")
+    def test_downloads_never_overlap(self, mock_download):
+        running, overlaps = [], []
+
+        def fake_download(tickers, **kwargs):
+            overlaps.append(bool(running))
+            running.append(1)
+            time.sleep(0.01)
+            running.pop()
+            return download_frame(tickers, ["2025-01-09"])
+
+        mock_download.side_effect = fake_download
+        price_sync_job.run_price_sync(batch_size=1, workers=4)
+        self.assertEqual(mock_download.call_count, 3)
+        self.assertFalse(any(overlaps))
+        self.assertEqual(mock_download.call_args.kwargs["threads"], 4)
+
+    @patch("ml_lib.price_sync_job.store_batch", return_value=0)
+    @patch("ml_lib.price_sync_job.yf.download")
+    def test_downloads_stay_one_batch_ahead_of_the_writes(self, mock_download, mock_store):
+        downloads_when_stored = []
+        mock_download.side_effect = lambda tickers, **kwargs: download_frame(tickers, ["2025-01-09"])
+        mock_store.side_effect = lambda *args: downloads_when_stored.append(mock_download.call_count) or 0
+
+        price_sync_job.run_price_sync(batch_size=1)
+        # When batch n is stored, at most batch n + 1 has been downloaded
+        for stored, downloaded in enumerate(downloads_when_stored, start=1):
+            self.assertLessEqual(downloaded, stored + 1)
+
+    def test_data_point_dates_never_move_backwards(self):
+        db = TestingSessionLocal()
+        written = price_sync_job.store_batch(db, [(1, "AAPL")],
+                                             {"AAPL": download_frame(["AAPL"], ["2025-01-07"])["AAPL"]})
+        db.commit()
+        stock = db.query(Stock).filter(Stock.stock_id == 1).one()
+        self.assertEqual(written, 1)
+        self.assertEqual((stock.first_data_point_date, stock.last_data_point_date),
+                         (date(2025, 1, 6), date(2025, 1, 8)))
+        db.close()
+
+    def test_partitions_are_only_created_on_postgresql(self):
+        db = TestingSessionLocal()
+        self.assertEqual(price_sync_job.ensure_price_partitions(db, today=date(2025, 12, 31)), [])
+        db.close()
+
+    @patch("ml_lib.price_sync_job.yf.download", side_effect=RuntimeError("rate limited"))
+    def test_failed_batches_are_reported(self, _):
+        stats = price_sync_job.run_price_sync(tickers=["AAPL", "MSFT"])
+        self.assertEqual(stats["failed"], ["AAPL", "MSFT"])
+        self.assertEqual(stats["barsWritten"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from ml_lib import model_registry as registry_module
+from ml_lib.model_registry import ModelRegistry, artifact_paths
+from ml_lib.numpy_lstm import NumpyLSTM, QuantizedNumpyLSTM, load_numpy_model, quantize_weight
+from ml_lib.quantization import precision_report
+
+TRAINED_MODELS = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../ml_lib/trainedModels'))
+
+
+def fake_prices(ticker_symbol, end_date=None):
+    index = pd.bdate_range("2024-01-01", periods=200)
+    return pd.Series(180 + 10 * np.sin(np.arange(200) / 15), index=index)
+
+
+class TestQuantizedNumpyLSTM(unittest.TestCase):
+    def setUp(self):
+        self.model = NumpyLSTM.load(os.path.join(TRAINED_MODELS, "AAPL_lstm.npz"))
+        self.windows = np.random.default_rng(0).random((4, 90, 1)).astype(np.float32)
+
+    def test_int8_uses_one_scale_per_tensor(self):
+        stored, scale = quantize_weight(np.array([-2.0, 0.5, 1.0]), "int8")
+        self.assertEqual(stored.dtype, np.int8)
+        self.assertEqual(list(stored), [-127, 32, 64])
+        np.testing.assert_allclose(stored * scale, [-2.0, 0.5, 1.0], atol=scale / 2)
+        with self.assertRaises(ValueError):
+            quantize_weight(np.zeros(3), "int4")
+
+    def test_reduced_precision_forecasts_stay_close(self):
+        expected = self.model(self.windows)
+        for precision, atol in (("float16", 1e-3), ("int8", 2e-2)):
+            with self.subTest(precision=precision):
+                quantized = QuantizedNumpyLSTM.from_model(self.model, precision)
+                np.testing.assert_allclose(quantized(self.windows), expected, atol=atol)
+                self.assertEqual(quantized.mc_dropout(self.windows[:1], n_iter=3, seed=1).shape, (3, 7))
+
+    def test_resident_weights_shrink(self):
+        full = sum(w.nbytes for w in self.model.weights)
+        self.assertEqual(sum(w.nbytes for w in QuantizedNumpyLSTM.from_model(self.model, "float16").weights), full // 2)
+        self.assertEqual(sum(w.nbytes for w in QuantizedNumpyLSTM.from_model(self.model, "int8").weights), full // 4)
+
+    def test_save_and_load_round_trip(self):
+        quantized = QuantizedNumpyLSTM.from_model(self.model, "int8")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.int8.npz")
+            quantized.save(path)
+            loaded = load_numpy_model(path)
+            self.assertIsInstance(loaded, QuantizedNumpyLSTM)
+            self.assertEqual(loaded.precision, "int8")
+            np.testing.assert_array_equal(loaded(self.windows), quantized(self.windows))
+            self.assertNotIsInstance(load_numpy_model(os.path.join(TRAINED_MODELS, "AAPL_lstm.npz")),
+                                     QuantizedNumpyLSTM)
+
+
+class TestPrecisionServingAndReport(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.folder = tmp.name
+        for suffix in ("_lstm.npz", "_scaler.pkl"):
+            shutil.copy(os.path.join(TRAINED_MODELS, "AAPL" + suffix), tmp.name)
+        folder_patch = patch.object(registry_module, "MODELS_FOLDER", tmp.name)
+        folder_patch.start()
+        self.addCleanup(folder_patch.stop)
+
+    def test_report_compares_precisions_without_touching_models(self):
+        report = json.loads(json.dumps(precision_report(origins=5, n_iter=5, price_loader=fake_prices,
+                                                         time_step_loader=lambda tickers: {})))
+
+        aapl = report["tickers"]["AAPL"]
+        self.assertEqual(list(aapl), ["float32", "float16", "int8"])
+        self.assertEqual(aapl["float32"]["memoryRatio"], 1.0)
+        self.assertAlmostEqual(aapl["int8"]["memoryRatio"], 0.25, places=2)
+        self.assertLess(abs(aapl["int8"]["deltaMape"]), 1.0)
+        self.assertGreater(aapl["int8"]["maxWeightError"], 0)
+        self.assertLess(report["summary"]["int8"]["residentBytes"], report["summary"]["float32"]["residentBytes"])
+        self.assertEqual(sorted(os.listdir(self.folder)), ["AAPL_lstm.npz", "AAPL_scaler.pkl"])
+
+    def test_exported_precision_is_served_when_selected(self):
+        precision_report(precisions=["int8"], origins=5, n_iter=5, price_loader=fake_prices, export=True,
+                         time_step_loader=lambda tickers: {})
+        self.assertTrue(artifact_paths("AAPL")[0].endswith("AAPL_lstm.npz"))
+
+        with patch.object(registry_module, "MODEL_PRECISION", "int8"):
+            model_file, _ = artifact_paths("AAPL")
+            self.assertTrue(model_file.endswith("AAPL_lstm.int8.npz"))
+            model, _ = ModelRegistry().get("AAPL")
+            self.assertIsInstance(model, QuantizedNumpyLSTM)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from models.models import Base, Stock, AssetStatus, PredictionModel, StockPrediction
+from ml_lib import controllers, stock_market_handlerV2
+from ml_lib.response_cache import ResponseCache
+from sqlite_support import engine, TestingSessionLocal
+
+TABLES = [Stock.__table__, PredictionModel.__table__, StockPrediction.__table__]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(max_size=2, ttl=60, clock=self.clock)
+
+    def test_hits_until_the_model_version_changes(self):
+        calls = []
+        compute = lambda: calls.append(1) or {"ok": len(calls)}
+        key = ("V2", "AAPL", "2025-01-01", "2025-01-10")
+
+        self.assertEqual(self.cache.get_or_compute(key, (1, "a", "t1"), compute), {"ok": 1})
+        self.assertEqual(self.cache.get_or_compute(key, (1, "a", "t1"), compute), {"ok": 1})
+        self.assertEqual(self.cache.get_or_compute(key, (1, "b", "t2"), compute), {"ok": 2})
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 2, 1))
+        self.assertAlmostEqual(stats["hitRate"], 1 / 3)
+
+    def test_entries_expire_and_evict(self):
+        self.cache.put(("V2", "AAPL"), (1,), {"v": 1})
+        self.clock.now = 61
+        self.assertIsNone(self.cache.get(("V2", "AAPL"), (1,)))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+        for ticker in ("A", "B", "C"):
+            self.cache.put(("V2", ticker), (1,), {"v": ticker})
+        self.assertIsNone(self.cache.get(("V2", "A"), (1,)))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_errors_and_unversioned_responses_are_not_cached(self):
+        self.cache.get_or_compute(("V2", "AAPL"), (1,), lambda: {"error": "boom"})
+        self.cache.get_or_compute(("V2", "MSFT"), None, lambda: {"ok": True})
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_invalidation_by_model_and_ticker(self):
+        self.cache.put(("V2", "AAPL", "d1"), (1,), {"v": 1})
+        self.cache.put(("get-predicted-prices", "AAPL", "d2"), (1,), {"v": 2})
+        self.assertEqual(self.cache.invalidate_model(2), 0)
+        self.assertEqual(self.cache.invalidate_model(1), 2)
+
+        self.cache.put(("V2", "MSFT", "d1"), (3,), {"v": 3})
+        self.assertEqual(self.cache.invalidate_ticker("MSFT"), 1)
+        self.assertEqual(self.cache.stats()["invalidations"], 3)
+
+
+@patch("ml_lib.controllers.SessionLocal", TestingSessionLocal)
+@patch("ml_lib.stock_market_handlerV2.SessionLocal", TestingSessionLocal)
+class TestCachedPredictions(unittest.TestCase):
+    def setUp(self):
+        Base.metadata.create_all(bind=engine, tables=TABLES)
+        db = TestingSessionLocal()
+        db.add(Stock(stock_id=1, ticker_symbol="AAPL", status=AssetStatus.ACTIVE))
+        db.add(PredictionModel(model_id=1, model_version="v1", target_stock_id=1, is_active=True,
+                               latest_modified_time=datetime(2025, 1, 1), rmse=0.1, data_points=100))
+        db.commit()
+        db.close()
+        self.cache = ResponseCache()
+        for module in (controllers, stock_market_handlerV2):
+            cache_patch = patch.object(module, "response_cache", self.cache)
+            cache_patch.start()
+            self.addCleanup(cache_patch.stop)
+
+    def tearDown(self):
+        Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        with patch("ml_lib.controllers.get_predictions", return_value={"stockData": {}}) as compute:
+            for _ in range(3):
+                controllers.get_predictions_cached("AAPL", "2025-01-01", "2025-01-10")
+            controllers.get_predictions_cached("AAPL", "2025-01-01", "2025-01-11")
+
+        self.assertEqual(compute.call_count, 2)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_stored_forecast_invalidates_the_model_responses(self):
+        with patch("ml_lib.controllers.getPredictedPricesFromDB", return_value={"ticker": "AAPL"}) as compute:
+            controllers.getPredictedPricesFromDB_cached("AAPL", "2025-01-11")
+            stock_market_handlerV2.store_prediction(1, date(2025, 1, 10), date(2025, 1, 11), 101.0, 1.0)
+            controllers.getPredictedPricesFromDB_cached("AAPL", "2025-01-11")
+
+        self.assertEqual(compute.call_count, 2)
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_retrain_changes_the_version(self):
+        with patch("ml_lib.controllers.get_predictions", return_value={"stockData": {}}) as compute:
+            controllers.get_predictions_cached("AAPL", "2025-01-01", "2025-01-10")
+            db = TestingSessionLocal()
+            db.query(PredictionModel).update({"model_version": "v2",
+                                              "latest_modified_time": datetime(2025, 1, 1) + timedelta(days=1)})
+            db.commit()
+            db.close()
+            controllers.get_predictions_cached("AAPL", "2025-01-01", "2025-01-10")
+
+        self.assertEqual(compute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
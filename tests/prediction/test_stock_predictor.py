@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from ml_lib.lstm_model import LSTMWithDropout
+from ml_lib.stock_predictor import mc_dropout_samples, predict_with_uncertainty
+
+
+class TestMonteCarloDropout(unittest.TestCase):
+    def setUp(self):
+        self.model = LSTMWithDropout(units=8, output_dim=7)
+        self.window = np.random.default_rng(0).random((1, 90, 1)).astype(np.float32)
+        self.model(self.window)
+        self.scaler = MinMaxScaler().fit(np.array([[0.0], [10.0]]))
+
+    def test_batched_samples_have_expected_shape(self):
+        samples = mc_dropout_samples(self.model, self.window, n_iter=25, seed=1)
+        self.assertEqual(samples.shape, (25, 7))
+
+    def test_seed_makes_forecast_reproducible(self):
+        first = predict_with_uncertainty(self.model, self.window, self.scaler, seed=42)
+        second = predict_with_uncertainty(self.model, self.window, self.scaler, seed=42)
+        np.testing.assert_array_equal(first[0], second[0])
+        np.testing.assert_array_equal(first[1], second[1])
+
+    def test_batched_matches_deterministic_pass_without_dropout(self):
+        self.model.dropout.rate = 0.0
+        mean_batched, std_batched = predict_with_uncertainty(self.model, self.window, self.scaler, n_iter=10)
+        mean_loop, std_loop = predict_with_uncertainty(self.model, self.window, self.scaler, n_iter=10, batched=False)
+        np.testing.assert_allclose(mean_batched, mean_loop, rtol=1e-5)
+        np.testing.assert_allclose(std_batched, std_loop, atol=1e-5)
+
+    def test_batched_matches_loop_with_identical_masks(self):
+        n_iter, seed, rate = 20, 7, self.model.dropout.rate
+        mean_batched, std_batched = predict_with_uncertainty(self.model, self.window, self.scaler,
+                                                             n_iter=n_iter, seed=seed)
+
+        # Replay the masks mc_dropout drew, one per looped forward pass
+        keep = np.random.default_rng(seed).random((n_iter, self.model.units)) >= rate
+        masks = iter(keep)
+        self.model.dropout = lambda x, training=False: x * next(masks) / (1.0 - rate)
+        mean_loop, std_loop = predict_with_uncertainty(self.model, self.window, self.scaler,
+                                                       n_iter=n_iter, batched=False)
+        np.testing.assert_allclose(mean_batched, mean_loop, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(std_batched, std_loop, rtol=1e-4, atol=1e-6)
+
+    def test_batched_matches_loop_distribution_with_dropout(self):
+        n_iter = 4000
+        batched = mc_dropout_samples(self.model, self.window, n_iter=n_iter, seed=3)
+        # Keras draws an independent dropout mask per row, i.e. the samples of n_iter looped training passes
+        looped = np.asarray(self.model(np.repeat(self.window, n_iter, axis=0), training=True))
+        self.assertGreater(looped.std(axis=0).min(), 0)
+
+        # Means agree within 5 standard errors of their difference, spreads within 10%
+        standard_error = np.sqrt((batched.var(axis=0) + looped.var(axis=0)) / n_iter)
+        self.assertTrue(np.all(np.abs(batched.mean(axis=0) - looped.mean(axis=0)) <= 5 * standard_error))
+        np.testing.assert_allclose(batched.std(axis=0), looped.std(axis=0), rtol=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from ml_lib.stock_market_handlerV2 import build_prediction_upsert, store_predictions
+
+
+class TestStorePredictions(unittest.TestCase):
+    def setUp(self):
+        self.dates = [date(2025, 1, 11 + i) for i in range(7)]
+        self.prices = [100.0 + i for i in range(7)]
+        self.stds = [1.0] * 7
+
+    def test_upsert_is_single_statement_with_closer_date_rule(self):
+        stmt = build_prediction_upsert(3, date(2025, 1, 10), self.dates, self.prices, self.stds)
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+
+        self.assertIn("ON CONFLICT (model_id, predicted_date) DO UPDATE", sql)
+        self.assertIn("WHERE stock_predictions.last_actual_data_date < excluded.last_actual_data_date", sql)
+        self.assertEqual(sql.count("INSERT INTO stock_predictions"), 1)
+        self.assertEqual(len([k for k in compiled.params if k.startswith("predicted_date")]), 7)
+
+    def test_store_predictions_executes_once_and_commits(self):
+        db = MagicMock()
+
+        @contextmanager
+        def fake_context():
+            yield db
+
+        with patch("ml_lib.stock_market_handlerV2.get_db_context", fake_context):
+            store_predictions(3, date(2025, 1, 10), self.dates, self.prices, self.stds)
+
+        self.assertEqual(db.execute.call_count, 1)
+        db.commit.assert_called_once()
+
+    def test_empty_forecast_is_a_no_op(self):
+        with patch("ml_lib.stock_market_handlerV2.get_db_context") as mock_context:
+            store_predictions(3, date(2025, 1, 10), [], [], [])
+        mock_context.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from ml_lib import training_job
+
+
+def fake_trainer(ticker_symbol, **kwargs):
+    if ticker_symbol == "FAIL":
+        return None
+    return SimpleNamespace(history=SimpleNamespace(epoch=list(range(12)))), 0.0123
+
+
+class TestTrainingJob(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.table_path = os.path.join(tmp.name, "training_jobs.json")
+        for target, replacement in (
+                ("ml_lib.training_job.configure_thread_budget", lambda threads: None),
+                ("ml_lib.training_job.trainer", fake_trainer)):
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_job(self, tickers, **kwargs):
+        return training_job.run_training_job(tickers, workers=1, table_path=self.table_path, **kwargs)
+
+    def test_records_epochs_rmse_and_wall_time(self):
+        summary = self.run_job(["AAPL", "FAIL"])
+
+        self.assertEqual((summary["trained"], summary["failed"], summary["skipped"]), (1, 1, 0))
+        with open(self.table_path) as f:
+            table = json.load(f)
+        self.assertEqual(table["AAPL"]["status"], "done")
+        self.assertEqual(table["AAPL"]["epochs"], 12)
+        self.assertAlmostEqual(table["AAPL"]["rmse"], 0.0123)
+        self.assertGreaterEqual(table["AAPL"]["wallSeconds"], 0)
+        self.assertEqual(table["FAIL"]["status"], "failed")
+
+    def test_restart_skips_completed_tickers(self):
+        self.run_job(["AAPL", "FAIL"])
+
+        with patch("ml_lib.training_job.train_ticker", wraps=training_job.train_ticker) as train_ticker:
+            summary = self.run_job(["AAPL", "FAIL"])
+
+        self.assertEqual([c.args[0] for c in train_ticker.call_args_list], ["FAIL"])
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["results"]["FAIL"]["attempts"], 2)
+
+    def test_force_retrains_completed_tickers(self):
+        self.run_job(["AAPL"])
+        summary = self.run_job(["AAPL"], force=True)
+
+        self.assertEqual((summary["trained"], summary["skipped"]), (1, 0))
+        self.assertEqual(summary["results"]["AAPL"]["attempts"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from ml_lib import tuning
+from ml_lib.stock_predictor import resolve_hyperparameters
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+    def test_rung_budgets(self):
+        self.assertEqual(tuning.rung_epochs(2, 18, 3), [2, 6, 18])
+        self.assertEqual(tuning.rung_epochs(1, 10, 3), [1, 3, 9, 10])
+
+    def test_search_space_is_covered_once(self):
+        configs = tuning.search_configs()
+        self.assertEqual(len(configs), 18)
+        self.assertEqual(len({tuple(sorted(c.items())) for c in configs}), 18)
+        self.assertEqual(len(tuning.search_configs(max_trials=5)), 5)
+
+    def test_bad_trials_are_pruned_early(self):
+        configs = [{"units": units} for units in range(9)]
+        calls = []
+
+        def train_and_score(trial_index, config, epochs):
+            calls.append((trial_index, epochs))
+            return abs(config["units"] - 6) + 1.0 / epochs
+
+        trials = tuning.successive_halving(configs, train_and_score, [1, 3, 9], eta=3)
+
+        self.assertEqual(tuning.best_trial(trials)["config"], {"units": 6})
+        self.assertEqual(len(calls), 9 + 3 + 1)
+        self.assertEqual(sum(1 for t in trials if t["prunedAt"] == 1), 6)
+        self.assertEqual(sum(1 for t in trials if t["prunedAt"] == 3), 2)
+
+
+class TestTuneTicker(unittest.TestCase):
+    def test_tunes_on_stored_prices(self):
+        frame = pd.DataFrame({"Close": 100 + np.sin(np.arange(300) / 8)}, index=pd.bdate_range("2024-01-01", periods=300))
+        space = {"units": [4, 8], "input_dim": [20, 30], "batch": [32]}
+        with patch.object(tuning, "getStockData", return_value=[frame, None, None, frame.index[-1]]):
+            result = tuning.tune_ticker("TEST", space=space, min_epochs=1, max_epochs=2, eta=2)
+
+        self.assertEqual(set(result["best"]), {"units", "input_dim", "batch"})
+        self.assertEqual(len(result["trials"]), 4)
+        self.assertEqual(sum(1 for t in result["trials"] if t["prunedAt"] is None), 2)
+        self.assertGreater(result["valRmse"], 0)
+
+
+class TestResolveHyperparameters(unittest.TestCase):
+    def test_tuned_config_fills_unspecified_values(self):
+        detail = SimpleNamespace(hyperparameters={"units": 64, "input_dim": 60, "batch": 16})
+        with patch("ml_lib.stock_predictor.get_model_details", return_value=detail):
+            self.assertEqual(resolve_hyperparameters("AAPL"), (16, 60, 64))
+            self.assertEqual(resolve_hyperparameters("AAPL", batch=8), (8, 60, 64))
+
+    def test_defaults_without_tuning(self):
+        with patch("ml_lib.stock_predictor.get_model_details", return_value=None):
+            self.assertEqual(resolve_hyperparameters("AAPL"), (32, 90, 128))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import unittest
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+from ml_lib.windowing import make_windows, split_index, window_dataset
+
+
+def loop_windows(series, input_dim, output_dim):
+    X, Y = [], []
+    for i in range(len(series) - input_dim - output_dim):
+        X.append(series[i:i + input_dim])
+        Y.append(series[i + input_dim:i + input_dim + output_dim])
+    return np.array(X).reshape(-1, input_dim, 1), np.array(Y).reshape(-1, output_dim)
+
+
+class TestWindowing(unittest.TestCase):
+    def setUp(self):
+        self.series = np.random.default_rng(0).random((400, 1)).astype(np.float32)
+
+    def test_windows_match_loop_without_copying(self):
+        X, Y = make_windows(self.series, 90, 7)
+        expected_X, expected_Y = loop_windows(self.series, 90, 7)
+
+        np.testing.assert_array_equal(X, expected_X)
+        np.testing.assert_array_equal(Y, expected_Y)
+        self.assertTrue(np.shares_memory(X, self.series))
+        self.assertTrue(np.shares_memory(Y, self.series))
+
+    def test_short_series_has_no_windows(self):
+        X, Y = make_windows(self.series[:50], 90, 7)
+        self.assertEqual(X.shape, (0, 90, 1))
+        self.assertEqual(Y.shape, (0, 7))
+
+    def test_split_matches_train_test_split(self):
+        X, Y = make_windows(self.series, 90, 7)
+        _, X_test, _, _ = train_test_split(X, Y, test_size=0.05, shuffle=False)
+        np.testing.assert_array_equal(X[split_index(len(X), 0.05):], X_test)
+
+    def test_dataset_yields_the_same_windows(self):
+        X, Y = make_windows(self.series, 90, 7)
+        batches = list(window_dataset(self.series, 10, 110, 90, 7, batch_size=32).as_numpy_iterator())
+
+        self.assertEqual([len(x) for x, _ in batches], [32, 32, 32, 4])
+        np.testing.assert_array_equal(np.concatenate([x for x, _ in batches]), X[10:110])
+        np.testing.assert_array_equal(np.concatenate([y for _, y in batches]), Y[10:110])
+
+    def test_shuffled_dataset_covers_every_window_once(self):
+        X, Y = make_windows(self.series, 90, 7)
+        targets = np.concatenate([y for _, y in window_dataset(self.series, 0, len(X), 90, 7, shuffle=True).as_numpy_iterator()])
+        np.testing.assert_array_equal(np.sort(targets[:, 0]), np.sort(Y[:, 0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
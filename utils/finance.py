@@ -4,16 +4,21 @@ from pypfopt.expected_returns import mean_historical_return,capm_return
 from pypfopt.risk_models import sample_cov
 from pypfopt.efficient_frontier import EfficientFrontier
 from utils.portfolioconfig import BENCHMARK_TICKER
+from ml_lib.price_store import price_store
 
 def fetch_price_data(tickers, start_date, end_date):
     try:
         # Add Benchmark ticker to the downloads
         
         all_tickers = tickers + [BENCHMARK_TICKER]
-        data = yf.download(all_tickers, start=start_date, end=end_date, group_by='ticker', auto_adjust=True)
-        if data.empty:
-            raise ValueError("No data was fetched. Please check tickers and date range.")
-        price_data = pd.DataFrame({ticker: data[ticker]['Close'] for ticker in all_tickers})
+        cached = {ticker: price_store.history_frame(ticker, start_date, end_date) for ticker in all_tickers}
+        if all(frame is not None for frame in cached.values()):
+            price_data = pd.DataFrame({ticker: frame['Close'] for ticker, frame in cached.items()})
+        else:
+            data = yf.download(all_tickers, start=start_date, end=end_date, group_by='ticker', auto_adjust=True)
+            if data.empty:
+                raise ValueError("No data was fetched. Please check tickers and date range.")
+            price_data = pd.DataFrame({ticker: data[ticker]['Close'] for ticker in all_tickers})
         price_data.dropna(inplace=True)
         if price_data.empty:
             raise ValueError("Fetched data contains only NaN values after processing.")